@@ -1,35 +1,51 @@
 # main.py
 
 import os
+import argparse
 import logging
 import asyncio
-import aiohttp
-from datetime import datetime
+import multiprocessing
+import signal
+from concurrent.futures import ProcessPoolExecutor
 
-from modules.utils import setup_logging, get_bl_akhir, get_bl_awal, get_rptag_addition
-from modules.loader import load_customer_numbers_from_files, load_customer_numbers_xlsx
-from modules.excel_writer import create_excel
+
+from modules.log_pipeline import setup_logging, shutdown_logging
+from modules.loader import iter_customer_jobs, load_customer_numbers_xlsx, write_rejects_report
+from modules.output_writers import write_outputs, write_outputs_by_source
 from modules.scraper_handler import scrape_customer_data
 from modules.scraper_api import ScraperAPI
+from modules.scheduler import AdaptiveScheduler
+from modules.circuit_breaker import CircuitBreaker
+from modules.retry_policy import RetryPolicy, RetryLater, OUTCOME_RETRY
+from modules.result_cache import ResultCache, COMMIT_EVERY
+from modules.journal import RunJournal
+from modules.cli import parse_args, resolve_input_files
+from modules.pipeline import ReportCollector, run_pipeline, dedupe_jobs, fan_out
+from modules.sharding import select_shard, shard_path, merge_shards
+from modules.models import InquiryResult
+from modules.metrics import RunMetrics, MetricsServer
+from modules.service import InquiryService
 
 # Import fungsi cleanup
 from cleanup import cleanup_temp_files, clear_cache, clear_pycache
 
 
-async def main():
-    setup_logging()
-    scraper = ScraperAPI()
+def select_files_interactively(folder_path):
+    """
+    Menampilkan daftar file di folder IDPel dan meminta pengguna memilih nomor file.
 
-    folder_path = os.path.join(os.getcwd(), 'IDPel')
+    Returns:
+        list: Path file yang dipilih, atau list kosong jika tidak ada pilihan yang valid.
+    """
     if not os.path.exists(folder_path) or not os.path.isdir(folder_path):
         logging.error(f"Folder {folder_path} tidak ditemukan atau bukan folder.")
-        return
+        return []
 
     # List semua file .txt dan .xlsx di folder IDPel
     all_files = [f for f in os.listdir(folder_path) if f.endswith('.txt') or f.endswith('.xlsx')]
     if not all_files:
         logging.error("Tidak ada file .txt atau .xlsx yang ditemukan di folder IDPel.")
-        return
+        return []
 
     print("\n=== Daftar File di Folder IDPel ===")
     for idx, file_name in enumerate(all_files, 1):
@@ -42,125 +58,374 @@ async def main():
         selected_indices = [int(i.strip()) for i in selected_indices.split(',') if i.strip().isdigit()]
         if not selected_indices:
             logging.error("Tidak ada file yang dipilih untuk diproses.")
-            return
+            return []
 
         selected_files = [all_files[i - 1] for i in selected_indices if 0 < i <= len(all_files)]
         if not selected_files:
             logging.error("Tidak ada file yang valid dipilih untuk diproses.")
-            return
+            return []
     except Exception as e:
         logging.error(f"Input tidak valid: {e}")
-        return
+        return []
+    return [os.path.join(folder_path, selected_file) for selected_file in selected_files]
+
+
+def build_jobs(selected_paths, rejects=None):
+    """
+    Menghasilkan CustomerJob dari file yang dipilih secara lazy, sesuai urutan file. File .txt dibaca
+    baris demi baris (loader.iter_customer_jobs), jadi isi file tidak pernah dimuat utuh ke memori.
+
+    Parameters:
+        selected_paths (list): Path file .txt/.xlsx.
+        rejects (list): Penampung baris yang bukan IDPEL valid (loader.RejectedLine); baru lengkap
+            setelah generator habis dibaca.
 
-    # Memuat data tambahan dari semua file .xlsx yang dipilih
-    file_data_map = {}
-    for selected_file in selected_files:
-        selected_file_path = os.path.join(folder_path, selected_file)
+    Yields:
+        CustomerJob: Job dengan data pelanggan dari file .xlsx jika tersedia; duplikasi belum dihapus
+        (dilakukan oleh dedupe_jobs).
+    """
+    # Memuat data pelanggan dari semua file .xlsx yang dipilih (dipakai untuk ID dari file .txt)
+    customer_info = {}
+    for selected_file_path in selected_paths:
         if selected_file_path.endswith('.xlsx'):
-            file_data_map.update(load_customer_numbers_xlsx(selected_file_path))
+            customer_info.update(load_customer_numbers_xlsx(selected_file_path))
 
-    async with aiohttp.ClientSession() as session:
-        access_token_url = "listrik-pln/tagihan-listrik"
-        access_token = await scraper.get_access_token(access_token_url, session)
-        if not access_token:
-            logging.error("Gagal mendapatkan access token. Program dihentikan.")
-            return
+    # Setiap job membawa file sumbernya sendiri
+    for selected_file_path in selected_paths:
+        file_name = os.path.basename(selected_file_path)
+        logging.info(f"Memproses file: {file_name}")
 
-        output_dir = os.path.join(os.getcwd(), 'output')
-        os.makedirs(output_dir, exist_ok=True)
+        count = 0
+        # Duplikasi (dalam file maupun lintas file) dihapus oleh dedupe_jobs
+        for job in iter_customer_jobs([selected_file_path], rejects, unique=False):
+            if job.info is None:
+                job.info = customer_info.get(job.customer_number)
+            count += 1
+            yield job
+        if not count:
+            logging.warning(f"Tidak ada customer numbers yang ditemukan dalam file {file_name}.")
+
+
+def build_scraper(args, result_cache, metrics, scraper_class=ScraperAPI):
+    """
+    Membuat ScraperAPI sesuai opsi run (retry, circuit breaker, timeout dan connection pool).
+
+    Parameters:
+        args (argparse.Namespace): Opsi run.
+        result_cache (ResultCache): Result cache, atau None.
+        metrics (RunMetrics): Metrik run.
+        scraper_class (type): ScraperAPI atau subclass-nya.
+
+    Returns:
+        ScraperAPI: Scraper yang siap dipakai.
+    """
+    # Satu kebijakan retry dipakai bersama oleh ScraperAPI dan scraper_handler
+    retry_policy = RetryPolicy(max_attempts=args.max_attempts, base_delay=args.retry_delay)
+    # Satu circuit breaker untuk semua request inquiry: saat endpoint bermasalah semua request dijeda
+    circuit_breaker = CircuitBreaker(
+        consecutive_failures=args.breaker_failures,
+        error_rate=args.breaker_error_rate,
+        window=args.breaker_window,
+        open_seconds=args.breaker_open_seconds,
+        half_open_probes=args.breaker_probes) if args.breaker else None
+    return scraper_class(
+        retry_policy=retry_policy,
+        result_cache=result_cache,
+        force_refresh=args.force_refresh,
+        request_timeout=args.timeout,
+        connect_timeout=args.connect_timeout,
+        read_timeout=args.read_timeout,
+        connection_limit=args.connection_limit,
+        connection_limit_per_host=args.connection_limit_per_host,
+        dns_cache_ttl=args.dns_cache_ttl,
+        keepalive_timeout=args.keepalive_timeout,
+        base_url=args.base_url,
+        api_url=args.api_url,
+        metrics=metrics,
+        circuit_breaker=circuit_breaker)
+
+
+def open_result_cache(args, shared=False):
+    """
+    Membuka result cache sesuai opsi run.
 
-        # Mengatur output file name
-        output_file_name = "data_tagihan_listrik_output.xlsx"
-        output_file = os.path.join(output_dir, output_file_name)
-
-        # Data yang berhasil di-scrape
-        success_data = []
-        failed_data = []
-        all_periods = set()
-
-        # Definisikan error yang non-retryable
-        non_retry_errors = [
-            "nomor tidak terdaftar. coba periksa lagi, yuk.",
-            "tagihan tidak ditemukan atau sudah dibayar.",
-            "tidak terdaftar",
-            "tagihan tidak ditemukan"
-            # Tambahkan error lain yang tidak ingin Anda retry
-        ]
-
-        for selected_file in selected_files:
-            selected_file_path = os.path.join(folder_path, selected_file)
-            file_name = os.path.basename(selected_file_path)
-            logging.info(f"Memproses file: {file_name}")
-
-            customer_numbers, customer_sources = load_customer_numbers_from_files(selected_file_path)
-            if not customer_numbers:
-                logging.warning(f"Tidak ada customer numbers yang ditemukan dalam file {file_name}.")
-                continue
-
-            # Proses scraping untuk setiap ID pelanggan dalam file saat ini
-            tasks = [
-                scrape_customer_data(
+    Parameters:
+        args (argparse.Namespace): Opsi run.
+        shared (bool): True jika proses lain menulis ke file cache yang sama bersamaan (shard);
+            setiap hasil langsung di-commit agar proses lain tidak menunggu lock SQLite.
+
+    Returns:
+        ResultCache: Result cache, atau None jika --no-cache.
+    """
+    if not args.cache:
+        return None
+    return ResultCache(args.cache_path, commit_every=1 if shared else COMMIT_EVERY)
+
+
+async def scrape_jobs(args, jobs, journal_path, sinks, scraper_class=ScraperAPI, shared_cache=False, sources=None):
+    """
+    Men-scrape job dengan satu ClientSession dan ScraperAPI, menulis setiap hasil ke journal
+    lalu ke sink lain.
+
+    Parameters:
+        args (argparse.Namespace): Opsi run.
+        jobs (iterable): CustomerJob yang akan diproses; sudah unik jika `sources` diberikan.
+        journal_path (str): Path journal run (atau journal parsial shard).
+        sinks (list): Sink tambahan, misalnya ReportCollector.
+        scraper_class (type): ScraperAPI atau subclass-nya (misalnya untuk benchmark).
+        shared_cache (bool): True jika proses lain memakai file result cache yang sama (shard).
+        sources (dict): Hasil dedupe_jobs untuk `jobs`; None berarti deduplikasi dilakukan di sini.
+
+    Returns:
+        bool: False jika access token tidak didapat.
+    """
+    if sources is None:
+        # ID yang ada di beberapa file di-scrape sekali, hasilnya disebar ke setiap file sumber
+        jobs, sources = dedupe_jobs(jobs)
+    result_cache = open_result_cache(args, shared_cache)
+    metrics = RunMetrics()
+    metrics_server = MetricsServer(metrics, args.metrics_port) if args.metrics_port else None
+    scraper = build_scraper(args, result_cache, metrics, scraper_class)
+    retry_policy = scraper.retry_policy
+    scheduler = AdaptiveScheduler(initial_concurrency=args.concurrency, max_concurrency=args.max_concurrency)
+
+    try:
+        if metrics_server is not None:
+            await metrics_server.start()
+        async with scraper.create_session() as session:
+            access_token_url = "listrik-pln/tagihan-listrik"
+            access_token = await scraper.get_access_token(access_token_url, session)
+            if not access_token:
+                logging.error("Gagal mendapatkan access token. Program dihentikan.")
+                return False
+            # Perbarui token di background agar run lebih dari satu jam tidak terhenti
+            scraper.tokens.start_background_refresh(session)
+
+            # Hasil yang sudah final (sukses atau error non-retryable) dari run sebelumnya
+            done = {}
+            if args.resume:
+                done = {
+                    customer_number: entry for customer_number, entry in RunJournal.replay(journal_path).items()
+                    if retry_policy.classify(entry["data"]) != OUTCOME_RETRY
+                }
+            journal = RunJournal(journal_path, resume=args.resume)
+
+            pending = []
+            for job in jobs:
+                if job.customer_number in done:
+                    result = InquiryResult.from_response(job, done[job.customer_number]["data"])
+                    for source_result in fan_out(result, sources.get(job.customer_number)):
+                        for sink in sinks:
+                            sink.record(source_result)
+                else:
+                    pending.append(job)
+            if done:
+                logging.info(f"{len(jobs) - len(pending)} customer numbers dilewati (sudah ada di journal).")
+            done.clear()
+
+            # Jatah retry ID yang sedang menunggu di antrean retry scheduler
+            budgets = {}
+
+            # Proses scraping untuk setiap job, dibatasi oleh scheduler; retry tidak menahan slot
+            async def scrape(job):
+                result = await scrape_customer_data(
                     scraper,
-                    customer,
+                    job,
                     access_token,
                     session,
-                    {},  # request_counts
-                    [0],  # global_request_count
-                    non_retry_errors,  # non_retry_errors
-                    max_retries=2,  # jumlah maksimal retry
-                    retry_delay=5    # delay antar retry (dalam detik)
+                    budget=budgets.pop(job.customer_number, None),
+                    defer_retries=True,
                 )
-                for customer in customer_numbers
-            ]
-            results = await asyncio.gather(*tasks)
-
-            # Validasi hasil
-            for result in results:
-                if not isinstance(result, tuple) or len(result) != 2:
-                    logging.error(f"Unexpected result format: {result}")
-                    continue
-                customer_number, data = result
-                if data and 'customer_number' in data:
-                    # Tambahkan source_file jika ada
-                    index = customer_numbers.index(customer_number)
-                    data['source_file'] = os.path.basename(customer_sources[index])
-                    success_data.append(data)
-                    for bill in data.get("bills", []):
-                        all_periods.add(bill.get("bill_period"))
-                else:
-                    # Tambahkan source_file dan ekstrak pesan error
-                    index = customer_numbers.index(customer_number)
-                    source_file = os.path.basename(customer_sources[index])
-                    error_message = "Gagal scraping"  # Default message
-                    # Cek apakah data memiliki pesan error yang spesifik
-                    if isinstance(data, dict) and 'message' in data:
-                        if data['message'].startswith("Error: "):
-                            error_message = data['message'].split("Error: ", 1)[1]
-                        else:
-                            error_message = data['message']
-                    failed_data.append({
-                        "customer_number": customer_number,
-                        "error": error_message,
-                        "source_file": source_file
-                    })
-
-        # Tambahkan nilai tambahan dan markup
-        for record in success_data:
-            source = record.get("source_file", "")
-            tambahan = file_data_map.get(source, 0)
-            record['tambahan'] = tambahan
-            tagihan = sum(bill.get("amount", 0) for bill in record.get("bills", []))
-            record['markup'] = tagihan + tambahan
-
-        periods = sorted(all_periods, key=lambda x: datetime.strptime(x, "%Y-%m-%d")) if all_periods else []
-
-        # Menulis hasil ke file Excel
-        create_excel(success_data, failed_data, periods, output_file, file_data_map)
+                if isinstance(result, RetryLater):
+                    budgets[job.customer_number] = result.budget
+                return result
+
+            # Hasil diteruskan ke journal (segera, agar tidak hilang jika run terhenti) dan ke sink lain
+            try:
+                await run_pipeline(scheduler, pending, scrape, [journal, metrics] + list(sinks), sources)
+            finally:
+                journal.close()
+                await scraper.tokens.stop()
+                scraper.log_connection_stats()
+    finally:
+        if metrics_server is not None:
+            await metrics_server.stop()
+        metrics.write(args.metrics_json, args.metrics_prom)
+        if result_cache is not None:
+            result_cache.close()
+    return True
+
+
+async def run_service(args, scraper_class=ScraperAPI):
+    """
+    Mode --serve: menjalankan InquiryService sampai dihentikan (Ctrl+C atau SIGTERM). Session, token dan result cache
+    dipakai ulang oleh semua request; metrik ditulis saat service berhenti.
+
+    Returns:
+        bool: False jika service tidak bisa dijalankan (access token tidak didapat).
+    """
+    result_cache = open_result_cache(args)
+    metrics = RunMetrics()
+    scraper = build_scraper(args, result_cache, metrics, scraper_class)
+    service = InquiryService(scraper, args.serve, host=args.serve_host, concurrency=args.max_concurrency,
+                             metrics_server=MetricsServer(metrics, args.serve))
+    stopped = asyncio.Event()
+    try:
+        # SIGTERM (misalnya dari service manager) menghentikan service dengan rapi seperti Ctrl+C
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopped.set)
+    except (NotImplementedError, AttributeError):
+        pass  # Windows: hanya Ctrl+C
+    try:
+        if not await service.start():
+            return False
+        await stopped.wait()
+    finally:
+        await service.stop()
+        metrics.write(args.metrics_json, args.metrics_prom)
+        if result_cache is not None:
+            result_cache.close()
+    return True
+
+
+async def run_shard(args, selected_paths, shard_index, shard_count):
+    """
+    Menjalankan satu shard: hanya customer_number dengan shard_of(...) == shard_index yang di-scrape,
+    hasilnya ditulis ke journal parsial shard tersebut.
+
+    Returns:
+        str: Path journal parsial, atau None jika shard gagal.
+    """
+    rejects = []
+    jobs = select_shard(build_jobs(selected_paths, rejects), shard_index, shard_count)
+    # Semua shard membaca file yang sama; laporan baris ditolak cukup ditulis shard pertama
+    if shard_index == 0:
+        write_rejects_report(rejects, args.rejects)
+    partial_path = shard_path(args.journal, shard_index, shard_count)
+    # Setiap shard menulis metriknya sendiri (dan memakai port live sendiri)
+    args = argparse.Namespace(**vars(args))
+    args.metrics_json = shard_path(args.metrics_json, shard_index, shard_count)
+    args.metrics_prom = shard_path(args.metrics_prom, shard_index, shard_count)
+    if args.metrics_port:
+        args.metrics_port += shard_index
+    logging.info(f"Shard {shard_index + 1}/{shard_count}: {len(jobs)} customer numbers -> {partial_path}")
+    # Shard lain (proses atau host) bisa menulis ke file result cache yang sama
+    if not await scrape_jobs(args, jobs, partial_path, [], shared_cache=True):
+        return None
+    return partial_path
+
+
+def run_shard_process(args, selected_paths, shard_index, shard_count):
+    """
+    Entry point proses worker untuk --shards: setiap proses punya event loop, ClientSession,
+    ScraperAPI dan file log sendiri.
+    """
+    configure_logging(args, shard_path(args.log_file, shard_index, shard_count))
+    try:
+        return asyncio.run(run_shard(args, selected_paths, shard_index, shard_count))
+    finally:
+        shutdown_logging()
+
+
+async def run_sharded(args, selected_paths):
+    """
+    Koordinator --shards: menjalankan setiap shard di proses terpisah lalu mengembalikan
+    path journal parsial yang berhasil.
+    """
+    loop = asyncio.get_running_loop()
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=args.shards, mp_context=context) as pool:
+        partials = await asyncio.gather(*(
+            loop.run_in_executor(pool, run_shard_process, args, selected_paths, index, args.shards)
+            for index in range(args.shards)
+        ))
+    failed = [index + 1 for index, path in enumerate(partials) if path is None]
+    if failed:
+        logging.error(f"Shard {', '.join(map(str, failed))} gagal; hasilnya tidak ikut digabung.")
+    return [path for path in partials if path]
+
+
+def write_report(collector, output_file, formats=("xlsx",), split_by_source=False, workers=None):
+    output_dir = os.path.dirname(output_file)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    if split_by_source:
+        # Satu laporan per file sumber, dibangun paralel di process pool
+        write_outputs_by_source(formats, collector.success_data, collector.failed_data, output_file, workers)
+        return
+    # Menulis hasil ke setiap format yang dipilih (--format)
+    write_outputs(formats, collector.success_data, collector.failed_data, collector.periods, output_file)
+
+
+def configure_logging(args, log_file=None):
+    setup_logging(
+        level=getattr(logging, args.log_level),
+        log_format=args.log_format,
+        mode=args.log_mode,
+        sample_rate=args.log_sample_rate,
+        log_file=log_file or args.log_file,
+        max_bytes=args.log_max_bytes,
+        backup_count=args.log_backups)
+
+
+async def main(args=None):
+    args = args or parse_args([])
+    configure_logging(args)
+    collector = ReportCollector()
+
+    # --merge: hanya menggabungkan journal shard (misalnya dari host lain) ke satu output
+    if args.merge:
+        merge_shards(args.merge, [collector])
+        write_report(collector, args.output, args.formats, args.split_by_source, args.report_workers)
+        return
+
+    # --serve: service HTTP lokal untuk cek tagihan ad-hoc, tanpa file input dan laporan
+    if args.serve is not None:
+        await run_service(args)
+        return
+
+    # Tanpa --files, file dipilih lewat menu interaktif seperti biasa
+    if args.files:
+        selected_paths = resolve_input_files(args.files, args.input_dir)
+        if not selected_paths:
+            logging.error("Tidak ada file yang valid dipilih untuk diproses.")
+            return
+    else:
+        selected_paths = select_files_interactively(os.path.join(os.getcwd(), args.input_dir))
+        if not selected_paths:
+            return
+
+    if args.shard_count:
+        # Satu shard saja (misalnya di host terpisah); output digabung nanti dengan --merge
+        partial_path = await run_shard(args, selected_paths, args.shard_index - 1, args.shard_count)
+        if partial_path:
+            logging.info(f"Shard selesai. Gabungkan dengan: python main.py --merge {partial_path} ...")
+        return
+
+    if args.shards > 1:
+        merge_shards(await run_sharded(args, selected_paths), [collector])
+        write_report(collector, args.output, args.formats, args.split_by_source, args.report_workers)
+    else:
+        rejects = []
+        # Job dibaca langsung dari generator loader ke daftar job unik, tanpa list per file
+        jobs, sources = dedupe_jobs(build_jobs(selected_paths, rejects))
+        # Baris yang bukan IDPEL valid dilaporkan sebelum scraping dimulai
+        write_rejects_report(rejects, args.rejects)
+        if not await scrape_jobs(args, jobs, args.journal, [collector], sources=sources):
+            return
+        write_report(collector, args.output, args.formats, args.split_by_source, args.report_workers)
 
     # Jalankan cleanup setelah proses selesai
     cleanup_temp_files()
     clear_cache()
-    clear_pycache()
+    # Bytecode cache dipertahankan agar run berikutnya tidak meng-compile ulang; hapus hanya jika diminta
+    if args.clear_pycache:
+        clear_pycache()
+
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        asyncio.run(main(parse_args()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shutdown_logging()
@@ -0,0 +1,56 @@
+# modules/billing.py
+
+from .utils import get_rptag_addition
+
+
+class BillSummary:
+    """
+    Indeks tagihan per record yang dibangun sekali saat hasil tiba dan dipakai ulang oleh
+    sheet Sukses, sheet TUL dan perhitungan markup.
+
+    Attributes:
+        by_period (dict): bill_period -> amount.
+        lbr (int): Jumlah periode (lembar) tagihan.
+        tagihan (int): Total amount semua periode.
+        denda (int): penalty_fee.
+        admin (int): admin_charge.
+        total (int): tagihan + denda + admin.
+        rptag (int): tagihan + tambahan RPTAG sesuai file sumber.
+    """
+
+    __slots__ = ("by_period", "lbr", "tagihan", "denda", "admin", "total", "rptag")
+
+    def __init__(self, by_period, lbr, tagihan, denda, admin, rptag):
+        self.by_period = by_period
+        self.lbr = lbr
+        self.tagihan = tagihan
+        self.denda = denda
+        self.admin = admin
+        self.total = tagihan + denda + admin
+        self.rptag = rptag
+
+
+def summarize_bills(result):
+    """
+    Membangun BillSummary untuk satu hasil sukses.
+
+    Parameters:
+        result (InquiryResult): Hasil dengan bills, penalty_fee, admin_charge dan source_file.
+
+    Returns:
+        BillSummary: Indeks periode dan total yang sudah dihitung.
+    """
+    by_period = {}
+    tagihan = 0
+    for bill in result.bills:
+        # Periode pertama yang cocok dipakai, sama seperti pencarian sebelumnya
+        by_period.setdefault(bill.period, bill.amount)
+        tagihan += bill.amount
+    return BillSummary(
+        by_period,
+        len(result.bills),
+        tagihan,
+        result.penalty_fee,
+        result.admin_charge,
+        tagihan + get_rptag_addition(result.source_file),
+    )
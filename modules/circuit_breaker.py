@@ -0,0 +1,183 @@
+# modules/circuit_breaker.py
+
+import asyncio
+import logging
+import time
+from collections import deque
+
+from .scheduler import is_congestion_result
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half-open"
+
+DEFAULT_CONSECUTIVE_FAILURES = 20
+DEFAULT_ERROR_RATE = 0.5
+DEFAULT_WINDOW = 50
+DEFAULT_OPEN_SECONDS = 30.0
+DEFAULT_MAX_OPEN_SECONDS = 300.0
+DEFAULT_HALF_OPEN_PROBES = 3
+
+
+def is_endpoint_failure(data):
+    """
+    Menentukan apakah respons inquiry menandakan endpoint sedang bermasalah: 429/5xx,
+    "Unexpected error", atau request yang gagal tanpa respons (timeout, koneksi terputus).
+
+    Jawaban bisnis seperti "tidak terdaftar" atau "Data kosong" bukan kegagalan endpoint.
+
+    Parameters:
+        data (dict): Hasil ScraperAPI._post_inquiry, atau None jika request tidak selesai.
+
+    Returns:
+        bool: True jika dihitung sebagai kegagalan oleh circuit breaker.
+    """
+    if not isinstance(data, dict):
+        return True
+    if 'customer_number' in data:
+        return False
+    if 'status_code' not in data and str(data.get('message', '')).startswith("Error:"):
+        return True
+    return is_congestion_result(data)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker bersama untuk endpoint inquiry.
+
+    Breaker terbuka setelah `consecutive_failures` kegagalan berturut-turut, atau jika porsi kegagalan
+    di `window` request terakhir mencapai `error_rate`. Selama terbuka semua request menunggu di
+    `acquire()` (jatah retry per ID tidak terpakai). Setelah `open_seconds`, breaker half-open dan hanya
+    `half_open_probes` request percobaan yang dikirim: semuanya sukses menutup breaker, satu gagal
+    membukanya lagi dengan jeda dua kali lipat (maksimal `max_open_seconds`).
+
+    `acquire()` mengembalikan nomor generasi state; `record()` mengabaikan hasil dari generasi lama,
+    misalnya request yang dikirim saat breaker masih tertutup tetapi selesai ketika half-open.
+
+    Parameters:
+        consecutive_failures (int): Jumlah kegagalan berturut-turut yang membuka breaker.
+        error_rate (float): Porsi kegagalan (0-1) di window yang membuka breaker.
+        window (int): Jumlah hasil request terakhir untuk menghitung error_rate.
+        open_seconds (float): Jeda awal sebelum half-open.
+        max_open_seconds (float): Batas atas jeda setelah probe gagal berulang kali.
+        half_open_probes (int): Jumlah request percobaan saat half-open.
+        clock (callable): Sumber waktu monotonic.
+    """
+
+    def __init__(
+            self,
+            consecutive_failures=DEFAULT_CONSECUTIVE_FAILURES,
+            error_rate=DEFAULT_ERROR_RATE,
+            window=DEFAULT_WINDOW,
+            open_seconds=DEFAULT_OPEN_SECONDS,
+            max_open_seconds=DEFAULT_MAX_OPEN_SECONDS,
+            half_open_probes=DEFAULT_HALF_OPEN_PROBES,
+            clock=time.monotonic):
+        if consecutive_failures < 1 or window < 1 or half_open_probes < 1:
+            raise ValueError("consecutive_failures, window dan half_open_probes minimal 1.")
+        self.consecutive_failures = consecutive_failures
+        self.error_rate = error_rate
+        self.window = window
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max(open_seconds, max_open_seconds)
+        self.half_open_probes = half_open_probes
+        self.clock = clock
+
+        self.state = STATE_CLOSED
+        self.opened = 0
+        self._outcomes = deque(maxlen=window)
+        self._streak = 0
+        self._cooldown = open_seconds
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_successes = 0
+        # Naik setiap pergantian state; hasil request dari generasi sebelumnya tidak dihitung
+        self._generation = 0
+        # Dibuat saat pertama kali ditunggu agar terikat ke event loop yang sedang berjalan
+        self._changed = None
+
+    async def acquire(self):
+        """
+        Menunggu sampai request boleh dikirim: langsung saat tertutup, sampai jeda selesai saat terbuka,
+        dan sampai ada jatah probe (atau breaker tertutup) saat half-open.
+
+        Returns:
+            int: Generasi state saat izin diberikan; teruskan ke `record()`.
+        """
+        while True:
+            if self.state == STATE_CLOSED:
+                return self._generation
+            if self.state == STATE_OPEN:
+                remaining = self._opened_at + self._cooldown - self.clock()
+                if remaining > 0:
+                    await self._wait(remaining)
+                    continue
+                self._transition(STATE_HALF_OPEN)
+                logger.warning(f"Circuit breaker half-open: mengirim {self.half_open_probes} request percobaan.")
+            if self._probes < self.half_open_probes:
+                self._probes += 1
+                return self._generation
+            await self._wait(None)
+
+    def record(self, failed, generation=None):
+        """
+        Mencatat hasil satu request yang sudah melewati `acquire()`.
+
+        Parameters:
+            failed (bool): True jika request gagal karena endpoint (lihat is_endpoint_failure).
+            generation (int): Nilai kembalian `acquire()` untuk request ini; None berarti generasi saat ini.
+        """
+        if generation is not None and generation != self._generation:
+            # Request dikirim sebelum state terakhir berganti: saat half-open hasilnya bukan hasil probe
+            return
+        if self.state == STATE_OPEN:
+            # Hasil request yang dikirim sebelum breaker terbuka tidak mengubah apa pun
+            return
+        if self.state == STATE_HALF_OPEN:
+            if failed:
+                self._cooldown = min(self.max_open_seconds, self._cooldown * 2)
+                self._open("request percobaan gagal")
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.half_open_probes:
+                self._cooldown = self.open_seconds
+                self._outcomes.clear()
+                self._streak = 0
+                self._transition(STATE_CLOSED)
+                logger.warning("Circuit breaker tertutup kembali; pengiriman request dilanjutkan.")
+            return
+
+        self._outcomes.append(failed)
+        self._streak = self._streak + 1 if failed else 0
+        if self._streak >= self.consecutive_failures:
+            self._open(f"{self._streak} kegagalan berturut-turut")
+        elif len(self._outcomes) == self.window:
+            rate = sum(self._outcomes) / self.window
+            if rate >= self.error_rate:
+                self._open(f"{rate:.0%} dari {self.window} request terakhir gagal")
+
+    def _open(self, reason):
+        self.opened += 1
+        self._opened_at = self.clock()
+        self._transition(STATE_OPEN)
+        logger.warning(f"Circuit breaker terbuka ({reason}); semua request dijeda {self._cooldown:.1f} detik.")
+
+    def _transition(self, state):
+        self.state = state
+        self._generation += 1
+        self._probes = 0
+        self._probe_successes = 0
+        # Bangunkan semua coroutine yang menunggu di acquire() agar memeriksa state baru
+        if self._changed is not None:
+            self._changed.set()
+            self._changed = None
+
+    async def _wait(self, timeout):
+        if self._changed is None:
+            self._changed = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
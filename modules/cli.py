@@ -0,0 +1,182 @@
+# modules/cli.py
+
+import argparse
+import glob
+import json
+import logging
+import os
+
+from .circuit_breaker import (
+    DEFAULT_CONSECUTIVE_FAILURES, DEFAULT_ERROR_RATE, DEFAULT_WINDOW, DEFAULT_OPEN_SECONDS, DEFAULT_HALF_OPEN_PROBES,
+)
+from .journal import DEFAULT_JOURNAL_PATH
+from .loader import DEFAULT_REJECTS_PATH
+from .log_pipeline import LOG_DIR, LOG_FILE, LOG_MODES, DEFAULT_MAX_BYTES, DEFAULT_BACKUP_COUNT
+from .output_writers import OUTPUT_FORMATS, FORMAT_XLSX, missing_dependency
+from .metrics import DEFAULT_METRICS_JSON_PATH, DEFAULT_METRICS_PROM_PATH
+from .result_cache import DEFAULT_CACHE_PATH
+from .retry_policy import DEFAULT_MAX_ATTEMPTS, DEFAULT_BASE_DELAY
+from .scheduler import DEFAULT_INITIAL_CONCURRENCY, DEFAULT_MAX_CONCURRENCY
+from .service import DEFAULT_SERVICE_HOST
+from .scraper_api import (
+    ScraperAPI, DEFAULT_REQUEST_TIMEOUT, DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT, DEFAULT_CONNECTION_LIMIT,
+    DEFAULT_CONNECTION_LIMIT_PER_HOST, DEFAULT_DNS_CACHE_TTL, DEFAULT_KEEPALIVE_TIMEOUT,
+)
+
+DEFAULT_INPUT_DIR = 'IDPel'
+DEFAULT_OUTPUT_PATH = os.path.join('output', 'data_tagihan_listrik_output.xlsx')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Scraper tagihan listrik PLN. Tanpa --files, file dipilih lewat menu interaktif.")
+    parser.add_argument("--config", help="File konfigurasi JSON; key sama dengan nama opsi (misalnya max_attempts).")
+    parser.add_argument("--files", nargs="+", metavar="GLOB",
+                        help="Glob file .txt/.xlsx yang diproses (relatif terhadap --input-dir atau path biasa).")
+    parser.add_argument("--input-dir", default=DEFAULT_INPUT_DIR, help="Folder file IDPel untuk menu interaktif.")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_PATH, help="Path file output.")
+    parser.add_argument("--rejects", default=DEFAULT_REJECTS_PATH,
+                        help="Path laporan CSV baris input yang bukan IDPEL 12 digit (tidak di-scrape).")
+    parser.add_argument("--format", dest="formats", nargs="+", choices=OUTPUT_FORMATS, default=[FORMAT_XLSX],
+                        help="Format output: xlsx (workbook), csv, jsonl atau parquet (butuh pyarrow); "
+                             "selain xlsx, satu file per sheet misalnya output/run_Sukses.csv.")
+    parser.add_argument("--split-by-source", action="store_true",
+                        help="Tulis satu laporan per file sumber (misalnya output/run_JAB.xlsx) secara paralel, "
+                             "ditambah indeks output/run_index.xlsx.")
+    parser.add_argument("--report-workers", type=int,
+                        help="Jumlah proses untuk --split-by-source; default jumlah CPU.")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_INITIAL_CONCURRENCY,
+                        help="Konkurensi awal scheduler.")
+    parser.add_argument("--max-concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help="Batas atas konkurensi scheduler.")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_REQUEST_TIMEOUT,
+                        help="Timeout total per request HTTP dalam detik.")
+    parser.add_argument("--connect-timeout", type=float, default=DEFAULT_CONNECT_TIMEOUT,
+                        help="Timeout membuka koneksi dalam detik.")
+    parser.add_argument("--read-timeout", type=float, default=DEFAULT_READ_TIMEOUT,
+                        help="Timeout menunggu data dari server dalam detik.")
+    parser.add_argument("--connection-limit", type=int, default=DEFAULT_CONNECTION_LIMIT,
+                        help="Jumlah maksimal koneksi terbuka.")
+    parser.add_argument("--connection-limit-per-host", type=int, default=DEFAULT_CONNECTION_LIMIT_PER_HOST,
+                        help="Jumlah maksimal koneksi terbuka per host.")
+    parser.add_argument("--dns-cache-ttl", type=int, default=DEFAULT_DNS_CACHE_TTL,
+                        help="Lama hasil DNS di-cache dalam detik.")
+    parser.add_argument("--keepalive-timeout", type=float, default=DEFAULT_KEEPALIVE_TIMEOUT,
+                        help="Lama koneksi idle dipertahankan dalam detik.")
+    parser.add_argument("--base-url", default=ScraperAPI.BASE_URL, help="URL halaman token (misalnya server lokal).")
+    parser.add_argument("--api-url", default=ScraperAPI.API_URL, help="URL API inquiry (misalnya server lokal).")
+    parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS,
+                        help="Jumlah maksimal request per customer number (termasuk retry).")
+    parser.add_argument("--retry-delay", type=float, default=DEFAULT_BASE_DELAY,
+                        help="Delay awal exponential backoff dalam detik.")
+    parser.add_argument("--no-breaker", dest="breaker", action="store_false",
+                        help="Nonaktifkan circuit breaker endpoint inquiry.")
+    parser.add_argument("--breaker-failures", type=int, default=DEFAULT_CONSECUTIVE_FAILURES,
+                        help="Jumlah kegagalan berturut-turut yang membuka circuit breaker.")
+    parser.add_argument("--breaker-error-rate", type=float, default=DEFAULT_ERROR_RATE,
+                        help="Porsi kegagalan (0-1) di --breaker-window request terakhir yang membuka circuit breaker.")
+    parser.add_argument("--breaker-window", type=int, default=DEFAULT_WINDOW,
+                        help="Jumlah request terakhir untuk menghitung --breaker-error-rate.")
+    parser.add_argument("--breaker-open-seconds", type=float, default=DEFAULT_OPEN_SECONDS,
+                        help="Lama request dijeda saat circuit breaker terbuka sebelum request percobaan.")
+    parser.add_argument("--breaker-probes", type=int, default=DEFAULT_HALF_OPEN_PROBES,
+                        help="Jumlah request percobaan (half-open) yang harus sukses sebelum dilanjutkan.")
+    parser.add_argument("--no-cache", dest="cache", action="store_false", help="Nonaktifkan result cache.")
+    parser.add_argument("--cache-path", default=DEFAULT_CACHE_PATH, help="Path file SQLite result cache.")
+    parser.add_argument("--force-refresh", action="store_true",
+                        help="Abaikan isi result cache dan ambil ulang semua tagihan.")
+    parser.add_argument("--resume", action="store_true",
+                        help="Lanjutkan run sebelumnya dari journal; ID yang sudah selesai tidak di-scrape ulang.")
+    parser.add_argument("--journal", default=DEFAULT_JOURNAL_PATH, help="Path file journal hasil scraping.")
+    parser.add_argument("--metrics-json", default=DEFAULT_METRICS_JSON_PATH, help="Path ringkasan metrik JSON.")
+    parser.add_argument("--metrics-prom", default=DEFAULT_METRICS_PROM_PATH,
+                        help="Path metrik format teks Prometheus.")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Sajikan metrik live di http://127.0.0.1:PORT/metrics selama run berjalan.")
+    parser.add_argument("--serve", type=int, metavar="PORT",
+                        help="Jalankan service lokal GET /inquiry/{idpel} dan POST /inquiries di port ini "
+                             "(session, token dan result cache tetap hangat) alih-alih memproses file.")
+    parser.add_argument("--serve-host", default=DEFAULT_SERVICE_HOST, help="Alamat bind untuk --serve.")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help="Level log.")
+    parser.add_argument("--log-format", default="text", choices=["text", "json"],
+                        help="Format file log; json menulis satu objek JSON per baris.")
+    parser.add_argument("--log-mode", default="full", choices=LOG_MODES,
+                        help="Log per customer number: full, sample (sebagian ID), atau summary (hanya ringkasan).")
+    parser.add_argument("--log-sample-rate", type=float, default=0.01,
+                        help="Porsi customer number yang log-nya disimpan pada --log-mode sample.")
+    parser.add_argument("--log-file", default=os.path.join(LOG_DIR, LOG_FILE), help="Path file log.")
+    parser.add_argument("--log-max-bytes", type=int, default=DEFAULT_MAX_BYTES,
+                        help="Ukuran file log sebelum dirotasi.")
+    parser.add_argument("--log-backups", type=int, default=DEFAULT_BACKUP_COUNT,
+                        help="Jumlah file log hasil rotasi yang disimpan.")
+    parser.add_argument("--clear-pycache", action="store_true",
+                        help="Hapus __pycache__ setelah run selesai (run berikutnya akan meng-compile ulang semua modul).")
+    parser.add_argument("--shards", type=int, default=1,
+                        help="Jumlah proses worker; customer number dibagi per hash lalu hasilnya digabung.")
+    parser.add_argument("--shard-index", type=int, help="Jalankan hanya shard ini (1..--shard-count), tanpa output Excel.")
+    parser.add_argument("--shard-count", type=int, help="Jumlah total shard untuk --shard-index.")
+    parser.add_argument("--merge", nargs="+", metavar="JOURNAL",
+                        help="Gabungkan journal shard ke --output tanpa scraping.")
+    return parser
+
+
+def parse_args(argv=None):
+    """
+    Membaca opsi command line. Nilai dari --config dipakai sebagai default dan bisa ditimpa
+    oleh opsi yang diberikan langsung.
+
+    Parameters:
+        argv (list): Argumen command line; None untuk sys.argv.
+
+    Returns:
+        argparse.Namespace: Opsi run.
+    """
+    parser = build_parser()
+    args, _ = parser.parse_known_args(argv)
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        valid = {action.dest for action in parser._actions}
+        unknown = set(config) - valid
+        if unknown:
+            parser.error(f"Key tidak dikenal di {args.config}: {', '.join(sorted(unknown))}")
+        parser.set_defaults(**config)
+    args = parser.parse_args(argv)
+    for output_format in args.formats:
+        module = missing_dependency(output_format)
+        if module:
+            parser.error(f"--format {output_format} membutuhkan paket {module} (pip install {module}).")
+    if args.shards < 1:
+        parser.error("--shards minimal 1.")
+    if (args.shard_index is None) != (args.shard_count is None):
+        parser.error("--shard-index dan --shard-count harus dipakai bersama.")
+    if args.shard_count is not None and not 1 <= args.shard_index <= args.shard_count:
+        parser.error("--shard-index harus antara 1 dan --shard-count.")
+    return args
+
+
+def resolve_input_files(patterns, input_dir=DEFAULT_INPUT_DIR):
+    """
+    Mengubah daftar glob menjadi daftar path file .txt/.xlsx yang ada, tanpa duplikasi.
+
+    Parameters:
+        patterns (list): Glob seperti "JA*.xlsx" atau "data/*.txt".
+        input_dir (str): Folder yang dicoba lebih dulu untuk glob relatif.
+
+    Returns:
+        list: Path file sesuai urutan glob.
+    """
+    selected = []
+    for pattern in patterns:
+        matches = []
+        if not os.path.isabs(pattern):
+            matches = sorted(glob.glob(os.path.join(input_dir, pattern)))
+        if not matches:
+            matches = sorted(glob.glob(pattern))
+        if not matches:
+            logging.warning(f"Tidak ada file yang cocok dengan {pattern}.")
+        for path in matches:
+            if path.endswith(('.txt', '.xlsx')) and path not in selected:
+                selected.append(path)
+    return selected
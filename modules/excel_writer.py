@@ -2,144 +2,111 @@
 
 import logging
 from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, NamedStyle
 from openpyxl.utils import get_column_letter
-from datetime import datetime
-from .utils import get_month_name, get_bl_akhir, get_bl_awal, get_rptag_addition
-
-
-def create_excel(success_data, failed_data, periods, output_path, file_data_map):
-    wb = Workbook()
-
-    # Sheet 1: Sukses
-    if success_data:
-        ws_success = wb.active
-        ws_success.title = "Sukses"
-        month_headers = [get_month_name(period) for period in periods]
-        headers = ["ID Pelanggan", "Nama Lengkap", "Tarif/Daya", "Jumlah Periode"] + month_headers + \
-            ["Tagihan", "Denda", "Biaya Admin", "Total Tagihan", "Tambahan", "MarkUp", "Sumber File"]
-        ws_success.append(headers)
-
-        for record in success_data:
-            idpel = record.get("customer_number", "")
-            additional_data = file_data_map.get(idpel, {})
-
-            # Menggabungkan 'segmentation' dan 'DAYA' untuk kolom "Tarif/Daya" tanpa .0
-            segmentation = record.get('segmentation', '')
-            daya = additional_data.get('DAYA', '')
-            if isinstance(daya, float):
-                daya = int(daya) if daya.is_integer() else daya  # Menghilangkan .0 jika integer
-            tarif_daya = f"{segmentation} / {daya}"
-
-            row = [
-                record.get("customer_number", ""),
-                record.get("customer_name", ""),
-                tarif_daya,  # Tarif/Daya yang telah digabungkan tanpa .0
-                len(record.get("bills", []))
-            ]
-            for period in periods:
-                bill = next((bill for bill in record.get("bills", []) if bill.get("bill_period") == period), {})
-                row.append(bill.get("amount", 0))
-            tagihan = sum(bill.get("amount", 0) for bill in record.get("bills", []))
-            denda = record.get("penalty_fee", 0)
-            biaya_admin = record.get("admin_charge", 0)
-            total_tagihan = tagihan + denda + biaya_admin
-            tambahan = record.get("tambahan", 0)
-            markup = tagihan + tambahan
-            row.extend([tagihan, denda, biaya_admin, total_tagihan, tambahan, markup, record.get("source_file", "")])
-            ws_success.append(row)
-
-        # Format header
-        for col_num, column_title in enumerate(headers, 1):
-            cell = ws_success.cell(row=1, column=col_num)
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal='center')
-            ws_success.column_dimensions[get_column_letter(col_num)].width = 20
-
-        # Format isi data
-        for row in ws_success.iter_rows(min_row=2, min_col=1, max_col=len(headers), max_row=ws_success.max_row):
-            for cell in row:
-                cell.alignment = Alignment(horizontal='center')
-                if isinstance(cell.value, int) or isinstance(cell.value, float):
-                    cell.number_format = '#,##0'
-
-    # Sheet 2: Gagal
-    if failed_data:
-        ws_failed = wb.create_sheet(title="Gagal")
-        headers_failed = ["ID Pelanggan", "Error", "Sumber File"]
-        ws_failed.append(headers_failed)
-        for record in failed_data:
-            ws_failed.append([record.get("customer_number", ""), record.get(
-                "error", ""), record.get("source_file", "")])
-
-        for col_num in range(1, len(headers_failed) + 1):
-            cell = ws_failed.cell(row=1, column=col_num)
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal='center')
-            ws_failed.column_dimensions[get_column_letter(col_num)].width = 30
-
-        # Format isi data gagal
-        for row in ws_failed.iter_rows(min_row=2, min_col=1, max_col=len(headers_failed), max_row=ws_failed.max_row):
-            for cell in row:
-                cell.alignment = Alignment(horizontal='center')
-
-    # Sheet 3: TUL
-    ws_tul = wb.create_sheet(title="TUL")
-    tul_headers = ["NO", "IDPEL", "NO RBM", "NAMA GARDU", "NAMA PELANGGAN", "ALAMAT",
-                   "GOL", "TRF", "DAYA", "BL Awal", "BL Akhir", "LBR", "RPTAG", "RPBK", "Sumber File"]
-    ws_tul.append(tul_headers)
-
-    for idx, record in enumerate(success_data, 1):
-        idpel = record.get("customer_number", "")
-        additional_data = file_data_map.get(idpel, {})
-        lbr_value = len(record.get("bills", []))
-
-        # Mendapatkan BL Awal berdasarkan kategori LBR
-        bl_awal = get_bl_awal(lbr_value)
-
-        # Mendapatkan BL Akhir (sama untuk semua baris)
-        bl_akhir = get_bl_akhir()
-
-        # Mendapatkan tambahan RPTAG berdasarkan source file
-        source_file = record.get("source_file", "")
-        rptag_addition = get_rptag_addition(source_file)
-
-        # Mengedit nilai RPTAG dengan menambahkan nilai tambahan
-        rptag_current = sum(bill.get("amount", 0) for bill in record.get("bills", []))
-        rptag_new = rptag_current + rptag_addition
-
-        row = [
-            idx,  # NO
-            idpel,  # IDPEL
-            additional_data.get("NO RBM", ""),  # NO RBM
-            additional_data.get("NAMA GARDU", ""),  # NAMA GARDU
-            additional_data.get("NAMA PELANGGAN", ""),  # NAMA PELANGGAN
-            additional_data.get("ALAMAT", ""),  # ALAMAT
-            additional_data.get("GOL", ""),  # GOL
-            additional_data.get("TRF", ""),  # TRF
-            additional_data.get("DAYA", ""),  # DAYA
-            bl_awal,  # BL Awal berdasarkan kategori LBR
-            bl_akhir,  # BL Akhir
-            f"({lbr_value}",  # LBR hanya tambahkan "(" di awal
-            rptag_new,  # RPTAG setelah ditambah
-            record.get("penalty_fee", 0),  # RPBK
-            source_file  # Sumber File
-        ]
-        ws_tul.append(row)
-
-    # Format header sheet TUL
-    for col_num, column_title in enumerate(tul_headers, 1):
-        cell = ws_tul.cell(row=1, column=col_num)
-        cell.font = Font(bold=True)
-        cell.alignment = Alignment(horizontal='center')
-        ws_tul.column_dimensions[get_column_letter(col_num)].width = 20
-
-    # Format isi data sheet TUL
-    for row in ws_tul.iter_rows(min_row=2, min_col=1, max_col=len(tul_headers), max_row=ws_tul.max_row):
-        for cell in row:
-            cell.alignment = Alignment(horizontal='center')
-            if isinstance(cell.value, int) or isinstance(cell.value, float):
-                cell.number_format = '#,##0'
+from .report_rows import SHEET_SUCCESS, SHEET_FAILED, SHEET_TUL, record_sets
+from .summary import SHEET_SUMMARY, SUMMARY_DEPENDENCY, build_summary, summary_available
+
+
+def _named_styles():
+    header = NamedStyle(name="pln_header", font=Font(bold=True), alignment=Alignment(horizontal='center'))
+    text = NamedStyle(name="pln_text", alignment=Alignment(horizontal='center'))
+    number = NamedStyle(name="pln_number", alignment=Alignment(horizontal='center'), number_format='#,##0')
+    return header, text, number
+
+
+class _SheetWriter:
+    """
+    Menulis baris ke worksheet write-only dengan named style yang dipakai bersama.
+    """
+
+    def __init__(self, wb, title, headers, width, styles, number_format=True, columns=None):
+        self.ws = wb.create_sheet(title=title)
+        # Style dipasang lewat nama: mencari nama jauh lebih murah daripada membandingkan objek NamedStyle
+        self.header_style, self.text_style, self.number_style = (style.name for style in styles)
+        self.number_format = number_format
+        # Lebar kolom harus diatur sebelum baris pertama ditulis
+        for col_num in range(1, (columns or len(headers)) + 1):
+            self.ws.column_dimensions[get_column_letter(col_num)].width = width
+        if headers:
+            self.append_header(headers)
+
+    def append_header(self, values):
+        self._append(values, self.header_style)
+
+    def _append(self, values, style):
+        cells = []
+        for value in values:
+            cell = WriteOnlyCell(self.ws, value=value)
+            cell.style = style
+            cells.append(cell)
+        self.ws.append(cells)
+
+    def append(self, values):
+        cells = []
+        for value in values:
+            cell = WriteOnlyCell(self.ws, value=value)
+            if self.number_format and isinstance(value, (int, float)):
+                cell.style = self.number_style
+            else:
+                cell.style = self.text_style
+            cells.append(cell)
+        self.ws.append(cells)
+
+
+# Lebar kolom dan format angka per sheet
+SHEET_LAYOUT = {
+    SHEET_SUCCESS: (20, True),
+    SHEET_FAILED: (30, False),
+    SHEET_TUL: (20, True),
+    SHEET_SUMMARY: (20, True),
+}
+
+
+def _write_summary(wb, tables, styles):
+    # Semua tabel ditumpuk di satu sheet; lebar kolom mengikuti tabel terlebar
+    width, number_format = SHEET_LAYOUT[SHEET_SUMMARY]
+    columns = max(len(table.headers) for table in tables)
+    sheet = _SheetWriter(wb, SHEET_SUMMARY, None, width, styles, number_format=number_format, columns=columns)
+    for table in tables:
+        sheet.append_header([table.title])
+        sheet.append_header(table.headers)
+        for row in table.rows:
+            sheet.append(row)
+        sheet.append([])
+
+
+def create_excel(success_data, failed_data, periods, output_path, summary=True):
+    """
+    Menulis hasil ke workbook dengan sheet Sukses, Gagal, TUL dan Ringkasan.
+
+    Parameters:
+        success_data (list): InquiryResult yang berhasil.
+        failed_data (list): InquiryResult yang gagal.
+        periods (list): bill_period yang sudah diurutkan untuk kolom bulan.
+        output_path (str): Path file .xlsx.
+        summary (bool): Tambahkan sheet Ringkasan (summary.build_summary). Dilewati dengan warning
+            jika NumPy tidak terpasang, agar hasil scrape tetap tersimpan.
+    """
+    # Workbook write-only: baris langsung di-stream ke file dengan memori konstan
+    wb = Workbook(write_only=True)
+    styles = _named_styles()
+    for style in styles:
+        wb.add_named_style(style)
+
+    # Baris dibangun oleh report_rows, sama dengan format keluaran lain (CSV, JSONL, Parquet)
+    for record_set in record_sets(success_data, failed_data, periods):
+        width, number_format = SHEET_LAYOUT[record_set.name]
+        sheet = _SheetWriter(wb, record_set.name, record_set.headers, width, styles, number_format=number_format)
+        for row in record_set.rows:
+            sheet.append(row)
+
+    if summary and not summary_available():
+        logging.warning(f"Sheet {SHEET_SUMMARY} dilewati: paket {SUMMARY_DEPENDENCY} belum terpasang "
+                        f"(pip install {SUMMARY_DEPENDENCY}).")
+    elif summary:
+        _write_summary(wb, build_summary(success_data, failed_data), styles)
 
     wb.save(output_path)
     logging.info(f"\nHasil telah disimpan ke {output_path}")
@@ -0,0 +1,108 @@
+# modules/journal.py
+
+import json
+import logging
+import os
+
+from .models import EMPTY_INFO
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOURNAL_PATH = os.path.join('output', 'run_journal.jsonl')
+FSYNC_EVERY = 50
+
+
+class RunJournal:
+    """
+    Journal append-only (JSON lines) untuk hasil scraping yang sudah selesai.
+
+    Setiap InquiryResult ditulis dan di-flush begitu scrape_customer_data selesai, sehingga crash, Ctrl-C
+    atau OOM tidak menghilangkan pekerjaan yang sudah dilakukan. Baris terakhir yang terpotong
+    akibat crash diabaikan saat replay.
+
+    Parameters:
+        path (str): Path file journal.
+        resume (bool): True untuk melanjutkan journal yang ada, False untuk memulai journal baru.
+    """
+
+    def __init__(self, path=DEFAULT_JOURNAL_PATH, resume=False):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if resume:
+            self._drop_torn_tail(path)
+        self._file = open(path, 'a' if resume else 'w', encoding='utf-8')
+        self._unsynced = 0
+
+    @staticmethod
+    def _drop_torn_tail(path):
+        # Baris terakhir tanpa '\n' (crash di tengah penulisan) dipotong sebelum menambah entri baru;
+        # jika tidak, entri pertama run lanjutan tersambung ke potongan itu dan ikut hilang saat replay
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb+') as f:
+            end = f.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                start = max(0, position - 4096)
+                f.seek(start)
+                chunk = f.read(position - start)
+                newline = chunk.rfind(b'\n')
+                if newline != -1:
+                    position = start + newline + 1
+                    break
+                position = start
+            if position < end:
+                logger.warning(f"Baris terakhir journal {path} terpotong ({end - position} byte), dibuang.")
+                f.truncate(position)
+
+    def record(self, result):
+        entry = {"customer_number": result.customer_number, "source_file": result.source_file,
+                 "data": result.to_payload()}
+        # Data pelanggan ikut disimpan agar journal shard bisa digabung di host lain tanpa file input
+        if result.info is not EMPTY_INFO:
+            entry["info"] = result.info.as_row()
+        self._file.write(json.dumps(entry) + '\n')
+        self._file.flush()
+        self._unsynced += 1
+        if self._unsynced >= FSYNC_EVERY:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def close(self):
+        if not self._file.closed:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+    @staticmethod
+    def entries(path=DEFAULT_JOURNAL_PATH):
+        """
+        Membaca entri journal sesuai urutan penulisan. Baris yang rusak dilewati.
+
+        Yields:
+            dict: Entri journal (customer_number, source_file, data, dan info jika ada).
+        """
+        if not os.path.exists(path):
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Baris journal {line_number} rusak, dilewati.")
+
+    @staticmethod
+    def replay(path=DEFAULT_JOURNAL_PATH):
+        """
+        Membaca ulang journal. Entri yang lebih baru untuk customer_number yang sama menimpa entri lama.
+
+        Returns:
+            dict: customer_number -> entri journal (customer_number, source_file, data).
+        """
+        entries = {}
+        for entry in RunJournal.entries(path):
+            entries[entry["customer_number"]] = entry
+        logger.info(f"Journal {path}: {len(entries)} customer number dimuat ulang.")
+        return entries
@@ -1,6 +1,169 @@
+import csv
 import logging
 import os
-from openpyxl import load_workbook
+
+from .master_cache import CustomerMasterCache
+from .models import CustomerInfo, CustomerJob, intern_source
+
+# Hasil parsing .xlsx per run (path absolut -> data pelanggan), agar setiap workbook hanya di-parse sekali
+_parsed_workbooks = {}
+
+# IDPEL PLN selalu 12 digit angka
+IDPEL_LENGTH = 12
+DEFAULT_REJECTS_PATH = os.path.join('output', 'idpel_rejects.csv')
+# Ukuran buffer baca file .txt; file jutaan baris dibaca bertahap dengan memori konstan
+READ_BUFFER_SIZE = 1024 * 1024
+
+REJECT_EMPTY = "kosong"
+REJECT_INNER_SPACE = "spasi di dalam ID"
+REJECT_NOT_DIGITS = "mengandung karakter selain angka"
+REJECT_LENGTH = f"panjang bukan {IDPEL_LENGTH} digit"
+
+
+class RejectedLine:
+    """
+    Baris input yang bukan IDPEL valid dan tidak dikirim ke API.
+    """
+
+    __slots__ = ("source_file", "line_number", "content", "reason")
+
+    def __init__(self, source_file, line_number, content, reason):
+        self.source_file = source_file
+        self.line_number = line_number
+        self.content = content
+        self.reason = reason
+
+
+def normalize_idpel(value):
+    """
+    Menormalkan dan memvalidasi satu IDPEL: spasi di awal/akhir (dan BOM) dibuang, sisanya harus
+    tepat 12 digit angka.
+
+    Parameters:
+        value: Isi baris .txt atau sel IDPEL .xlsx.
+
+    Returns:
+        tuple: (idpel, None) jika valid, atau (None, alasan penolakan).
+    """
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    idpel = str(value).lstrip('\ufeff').strip() if value is not None else ""
+    if not idpel:
+        return None, REJECT_EMPTY
+    if not (idpel.isascii() and idpel.isdigit()):
+        if any(char.isspace() for char in idpel):
+            return None, REJECT_INNER_SPACE
+        return None, REJECT_NOT_DIGITS
+    if len(idpel) != IDPEL_LENGTH:
+        return None, REJECT_LENGTH
+    return idpel, None
+
+
+def iter_txt_customer_numbers(file_path, rejects=None, buffer_size=READ_BUFFER_SIZE):
+    """
+    Membaca IDPEL dari file .txt secara streaming (buffered, baris demi baris), tanpa memuat
+    seluruh file ke memori.
+
+    Baris kosong dan baris komentar (#) dilewati; baris yang tidak valid dicatat ke `rejects`.
+
+    Parameters:
+        file_path (str): Path file .txt.
+        rejects (list): Penampung RejectedLine; None berarti baris tidak valid hanya dilewati.
+        buffer_size (int): Ukuran buffer baca dalam byte.
+
+    Yields:
+        str: IDPEL yang sudah dinormalkan.
+    """
+    source_file = intern_source(file_path)
+    with open(file_path, 'rb', buffering=buffer_size) as f:
+        for line_number, raw in enumerate(f, 1):
+            line = raw.decode('utf-8', errors='replace').rstrip('\r\n')
+            # BOM dan spasi dibuang dulu agar "\ufeff# ..." atau "  # ..." tetap dikenali sebagai komentar
+            content = line.lstrip('\ufeff').strip()
+            if not content or content.startswith('#'):
+                continue
+            idpel, reason = normalize_idpel(content)
+            if idpel is not None:
+                yield idpel
+            elif rejects is not None:
+                rejects.append(RejectedLine(source_file, line_number, line, reason))
+
+
+def iter_customer_jobs(file_paths, rejects=None, unique=True):
+    """
+    Menghasilkan CustomerJob secara lazy dari file .txt/.xlsx; IDPEL divalidasi dan duplikasi dihapus
+    (file pertama yang dipakai sebagai sumber).
+
+    Parameters:
+        file_paths (list): Path lengkap ke file (.txt atau .xlsx).
+        rejects (list): Penampung RejectedLine untuk baris yang tidak valid.
+        unique (bool): False jika pemanggil sudah menghapus duplikasi sendiri (pipeline.dedupe_jobs),
+            sehingga set ID yang sudah muncul tidak perlu disimpan dua kali.
+
+    Yields:
+        CustomerJob: Job untuk setiap IDPEL valid (yang belum pernah muncul jika `unique`).
+    """
+    seen = set()
+    for file_path in file_paths:
+        file_name = os.path.basename(file_path)
+        if file_path.endswith('.txt'):
+            entries = ((number, None) for number in iter_txt_customer_numbers(file_path, rejects))
+        elif file_path.endswith('.xlsx'):
+            entries = _valid_xlsx_entries(file_path, load_customer_numbers_xlsx(file_path), rejects)
+        else:
+            continue
+        count = 0
+        try:
+            for number, info in entries:
+                count += 1
+                # Menghapus duplikasi
+                if not unique:
+                    yield CustomerJob(number, file_path, info)
+                elif number not in seen:
+                    seen.add(number)
+                    yield CustomerJob(number, file_path, info)
+        except OSError as e:
+            logging.error(f"Error saat memuat customer numbers dari {file_name}: {e}")
+            continue
+        logging.info(f"Loaded {count} customer numbers from {file_name}.")
+
+
+def _valid_xlsx_entries(file_path, customer_data, rejects):
+    source_file = intern_source(file_path)
+    for number, info in customer_data.items():
+        idpel, reason = normalize_idpel(number)
+        if idpel is not None:
+            yield idpel, info
+        elif rejects is not None:
+            # Nomor baris tidak tersimpan di cache data pelanggan
+            rejects.append(RejectedLine(source_file, None, number, reason))
+
+
+def write_rejects_report(rejects, path=DEFAULT_REJECTS_PATH):
+    """
+    Menulis laporan baris input yang ditolak (CSV: Sumber File, Baris, Isi, Alasan) dan mencatat
+    jumlahnya per alasan. Tidak ada file yang ditulis jika semua baris valid.
+
+    Returns:
+        str: Path laporan, atau None jika tidak ada baris yang ditolak.
+    """
+    if not rejects:
+        return None
+    by_reason = {}
+    for reject in rejects:
+        by_reason[reject.reason] = by_reason.get(reject.reason, 0) + 1
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["Sumber File", "Baris", "Isi", "Alasan"])
+        writer.writerows([reject.source_file, reject.line_number or "", reject.content, reject.reason]
+                         for reject in rejects)
+    summary = ", ".join(f"{count} {reason}" for reason, count in sorted(by_reason.items(), key=lambda item: -item[1]))
+    logging.warning(f"{len(rejects)} baris input bukan IDPEL valid dan tidak di-scrape ({summary}). "
+                    f"Detail: {path}")
+    return path
 
 
 def load_customer_numbers_from_folder(folder_path):
@@ -15,39 +178,59 @@ def load_customer_numbers_from_folder(folder_path):
     return load_customer_numbers(file_paths)
 
 
-def load_customer_numbers(file_paths):
-    customer_numbers = []
-    customer_sources = []
-    for file_path in file_paths:
-        if file_path.endswith('.txt'):
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    numbers = [line.strip() for line in f if line.strip() and not line.startswith('#')]
-                    customer_numbers.extend(numbers)
-                    customer_sources.extend([file_path] * len(numbers))
-                logging.info(f"Loaded {len(numbers)} customer numbers from {os.path.basename(file_path)}.")
-            except Exception as e:
-                logging.error(f"Error saat memuat customer numbers dari {os.path.basename(file_path)}: {e}")
-        elif file_path.endswith('.xlsx'):
-            customer_data = load_customer_numbers_xlsx(file_path)
-            for idpel, data in customer_data.items():
-                customer_numbers.append(idpel)
-                customer_sources.append(file_path)
-            logging.info(f"Loaded {len(customer_data)} customer numbers from {os.path.basename(file_path)}.")
-    # Menghapus duplikasi
-    seen = set()
-    unique_customer_numbers = []
-    unique_customer_sources = []
-    for num, src in zip(customer_numbers, customer_sources):
-        if num not in seen:
-            seen.add(num)
-            unique_customer_numbers.append(num)
-            unique_customer_sources.append(src)
-    logging.info(f"Total {len(unique_customer_numbers)} unique customer numbers loaded from {len(file_paths)} files.")
-    return unique_customer_numbers, unique_customer_sources
-
-
-def load_customer_numbers_xlsx(file_path):
+def load_customer_numbers(file_paths, rejects=None):
+    """
+    Memuat customer numbers dari beberapa file .txt/.xlsx sebagai CustomerJob.
+
+    Parameters:
+        file_paths (list): Path lengkap ke file (.txt atau .xlsx).
+        rejects (list): Penampung RejectedLine untuk baris yang tidak valid.
+
+    Returns:
+        list: CustomerJob unik (duplikasi dihapus, file pertama yang dipakai sebagai sumber).
+    """
+    jobs = list(iter_customer_jobs(file_paths, rejects))
+    logging.info(f"Total {len(jobs)} unique customer numbers loaded from {len(file_paths)} files.")
+    return jobs
+
+
+def load_customer_numbers_xlsx(file_path, master_cache=None):
+    """
+    Memuat data pelanggan (IDPEL -> CustomerInfo) dari file .xlsx.
+
+    Workbook hanya di-parse sekali per run; antar run hasilnya diambil dari sidecar cache
+    selama isi file tidak berubah.
+
+    Parameters:
+        file_path (str): Path file .xlsx.
+        master_cache (CustomerMasterCache): Sidecar cache; default di cache/customer_master.sqlite.
+
+    Returns:
+        dict: IDPEL -> CustomerInfo.
+    """
+    key = os.path.abspath(file_path)
+    if key in _parsed_workbooks:
+        return _parsed_workbooks[key]
+
+    master_cache = master_cache or CustomerMasterCache()
+    customer_data = master_cache.get(file_path)
+    if customer_data is not None:
+        logging.info(f"Loaded data for {len(customer_data)} customers from {os.path.basename(file_path)} (cache).")
+    else:
+        customer_data = _parse_customer_xlsx(file_path)
+        if customer_data is None:
+            # Gagal parsing tidak disimpan ke cache agar dicoba lagi di run berikutnya
+            customer_data = {}
+        else:
+            master_cache.put(file_path, customer_data)
+    _parsed_workbooks[key] = customer_data
+    return customer_data
+
+
+def _parse_customer_xlsx(file_path):
+    # openpyxl hanya dimuat jika ada input .xlsx; run .txt tidak membayar biaya import-nya
+    from openpyxl import load_workbook
+
     customer_data = {}  # Menggunakan dictionary dengan IDPEL sebagai key
     try:
         wb = load_workbook(filename=file_path, read_only=True)
@@ -61,25 +244,23 @@ def load_customer_numbers_xlsx(file_path):
             return {}
 
         # Mendapatkan indeks kolom yang sesuai
-        col_indices = {col: header.index(col) for col in required_columns}
+        idpel_index = header.index("IDPEL")
+        info_indices = [header.index(col) for col in CustomerInfo.COLUMNS]
 
         # Memuat data
         for row in ws.iter_rows(min_row=2, values_only=True):  # Mulai dari baris kedua
-            idpel = str(row[col_indices["IDPEL"]]).strip() if row[col_indices["IDPEL"]] else None
-            if idpel:
-                customer_data[idpel] = {
-                    "NO RBM": row[col_indices["NO RBM"]],
-                    "NAMA GARDU": row[col_indices["NAMA GARDU"]],
-                    "NAMA PELANGGAN": row[col_indices["NAMA PELANGGAN"]],
-                    "ALAMAT": row[col_indices["ALAMAT"]],
-                    "GOL": row[col_indices["GOL"]],
-                    "TRF": row[col_indices["TRF"]],
-                    "DAYA": row[col_indices["DAYA"]]
-                }
+            value = row[idpel_index]
+            if not value:
+                continue
+            # Sel angka (misalnya float 522600663342.0) dinormalkan sebelum jadi key; nilai yang tidak
+            # valid disimpan apa adanya agar ditolak dengan alasannya saat job dibuat
+            idpel, _ = normalize_idpel(value)
+            customer_data[idpel or str(value).strip()] = CustomerInfo(*(row[index] for index in info_indices))
         logging.info(f"Loaded data for {len(customer_data)} customers from {os.path.basename(file_path)}.")
         wb.close()
     except Exception as e:
         logging.error(f"Error saat memuat data dari {os.path.basename(file_path)}: {e}")
+        return None
 
     return customer_data
 
@@ -101,14 +282,15 @@ def collect_tambahan_inputs(source_files):
     return tambahan_dict
 
 
-def load_customer_numbers_from_files(file_path):
+def load_customer_numbers_from_files(file_path, rejects=None):
     """
     Fungsi ini memuat customer numbers dari satu file saja.
 
     Parameters:
         file_path (str): Path lengkap ke file (.txt atau .xlsx).
+        rejects (list): Penampung RejectedLine untuk baris yang tidak valid.
 
     Returns:
-        tuple: (customer_numbers, customer_sources)
+        list: CustomerJob dari file tersebut.
     """
-    return load_customer_numbers([file_path])
+    return load_customer_numbers([file_path], rejects)
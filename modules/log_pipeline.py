@@ -0,0 +1,157 @@
+# modules/log_pipeline.py
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import zlib
+from datetime import datetime, timezone
+
+LOG_DIR = 'logs'
+LOG_FILE = 'scraper.log'
+LOG_FORMAT = '%(levelname)s - %(message)s'
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+
+LOG_MODE_FULL = "full"
+LOG_MODE_SAMPLE = "sample"
+LOG_MODE_SUMMARY = "summary"
+LOG_MODES = (LOG_MODE_FULL, LOG_MODE_SAMPLE, LOG_MODE_SUMMARY)
+
+_listener = None
+_id_filter = None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    Satu objek JSON per baris: time, level, logger, message, customer_number (jika ada) dan exc_info.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        customer_number = getattr(record, "customer_number", None)
+        if customer_number is not None:
+            entry["customer_number"] = customer_number
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class PerIdFilter(logging.Filter):
+    """
+    Mengurangi log per customer_number (record dengan `extra={"customer_number": ...}`) di bawah WARNING.
+
+    Mode "sample" menyimpan semua log untuk sebagian ID (dipilih dengan CRC32, jadi satu ID selalu
+    lengkap atau tidak sama sekali). Mode "summary" membuang log per-ID di bawah ERROR dan hanya
+    menghitungnya per template pesan; ringkasannya ditulis saat logging dimatikan.
+
+    Parameters:
+        mode (str): LOG_MODE_FULL, LOG_MODE_SAMPLE, atau LOG_MODE_SUMMARY.
+        sample_rate (float): Porsi ID yang log-nya disimpan pada mode "sample".
+    """
+
+    def __init__(self, mode=LOG_MODE_FULL, sample_rate=0.01):
+        super().__init__()
+        self.mode = mode
+        self.threshold = int(sample_rate * 10000)
+        self.suppressed = {}
+
+    def filter(self, record):
+        customer_number = getattr(record, "customer_number", None)
+        if customer_number is None or self.mode == LOG_MODE_FULL:
+            return True
+        if self.mode == LOG_MODE_SAMPLE:
+            if record.levelno >= logging.WARNING:
+                return True
+            return zlib.crc32(str(customer_number).encode("utf-8")) % 10000 < self.threshold
+        if record.levelno >= logging.ERROR:
+            return True
+        # Template %-style (record.msg) mengelompokkan pesan tanpa perlu memformatnya
+        key = (record.levelname, record.msg)
+        self.suppressed[key] = self.suppressed.get(key, 0) + 1
+        return False
+
+    def summary_lines(self):
+        return [f"{count}x [{level}] {template}" for (level, template), count in
+                sorted(self.suppressed.items(), key=lambda item: -item[1])]
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler yang tidak memformat pesan di thread pemanggil; formatting dilakukan oleh
+    QueueListener di thread-nya sendiri sehingga event loop hanya membayar biaya enqueue.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def setup_logging(level=logging.INFO, log_format="text", mode=LOG_MODE_FULL, sample_rate=0.01,
+                  log_file=None, max_bytes=DEFAULT_MAX_BYTES, backup_count=DEFAULT_BACKUP_COUNT):
+    """
+    Mengonfigurasi logging non-blocking: root logger hanya menaruh record ke antrean, dan
+    QueueListener menulis ke console dan file log yang dirotasi.
+
+    Parameters:
+        level (int): Level log root logger.
+        log_format (str): "text" atau "json" (JSON lines) untuk file log; console selalu teks.
+        mode (str): "full", "sample" atau "summary" untuk log per customer_number.
+        sample_rate (float): Porsi ID yang dicatat pada mode "sample".
+        log_file (str): Path file log; default logs/scraper.log.
+        max_bytes (int): Ukuran file log sebelum dirotasi.
+        backup_count (int): Jumlah file rotasi yang disimpan.
+    """
+    global _listener, _id_filter
+    if _listener is not None:
+        return
+
+    if log_file is None:
+        log_file = os.path.join(os.getcwd(), LOG_DIR, LOG_FILE)
+    log_dir = os.path.dirname(log_file)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+    file_handler.setFormatter(JsonLinesFormatter() if log_format == "json" else logging.Formatter(LOG_FORMAT))
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _DeferredQueueHandler(log_queue)
+    _id_filter = PerIdFilter(mode, sample_rate)
+    queue_handler.addFilter(_id_filter)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    logging.info("Logging telah dikonfigurasi dengan benar.")
+
+
+def shutdown_logging():
+    """
+    Menulis ringkasan log per-ID (mode "summary"), lalu mengosongkan antrean dan menghentikan listener.
+    """
+    global _listener, _id_filter
+    if _listener is None:
+        return
+    if _id_filter is not None and _id_filter.suppressed:
+        logging.info("Ringkasan log per customer_number:\n  %s", "\n  ".join(_id_filter.summary_lines()))
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+    _id_filter = None
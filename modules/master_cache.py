@@ -0,0 +1,92 @@
+# modules/master_cache.py
+
+import hashlib
+import logging
+import os
+import pickle
+import sqlite3
+from contextlib import closing
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MASTER_CACHE_PATH = os.path.join('cache', 'customer_master.sqlite')
+
+# Naikkan jika bentuk data yang disimpan berubah, agar entri lama di-parse ulang
+PAYLOAD_VERSION = 3
+
+
+def file_digest(file_path):
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class CustomerMasterCache:
+    """
+    Sidecar cache (SQLite) untuk data pelanggan hasil parsing file .xlsx.
+
+    Entri dikunci dengan path file, mtime dan hash isi. Jika mtime dan ukuran file tidak berubah,
+    entri langsung dipakai; jika berubah, hash isi dibandingkan sebelum file di-parse ulang.
+
+    Parameters:
+        path (str): Path file SQLite.
+    """
+
+    def __init__(self, path=DEFAULT_MASTER_CACHE_PATH):
+        self.path = path
+
+    def _connect(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS masters ("
+            "path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, "
+            "sha256 TEXT NOT NULL, payload BLOB NOT NULL)")
+        return conn
+
+    def get(self, file_path):
+        """
+        Mengambil data pelanggan yang sudah di-parse jika file tidak berubah.
+
+        Returns:
+            dict: IDPEL -> data pelanggan, atau None jika tidak ada / file sudah berubah.
+        """
+        file_path = os.path.abspath(file_path)
+        try:
+            stat = os.stat(file_path)
+            with closing(self._connect()) as conn, conn:
+                row = conn.execute(
+                    "SELECT mtime_ns, size, sha256, payload FROM masters WHERE path = ?", (file_path,)).fetchone()
+                if row is None:
+                    return None
+                mtime_ns, size, sha256, payload = row
+                if (mtime_ns, size) != (stat.st_mtime_ns, stat.st_size):
+                    if file_digest(file_path) != sha256:
+                        return None
+                    # Isi sama, hanya mtime yang berubah
+                    conn.execute(
+                        "UPDATE masters SET mtime_ns = ?, size = ? WHERE path = ?",
+                        (stat.st_mtime_ns, stat.st_size, file_path))
+            stored = pickle.loads(payload)
+            if not isinstance(stored, tuple) or stored[0] != PAYLOAD_VERSION:
+                return None
+            return stored[1]
+        except Exception as e:
+            logger.warning(f"Cache data pelanggan tidak dapat dibaca untuk {os.path.basename(file_path)}: {e}")
+            return None
+
+    def put(self, file_path, customer_data):
+        file_path = os.path.abspath(file_path)
+        try:
+            stat = os.stat(file_path)
+            payload = pickle.dumps((PAYLOAD_VERSION, customer_data), protocol=pickle.HIGHEST_PROTOCOL)
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO masters (path, mtime_ns, size, sha256, payload) VALUES (?, ?, ?, ?, ?)",
+                    (file_path, stat.st_mtime_ns, stat.st_size, file_digest(file_path), payload))
+        except Exception as e:
+            logger.warning(f"Cache data pelanggan tidak dapat disimpan untuk {os.path.basename(file_path)}: {e}")
@@ -0,0 +1,335 @@
+# modules/metrics.py
+
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_METRICS_JSON_PATH = os.path.join('output', 'run_metrics.json')
+DEFAULT_METRICS_PROM_PATH = os.path.join('output', 'run_metrics.prom')
+
+# Batas atas bucket histogram latency request (detik)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Kelas error: potongan pesan (lowercase) -> nama kelas, dicek berurutan
+ERROR_CLASSES = (
+    ("invalid oauth token", "invalid_token"),
+    ("tidak terdaftar", "unregistered"),
+    ("tagihan tidak ditemukan", "not_found"),
+    ("sudah dibayar", "not_found"),
+    ("data kosong", "empty_data"),
+    ("unexpected error", "unexpected_error"),
+    ("timeout", "timeout"),
+    ("max retries", "max_retries"),
+    ("cannot connect", "connection"),
+    ("connection", "connection"),
+)
+
+
+def error_class(message):
+    """
+    Mengelompokkan pesan error ke kelas pendek yang stabil untuk label metrik.
+
+    Returns:
+        str: Nama kelas, "other" jika tidak dikenali.
+    """
+    message = (message or "").lower()
+    for fragment, name in ERROR_CLASSES:
+        if fragment in message:
+            return name
+    return "other"
+
+
+class Histogram:
+    """
+    Histogram kumulatif sederhana (gaya Prometheus) dengan bucket tetap.
+    """
+
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+
+    def cumulative(self):
+        """
+        Returns:
+            list: (batas atas, jumlah kumulatif), diakhiri ("+Inf", count).
+        """
+        total = 0
+        rows = []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            rows.append((bound, total))
+        rows.append(("+Inf", self.count))
+        return rows
+
+    def quantile(self, fraction):
+        """
+        Perkiraan kuantil dari bucket (batas atas bucket yang memuat kuantil tersebut).
+        None jika kuantil berada di atas bucket terbesar.
+        """
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        for bound, total in self.cumulative()[:-1]:
+            if total >= target:
+                return bound
+        return None
+
+
+class SourceMetrics:
+    """
+    Counter untuk satu file sumber.
+    """
+
+    __slots__ = ("requests", "latency", "statuses", "errors", "retries", "bytes_sent", "bytes_received",
+                 "results_ok", "results_failed")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.requests = 0
+        self.latency = Histogram(buckets)
+        self.statuses = {}
+        self.errors = {}
+        self.retries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.results_ok = 0
+        self.results_failed = 0
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "latency_seconds": {
+                "count": self.latency.count,
+                "sum": round(self.latency.sum, 6),
+                "p50": self.latency.quantile(0.5),
+                "p99": self.latency.quantile(0.99),
+                "buckets": {str(bound): total for bound, total in self.latency.cumulative()},
+            },
+            "statuses": dict(self.statuses),
+            "errors": dict(self.errors),
+            "retries": self.retries,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "results": {"ok": self.results_ok, "failed": self.results_failed},
+        }
+
+
+class RunMetrics:
+    """
+    Telemetri request per run dan per file sumber: jumlah request, histogram latency, status HTTP,
+    kelas error, retry, token refresh dan byte yang ditransfer.
+
+    Juga berfungsi sebagai sink pipeline (`record(result)`) untuk menghitung hasil akhir per file.
+
+    Parameters:
+        buckets (tuple): Batas bucket histogram latency (detik).
+        clock (callable): Sumber waktu monotonic untuk durasi run.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS, clock=time.monotonic):
+        self.buckets = buckets
+        self.clock = clock
+        self.started_at = clock()
+        self.token_refreshes = 0
+        self.sources = {}
+
+    def source(self, source_file):
+        metrics = self.sources.get(source_file)
+        if metrics is None:
+            metrics = self.sources[source_file] = SourceMetrics(self.buckets)
+        return metrics
+
+    def record_request(self, source_file, latency, status, error=None, bytes_sent=0, bytes_received=0):
+        """
+        Mencatat satu request HTTP inquiry.
+
+        Parameters:
+            source_file (str): File sumber customer_number.
+            latency (float): Durasi request dalam detik.
+            status (int): Status HTTP, atau None jika request gagal sebelum ada respons.
+            error (str): Pesan error jika request tidak sukses.
+            bytes_sent (int): Ukuran body request.
+            bytes_received (int): Ukuran body respons.
+        """
+        metrics = self.source(source_file)
+        metrics.requests += 1
+        metrics.latency.observe(latency)
+        status = str(status) if status is not None else "exception"
+        metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+        if error is not None:
+            name = error_class(error)
+            metrics.errors[name] = metrics.errors.get(name, 0) + 1
+        metrics.bytes_sent += bytes_sent
+        metrics.bytes_received += bytes_received
+
+    def record_retry(self, source_file):
+        self.source(source_file).retries += 1
+
+    def record_token_refresh(self):
+        self.token_refreshes += 1
+
+    def record(self, result):
+        metrics = self.source(result.source_file)
+        if result.ok:
+            metrics.results_ok += 1
+        else:
+            metrics.results_failed += 1
+
+    def close(self):
+        pass
+
+    def summary(self):
+        """
+        Returns:
+            dict: Ringkasan JSON-serializable; "total" adalah gabungan semua file sumber.
+        """
+        total = SourceMetrics(self.buckets)
+        for metrics in self.sources.values():
+            total.requests += metrics.requests
+            total.latency.count += metrics.latency.count
+            total.latency.sum += metrics.latency.sum
+            total.latency.counts = [a + b for a, b in zip(total.latency.counts, metrics.latency.counts)]
+            for status, count in metrics.statuses.items():
+                total.statuses[status] = total.statuses.get(status, 0) + count
+            for name, count in metrics.errors.items():
+                total.errors[name] = total.errors.get(name, 0) + count
+            total.retries += metrics.retries
+            total.bytes_sent += metrics.bytes_sent
+            total.bytes_received += metrics.bytes_received
+            total.results_ok += metrics.results_ok
+            total.results_failed += metrics.results_failed
+        elapsed = self.clock() - self.started_at
+        return {
+            "elapsed_seconds": round(elapsed, 3),
+            "requests_per_second": round(total.requests / elapsed, 3) if elapsed > 0 else 0.0,
+            "token_refreshes": self.token_refreshes,
+            "total": total.as_dict(),
+            "sources": {source: metrics.as_dict() for source, metrics in sorted(self.sources.items())},
+        }
+
+    def to_json(self):
+        return json.dumps(self.summary(), indent=2)
+
+    def to_prometheus(self):
+        """
+        Returns:
+            str: Metrik dalam format teks Prometheus (label `source` per file sumber).
+        """
+        lines = []
+
+        def family(name, kind, help_text, samples, suffix=""):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels)
+                lines.append(f"{name}{suffix}{{{label_text}}} {value}" if label_text else f"{name}{suffix} {value}")
+
+        sources = sorted(self.sources.items())
+        family("pln_requests_total", "counter", "Jumlah request inquiry.",
+               [((("source", source),), m.requests) for source, m in sources])
+        histogram = []
+        for source, m in sources:
+            for bound, total in m.latency.cumulative():
+                histogram.append(((("source", source), ("le", bound)), total))
+        family("pln_request_duration_seconds", "histogram", "Latency request inquiry.", histogram, "_bucket")
+        lines.extend(f'pln_request_duration_seconds_sum{{source="{_escape(source)}"}} {m.latency.sum:.6f}'
+                     for source, m in sources)
+        lines.extend(f'pln_request_duration_seconds_count{{source="{_escape(source)}"}} {m.latency.count}'
+                     for source, m in sources)
+        family("pln_responses_total", "counter", "Respons per status HTTP.",
+               [((("source", source), ("status", status)), count)
+                for source, m in sources for status, count in sorted(m.statuses.items())])
+        family("pln_errors_total", "counter", "Error per kelas pesan.",
+               [((("source", source), ("class", name)), count)
+                for source, m in sources for name, count in sorted(m.errors.items())])
+        family("pln_retries_total", "counter", "Jumlah retry.",
+               [((("source", source),), m.retries) for source, m in sources])
+        family("pln_bytes_sent_total", "counter", "Byte body request.",
+               [((("source", source),), m.bytes_sent) for source, m in sources])
+        family("pln_bytes_received_total", "counter", "Byte body respons.",
+               [((("source", source),), m.bytes_received) for source, m in sources])
+        family("pln_results_total", "counter", "Hasil akhir per customer number.",
+               [((("source", source), ("outcome", outcome)), count) for source, m in sources
+                for outcome, count in (("ok", m.results_ok), ("failed", m.results_failed))])
+        family("pln_token_refreshes_total", "counter", "Jumlah pengambilan token dari halaman token.",
+               [((), self.token_refreshes)])
+        return "\n".join(lines) + "\n"
+
+    def write(self, json_path=DEFAULT_METRICS_JSON_PATH, prom_path=DEFAULT_METRICS_PROM_PATH):
+        """
+        Menulis ringkasan JSON dan file Prometheus di akhir run.
+        """
+        for path, content in ((json_path, self.to_json()), (prom_path, self.to_prometheus())):
+            if not path:
+                continue
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+        logger.info(f"Metrik run disimpan ke {json_path} dan {prom_path}.")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsServer:
+    """
+    Endpoint HTTP lokal untuk memantau run yang panjang: `/metrics` (Prometheus) dan `/metrics.json`.
+
+    Parameters:
+        metrics (RunMetrics): Metrik yang disajikan.
+        port (int): Port lokal.
+        host (str): Alamat bind; default hanya localhost.
+    """
+
+    def __init__(self, metrics, port, host="127.0.0.1"):
+        self.metrics = metrics
+        self.port = port
+        self.host = host
+        self._runner = None
+
+    def add_routes(self, app):
+        """
+        Menambahkan `/metrics` dan `/metrics.json` ke aplikasi aiohttp (juga dipakai service inquiry).
+        """
+        from aiohttp import web
+
+        async def prometheus(request):
+            return web.Response(text=self.metrics.to_prometheus(), content_type="text/plain")
+
+        async def summary(request):
+            return web.json_response(self.metrics.summary())
+
+        app.router.add_get("/metrics", prometheus)
+        app.router.add_get("/metrics.json", summary)
+
+    async def start(self):
+        from aiohttp import web
+
+        app = web.Application()
+        self.add_routes(app)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Metrik live tersedia di http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
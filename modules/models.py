@@ -0,0 +1,164 @@
+# modules/models.py
+
+import os
+import sys
+
+from .billing import summarize_bills
+
+
+def intern_source(path):
+    """
+    Mengembalikan nama file sumber (tanpa folder) yang di-intern, sehingga ribuan job dari
+    file yang sama berbagi satu objek string.
+    """
+    return sys.intern(os.path.basename(path)) if path else ""
+
+
+def error_message_of(data):
+    error_message = "Gagal scraping"  # Default message
+    # Cek apakah data memiliki pesan error yang spesifik
+    if isinstance(data, dict) and data.get('message'):
+        if data['message'].startswith("Error: "):
+            error_message = data['message'].split("Error: ", 1)[1]
+        else:
+            error_message = data['message']
+    return error_message
+
+
+class CustomerInfo:
+    """
+    Data pelanggan dari file .xlsx yang dipakai di sheet TUL dan kolom Tarif/Daya.
+    """
+
+    __slots__ = ("no_rbm", "nama_gardu", "nama_pelanggan", "alamat", "gol", "trf", "daya")
+
+    # Kolom .xlsx sesuai urutan atribut
+    COLUMNS = ("NO RBM", "NAMA GARDU", "NAMA PELANGGAN", "ALAMAT", "GOL", "TRF", "DAYA")
+
+    def __init__(self, no_rbm="", nama_gardu="", nama_pelanggan="", alamat="", gol="", trf="", daya=""):
+        self.no_rbm = no_rbm
+        self.nama_gardu = nama_gardu
+        self.nama_pelanggan = nama_pelanggan
+        self.alamat = alamat
+        self.gol = gol
+        self.trf = trf
+        self.daya = daya
+
+    def as_row(self):
+        return [self.no_rbm, self.nama_gardu, self.nama_pelanggan, self.alamat, self.gol, self.trf, self.daya]
+
+    def __eq__(self, other):
+        return isinstance(other, CustomerInfo) and self.as_row() == other.as_row()
+
+
+# Dipakai untuk pelanggan yang tidak punya data di file .xlsx
+EMPTY_INFO = CustomerInfo()
+
+
+class CustomerJob:
+    """
+    Satu customer_number yang akan di-scrape, beserta file sumber dan data pelanggannya.
+    """
+
+    __slots__ = ("customer_number", "source_file", "info")
+
+    def __init__(self, customer_number, source_file, info=None):
+        self.customer_number = customer_number
+        self.source_file = intern_source(source_file)
+        self.info = info
+
+    def __repr__(self):
+        return f"CustomerJob({self.customer_number!r}, {self.source_file!r})"
+
+
+class Bill:
+    __slots__ = ("period", "amount")
+
+    def __init__(self, period, amount):
+        self.period = period
+        self.amount = amount
+
+
+class InquiryResult:
+    """
+    Hasil inquiry satu pelanggan yang sudah diringkas ke field yang dipakai laporan.
+
+    Hasil sukses memiliki `error` None dan `summary` (BillSummary); hasil gagal hanya membawa
+    pesan error yang sudah dibersihkan dari awalan "Error: " dan status HTTP-nya (`status_code`, dipakai
+    scheduler untuk mengenali 429/5xx).
+    """
+
+    __slots__ = ("customer_number", "source_file", "info", "customer_name", "segmentation",
+                 "penalty_fee", "admin_charge", "bills", "error", "status_code", "tambahan", "summary")
+
+    def __init__(self, job, customer_name="", segmentation="", penalty_fee=0, admin_charge=0, bills=(), error=None,
+                 status_code=None):
+        self.customer_number = job.customer_number
+        self.source_file = job.source_file
+        self.info = job.info or EMPTY_INFO
+        self.customer_name = customer_name
+        self.segmentation = segmentation
+        self.penalty_fee = penalty_fee
+        self.admin_charge = admin_charge
+        self.bills = bills
+        self.error = error
+        self.status_code = status_code
+        self.tambahan = 0
+        self.summary = summarize_bills(self) if error is None else None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def markup(self):
+        return self.summary.tagihan + self.tambahan
+
+    @classmethod
+    def from_response(cls, job, data):
+        """
+        Membangun InquiryResult dari data API (atau payload journal) untuk satu job.
+
+        Parameters:
+            job (CustomerJob): Job asal hasil ini.
+            data (dict): Data sukses dari API, atau dict berisi 'message' error.
+
+        Returns:
+            InquiryResult: Hasil ringkas; field API lain dibuang.
+        """
+        if data and 'customer_number' in data:
+            return cls(
+                job,
+                customer_name=data.get("customer_name", ""),
+                segmentation=data.get("segmentation", ""),
+                penalty_fee=data.get("penalty_fee", 0),
+                admin_charge=data.get("admin_charge", 0),
+                bills=tuple(Bill(bill.get("bill_period"), bill.get("amount", 0)) for bill in data.get("bills", [])),
+            )
+        return cls(job, error=error_message_of(data),
+                   status_code=data.get('status_code') if isinstance(data, dict) else None)
+
+    def for_job(self, job):
+        """
+        Salinan hasil ini untuk job lain dengan customer_number yang sama (file sumber dan data
+        pelanggan milik job tersebut; ringkasan tagihan dihitung ulang untuk file sumbernya).
+        """
+        return InquiryResult(job, self.customer_name, self.segmentation, self.penalty_fee, self.admin_charge,
+                             self.bills, self.error, self.status_code)
+
+    def to_payload(self):
+        """
+        Mengubah hasil kembali ke bentuk dict API yang ringkas (untuk journal dan shard).
+        """
+        if not self.ok:
+            if self.status_code is not None:
+                return {"message": self.error, "status_code": self.status_code}
+            return {"message": self.error}
+        return {
+            "customer_number": self.customer_number,
+            "customer_name": self.customer_name,
+            "segmentation": self.segmentation,
+            "penalty_fee": self.penalty_fee,
+            "admin_charge": self.admin_charge,
+            "bills": [{"bill_period": bill.period, "amount": bill.amount} for bill in self.bills],
+        }
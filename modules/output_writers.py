@@ -0,0 +1,339 @@
+# modules/output_writers.py
+
+import csv
+import importlib.util
+import json
+import logging
+import multiprocessing
+import os
+from abc import ABC, abstractmethod
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from .pipeline import sort_periods
+from .report_rows import record_sets
+
+logger = logging.getLogger(__name__)
+
+FORMAT_XLSX = "xlsx"
+FORMAT_CSV = "csv"
+FORMAT_JSONL = "jsonl"
+FORMAT_PARQUET = "parquet"
+OUTPUT_FORMATS = (FORMAT_XLSX, FORMAT_CSV, FORMAT_JSONL, FORMAT_PARQUET)
+
+# Jumlah baris per row group Parquet; baris ditulis bertahap, bukan sekaligus
+PARQUET_BATCH_SIZE = 50000
+
+
+def _period_header(period):
+    # Format data memakai bill_period apa adanya: nama bulan bisa berulang antar tahun
+    return period
+
+
+def sheet_output_path(output_path, sheet, extension):
+    """
+    Path file untuk satu sheet pada format selain Excel, misalnya output/run_Sukses.csv.
+    """
+    root, _ = os.path.splitext(output_path)
+    return f"{root}_{sheet}.{extension}"
+
+
+class OutputWriter(ABC):
+    """
+    Antarmuka penulis laporan untuk satu format keluaran (lihat WRITERS).
+
+    Attributes:
+        extension (str): Ekstensi file keluaran.
+    """
+
+    extension = None
+
+    @abstractmethod
+    def write(self, success_data, failed_data, periods, output_path):
+        """
+        Menulis hasil ke file format ini.
+
+        Parameters:
+            success_data (list): InquiryResult yang berhasil.
+            failed_data (list): InquiryResult yang gagal.
+            periods (list): bill_period yang sudah diurutkan.
+            output_path (str): Path --output.
+
+        Returns:
+            list: Path file yang ditulis.
+        """
+
+
+class ReportWriter(OutputWriter):
+    """
+    Penulis laporan satu file per sheet. Subclass menulis setiap RecordSet (Sukses, Gagal, TUL) baris demi baris.
+    """
+
+    def write(self, success_data, failed_data, periods, output_path):
+        """
+        Menulis semua RecordSet ke file, satu file per sheet.
+
+        Parameters:
+            success_data (list): InquiryResult yang berhasil.
+            failed_data (list): InquiryResult yang gagal.
+            periods (list): bill_period yang sudah diurutkan.
+            output_path (str): Path --output; nama file per sheet diturunkan darinya.
+
+        Returns:
+            list: Path file yang ditulis.
+        """
+        paths = []
+        for record_set in record_sets(success_data, failed_data, periods, period_header=_period_header):
+            path = sheet_output_path(output_path, record_set.name, self.extension)
+            self.write_records(record_set, path)
+            paths.append(path)
+        logger.info(f"Hasil {self.extension.upper()} telah disimpan ke {', '.join(paths)}")
+        return paths
+
+    @abstractmethod
+    def write_records(self, record_set, path):
+        """
+        Menulis satu RecordSet ke `path`.
+        """
+
+
+class ExcelReportWriter(OutputWriter):
+    """
+    Workbook dengan sheet Sukses, Gagal dan TUL (create_excel).
+    """
+
+    extension = FORMAT_XLSX
+
+    def write(self, success_data, failed_data, periods, output_path):
+        from .excel_writer import create_excel
+
+        root, extension = os.path.splitext(output_path)
+        if extension.lower() != ".xlsx":
+            output_path = root + ".xlsx"
+        create_excel(success_data, failed_data, periods, output_path)
+        return [output_path]
+
+
+class CsvReportWriter(ReportWriter):
+    """
+    Satu file CSV (UTF-8, baris header) per sheet.
+    """
+
+    extension = FORMAT_CSV
+
+    def write_records(self, record_set, path):
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(record_set.headers)
+            writer.writerows(record_set.rows)
+
+
+class JsonLinesReportWriter(ReportWriter):
+    """
+    Satu file JSON lines per sheet: satu objek per baris dengan nama kolom sebagai key.
+    """
+
+    extension = FORMAT_JSONL
+
+    def write_records(self, record_set, path):
+        headers = record_set.headers
+        with open(path, 'w', encoding='utf-8') as f:
+            for row in record_set.rows:
+                f.write(json.dumps(dict(zip(headers, row)), ensure_ascii=False))
+                f.write("\n")
+
+
+class ParquetReportWriter(ReportWriter):
+    """
+    Satu file Parquet per sheet (membutuhkan pyarrow). Kolom angka bertipe int64, kolom lain string.
+    """
+
+    extension = FORMAT_PARQUET
+
+    def write_records(self, record_set, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        headers = record_set.headers
+        numeric = [header in record_set.numeric for header in headers]
+        # Nama kolom dibuat unik agar schema valid walaupun header berulang
+        names = []
+        for header in headers:
+            name = header
+            while name in names:
+                name += "_"
+            names.append(name)
+        schema = pa.schema([pa.field(name, pa.int64() if is_numeric else pa.string())
+                            for name, is_numeric in zip(names, numeric)])
+
+        def convert(value, is_numeric):
+            if value is None or value == "":
+                return None
+            return int(value) if is_numeric else str(value)
+
+        with pq.ParquetWriter(path, schema) as writer:
+            columns = [[] for _ in headers]
+            batches = 0
+            for row in record_set.rows:
+                for values, value, is_numeric in zip(columns, row, numeric):
+                    values.append(convert(value, is_numeric))
+                if len(columns[0]) >= PARQUET_BATCH_SIZE:
+                    writer.write_table(self._table(pa, columns, schema))
+                    columns = [[] for _ in headers]
+                    batches += 1
+            # Sisa baris; sheet kosong tetap ditulis agar file berisi schema
+            if columns[0] or not batches:
+                writer.write_table(self._table(pa, columns, schema))
+
+    @staticmethod
+    def _table(pa, columns, schema):
+        return pa.Table.from_arrays([pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                                    schema=schema)
+
+
+WRITERS = {
+    FORMAT_XLSX: ExcelReportWriter,
+    FORMAT_CSV: CsvReportWriter,
+    FORMAT_JSONL: JsonLinesReportWriter,
+    FORMAT_PARQUET: ParquetReportWriter,
+}
+
+
+def missing_dependency(output_format):
+    """
+    Returns:
+        str: Nama paket opsional yang belum terpasang untuk format tersebut, atau None.
+    """
+    module = {FORMAT_PARQUET: "pyarrow"}.get(output_format)
+    if module and importlib.util.find_spec(module) is None:
+        return module
+    return None
+
+
+def write_outputs(formats, success_data, failed_data, periods, output_path):
+    """
+    Menulis hasil ke setiap format yang dipilih.
+
+    Parameters:
+        formats (iterable): Nama format dari OUTPUT_FORMATS.
+        success_data (list): InquiryResult yang berhasil.
+        failed_data (list): InquiryResult yang gagal.
+        periods (list): bill_period yang sudah diurutkan.
+        output_path (str): Path --output.
+
+    Returns:
+        list: Path semua file yang ditulis.
+    """
+    paths = []
+    for output_format in formats:
+        paths.extend(WRITERS[output_format]().write(success_data, failed_data, periods, output_path))
+    return paths
+
+
+def source_output_paths(output_path, sources):
+    """
+    Path output per file sumber, misalnya output/run_JAB.xlsx untuk JAB.xlsx.
+
+    Jika beberapa sumber punya nama yang sama tanpa ekstensi (JAB.txt dan JAB.xlsx), ekstensinya ikut
+    dipakai (output/run_JAB_txt.xlsx, output/run_JAB_xlsx.xlsx) agar tidak ada dua laporan di path yang sama.
+
+    Parameters:
+        output_path (str): Path --output.
+        sources (iterable): Nama file sumber.
+
+    Returns:
+        dict: source_file -> path output yang unik.
+    """
+    root, extension = os.path.splitext(output_path)
+    sources = list(sources)
+    stems = Counter(os.path.splitext(source)[0] for source in sources)
+    paths = {}
+    used = set()
+    for source in sources:
+        stem, source_extension = os.path.splitext(source)
+        name = stem or 'tanpa_sumber'
+        if stems[stem] > 1 and source_extension:
+            name += "_" + source_extension.lstrip(".")
+        path = f"{root}_{name}{extension}"
+        suffix = 2
+        while path in used:
+            path = f"{root}_{name}_{suffix}{extension}"
+            suffix += 1
+        used.add(path)
+        paths[source] = path
+    return paths
+
+
+def partition_by_source(success_data, failed_data):
+    """
+    Membagi hasil per file sumber dengan urutan kemunculan tetap.
+
+    Returns:
+        dict: source_file -> (success_data, failed_data, periods).
+    """
+    partitions = {}
+    for index, results in enumerate((success_data, failed_data)):
+        for result in results:
+            partition = partitions.get(result.source_file)
+            if partition is None:
+                partition = partitions[result.source_file] = ([], [])
+            partition[index].append(result)
+    return {
+        source: (success, failed, sort_periods({period for result in success for period in result.summary.by_period}))
+        for source, (success, failed) in partitions.items()
+    }
+
+
+def write_outputs_by_source(formats, success_data, failed_data, output_path, max_workers=None):
+    """
+    Menulis laporan terpisah untuk setiap file sumber (layout Sukses/Gagal/TUL yang sama, kolom bulan
+    dan RPTAG milik file tersebut). Serialisasi openpyxl terikat CPU, jadi setiap file sumber dibangun
+    di proses terpisah.
+
+    Jika format xlsx dipilih, workbook indeks `<output>_index.xlsx` berisi jumlah baris per file sumber
+    juga ditulis.
+
+    Parameters:
+        formats (iterable): Nama format dari OUTPUT_FORMATS.
+        success_data (list): InquiryResult yang berhasil.
+        failed_data (list): InquiryResult yang gagal.
+        output_path (str): Path --output; nama file per sumber diturunkan darinya.
+        max_workers (int): Jumlah proses; default jumlah CPU.
+
+    Returns:
+        dict: source_file -> path file yang ditulis.
+    """
+    formats = list(formats)
+    partitions = partition_by_source(success_data, failed_data)
+    paths = source_output_paths(output_path, partitions)
+    jobs = {source: (formats, success, failed, periods, paths[source])
+            for source, (success, failed, periods) in partitions.items()}
+    workers = min(len(jobs), max_workers or os.cpu_count() or 1)
+
+    if workers <= 1:
+        written = {source: write_outputs(*job) for source, job in jobs.items()}
+    else:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = {source: pool.submit(write_outputs, *job) for source, job in jobs.items()}
+            written = {source: future.result() for source, future in futures.items()}
+    for source, paths in written.items():
+        logger.info(f"Laporan {source or '(tanpa sumber)'} disimpan ke {', '.join(paths)}")
+
+    if FORMAT_XLSX in formats:
+        index_path = os.path.splitext(output_path)[0] + "_index.xlsx"
+        _write_index(index_path, partitions, written)
+    return written
+
+
+def _write_index(path, partitions, written):
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title="Indeks")
+    ws.append(["Sumber File", "Sukses", "Gagal", "Total Tagihan", "File Laporan"])
+    for source, (success, failed, _) in partitions.items():
+        ws.append([source, len(success), len(failed), sum(result.summary.total for result in success),
+                   ", ".join(os.path.basename(path) for path in written[source])])
+    wb.save(path)
+    logger.info(f"Indeks laporan per sumber disimpan ke {path}")
@@ -0,0 +1,125 @@
+# modules/pipeline.py
+
+import logging
+from datetime import datetime
+
+from .models import InquiryResult
+from .retry_policy import retry_delay_of
+
+logger = logging.getLogger(__name__)
+
+
+def sort_periods(periods):
+    """
+    Mengurutkan bill_period ("YYYY-MM-DD") secara kronologis untuk kolom bulan.
+    """
+    return sorted(periods, key=lambda x: datetime.strptime(x, "%Y-%m-%d")) if periods else []
+
+
+class ReportCollector:
+    """
+    Sink yang mengumpulkan hasil untuk sheet Sukses, Gagal dan TUL.
+
+    Parameters:
+        tambahan_by_source (dict): Nilai 'Tambahan' per nama file sumber.
+    """
+
+    def __init__(self, tambahan_by_source=None):
+        self.tambahan_by_source = tambahan_by_source or {}
+        self.success_data = []
+        self.failed_data = []
+        self.all_periods = set()
+
+    def record(self, result):
+        if result.ok:
+            # Tambahkan nilai tambahan (markup dihitung dari BillSummary)
+            result.tambahan = self.tambahan_by_source.get(result.source_file, 0)
+            self.success_data.append(result)
+            self.all_periods.update(result.summary.by_period)
+        else:
+            self.failed_data.append(result)
+
+    @property
+    def periods(self):
+        return sort_periods(self.all_periods)
+
+    def close(self):
+        pass
+
+
+def dedupe_jobs(jobs):
+    """
+    Deduplikasi global lintas file: setiap customer_number hanya di-scrape sekali.
+
+    `jobs` boleh berupa generator (misalnya dari loader.iter_customer_jobs) dan hanya dibaca sekali;
+    daftar sumber hanya disimpan untuk ID yang muncul di lebih dari satu file.
+
+    Parameters:
+        jobs (iterable): CustomerJob dari semua file yang dipilih, sesuai urutan file.
+
+    Returns:
+        tuple: (job unik sesuai urutan kemunculan pertama,
+                dict customer_number -> semua CustomerJob untuk ID yang ada di beberapa file sumber).
+    """
+    first = {}
+    sources = {}
+    unique = []
+    duplicates = 0
+    for job in jobs:
+        first_job = first.get(job.customer_number)
+        if first_job is None:
+            first[job.customer_number] = job
+            unique.append(job)
+            continue
+        same_id = sources.get(job.customer_number) or [first_job]
+        # Duplikasi di file yang sama cukup dibuang; file lain ikut menerima hasilnya
+        if all(other.source_file != job.source_file for other in same_id):
+            duplicates += 1
+            same_id.append(job)
+            sources[job.customer_number] = same_id
+    if duplicates:
+        logger.info(f"{duplicates} customer number muncul di lebih dari satu file; masing-masing di-scrape sekali.")
+    return unique, sources
+
+
+def fan_out(result, jobs):
+    """
+    Menyebarkan satu hasil ke setiap file sumber customer_number tersebut.
+
+    Returns:
+        list: InquiryResult per job; hasil asli dipakai untuk job pertama.
+    """
+    if not jobs or len(jobs) == 1:
+        return [result]
+    return [result if job.source_file == result.source_file else result.for_job(job) for job in jobs]
+
+
+async def run_pipeline(scheduler, jobs, worker, sinks, sources=None):
+    """
+    Menjalankan job melalui scheduler dan meneruskan setiap hasil ke semua sink begitu selesai.
+
+    Worker boleh mengembalikan RetryLater; job tersebut masuk antrean retry tertunda scheduler
+    dan baru diteruskan ke sink setelah hasil finalnya ada.
+
+    Parameters:
+        scheduler (AdaptiveScheduler): Scheduler yang membatasi konkurensi.
+        jobs (iterable): CustomerJob yang akan diproses.
+        worker (callable): Coroutine function `worker(job)` yang mengembalikan InquiryResult.
+        sinks (list): Objek dengan method `record(result)`.
+        sources (dict): customer_number -> semua CustomerJob (dari dedupe_jobs); setiap hasil
+            diteruskan ke sink sekali per file sumber.
+
+    Returns:
+        int: Jumlah hasil yang diproses.
+    """
+    sources = sources or {}
+    processed = 0
+    async for job, result in scheduler.stream(jobs, worker, retry_delay_of):
+        if not isinstance(result, InquiryResult):
+            logger.error(f"Unexpected result format: {result}")
+            result = InquiryResult(job, error=str(result))
+        for source_result in fan_out(result, sources.get(job.customer_number)):
+            for sink in sinks:
+                sink.record(source_result)
+        processed += 1
+    return processed
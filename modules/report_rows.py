@@ -0,0 +1,116 @@
+# modules/report_rows.py
+
+from .utils import get_month_name, get_bl_akhir, get_bl_awal
+
+SHEET_SUCCESS = "Sukses"
+SHEET_FAILED = "Gagal"
+SHEET_TUL = "TUL"
+
+SUCCESS_LEADING_HEADERS = ["ID Pelanggan", "Nama Lengkap", "Tarif/Daya", "Jumlah Periode"]
+SUCCESS_TRAILING_HEADERS = ["Tagihan", "Denda", "Biaya Admin", "Total Tagihan", "Tambahan", "MarkUp", "Sumber File"]
+FAILED_HEADERS = ["ID Pelanggan", "Error", "Sumber File"]
+TUL_HEADERS = ["NO", "IDPEL", "NO RBM", "NAMA GARDU", "NAMA PELANGGAN", "ALAMAT",
+               "GOL", "TRF", "DAYA", "BL Awal", "BL Akhir", "LBR", "RPTAG", "RPBK", "Sumber File"]
+
+# Kolom angka (selalu int) per sheet, untuk format keluaran yang bertipe seperti Parquet
+TUL_NUMERIC_COLUMNS = frozenset(["NO", "RPTAG", "RPBK"])
+
+
+class RecordSet:
+    """
+    Satu kumpulan baris laporan (Sukses, Gagal atau TUL) yang sama untuk semua format keluaran.
+
+    Attributes:
+        name (str): Nama sheet.
+        headers (list): Nama kolom.
+        rows (iterable): Baris (list nilai) yang dibangun secara lazy.
+        numeric (frozenset): Nama kolom yang berisi angka.
+    """
+
+    __slots__ = ("name", "headers", "rows", "numeric")
+
+    def __init__(self, name, headers, rows, numeric=frozenset()):
+        self.name = name
+        self.headers = headers
+        self.rows = rows
+        self.numeric = numeric
+
+
+def tarif_daya(result):
+    # Menggabungkan 'segmentation' dan 'DAYA' untuk kolom "Tarif/Daya" tanpa .0
+    daya = result.info.daya
+    if isinstance(daya, float):
+        daya = int(daya) if daya.is_integer() else daya  # Menghilangkan .0 jika integer
+    return f"{result.segmentation} / {daya}"
+
+
+def success_headers(periods, period_header=get_month_name):
+    return SUCCESS_LEADING_HEADERS + [period_header(period) for period in periods] + SUCCESS_TRAILING_HEADERS
+
+
+def success_rows(success_data, periods):
+    for result in success_data:
+        summary = result.summary
+        row = [
+            result.customer_number,
+            result.customer_name,
+            tarif_daya(result),  # Tarif/Daya yang telah digabungkan tanpa .0
+            summary.lbr
+        ]
+        by_period = summary.by_period
+        row.extend([by_period.get(period, 0) for period in periods])
+        row.extend([summary.tagihan, summary.denda, summary.admin, summary.total, result.tambahan, result.markup,
+                    result.source_file])
+        yield row
+
+
+def failed_rows(failed_data):
+    for result in failed_data:
+        yield [result.customer_number, result.error, result.source_file]
+
+
+def tul_rows(success_data):
+    # Mendapatkan BL Akhir (sama untuk semua baris)
+    bl_akhir = get_bl_akhir()
+
+    for idx, result in enumerate(success_data, 1):
+        summary = result.summary
+        lbr_value = summary.lbr
+
+        row = [idx, result.customer_number]  # NO, IDPEL
+        row.extend(result.info.as_row())  # NO RBM, NAMA GARDU, NAMA PELANGGAN, ALAMAT, GOL, TRF, DAYA
+        row.extend([
+            get_bl_awal(lbr_value),  # BL Awal berdasarkan kategori LBR
+            bl_akhir,  # BL Akhir
+            f"({lbr_value}",  # LBR hanya tambahkan "(" di awal
+            summary.rptag,  # RPTAG setelah ditambah tambahan sesuai source file
+            summary.denda,  # RPBK
+            result.source_file  # Sumber File
+        ])
+        yield row
+
+
+def record_sets(success_data, failed_data, periods, period_header=get_month_name):
+    """
+    Membangun kumpulan baris Sukses, Gagal dan TUL dengan kolom terhitung yang sama dengan workbook Excel.
+
+    Sama seperti workbook, Sukses dan Gagal dilewati jika kosong, sedangkan TUL selalu ada.
+
+    Parameters:
+        success_data (list): InquiryResult yang berhasil.
+        failed_data (list): InquiryResult yang gagal.
+        periods (list): bill_period yang sudah diurutkan untuk kolom bulan.
+        period_header (callable): Nama kolom untuk satu bill_period; default nama bulan.
+
+    Returns:
+        list: RecordSet sesuai urutan sheet.
+    """
+    sets = []
+    if success_data:
+        headers = success_headers(periods, period_header)
+        numeric = frozenset(headers[3:-1])
+        sets.append(RecordSet(SHEET_SUCCESS, headers, success_rows(success_data, periods), numeric))
+    if failed_data:
+        sets.append(RecordSet(SHEET_FAILED, FAILED_HEADERS, failed_rows(failed_data)))
+    sets.append(RecordSet(SHEET_TUL, TUL_HEADERS, tul_rows(success_data), TUL_NUMERIC_COLUMNS))
+    return sets
@@ -0,0 +1,149 @@
+# modules/result_cache.py
+
+import json
+import logging
+import os
+import sqlite3
+import time
+from datetime import timedelta
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join('cache', 'inquiry_cache.sqlite')
+
+# Jenis hasil yang boleh disimpan di cache
+OUTCOME_SUCCESS = "success"
+OUTCOME_NOT_FOUND = "not_found"  # tagihan tidak ditemukan atau sudah dibayar
+OUTCOME_UNREGISTERED = "unregistered"  # nomor tidak terdaftar
+
+# Masa berlaku default per jenis hasil
+DEFAULT_TTLS = {
+    OUTCOME_SUCCESS: timedelta(hours=12),
+    OUTCOME_NOT_FOUND: timedelta(hours=6),
+    OUTCOME_UNREGISTERED: timedelta(days=30),
+}
+
+COMMIT_EVERY = 100
+
+
+def classify_outcome(data):
+    """
+    Menentukan jenis hasil inquiry untuk keperluan cache.
+
+    Parameters:
+        data (dict): Data dari API atau dict berisi 'message' error.
+
+    Returns:
+        str: OUTCOME_SUCCESS, OUTCOME_NOT_FOUND, OUTCOME_UNREGISTERED, atau None jika tidak boleh di-cache.
+    """
+    if not isinstance(data, dict):
+        return None
+    if 'customer_number' in data:
+        return OUTCOME_SUCCESS
+    message = str(data.get('message', '')).lower()
+    if "tidak terdaftar" in message:
+        return OUTCOME_UNREGISTERED
+    if "tagihan tidak ditemukan" in message:
+        return OUTCOME_NOT_FOUND
+    return None
+
+
+class ResultCache:
+    """
+    Cache hasil postpaid-inquiries berbasis SQLite dengan key customer_number.
+
+    Hanya hasil sukses, "tagihan tidak ditemukan atau sudah dibayar" dan "tidak terdaftar" yang
+    disimpan, masing-masing dengan TTL sendiri. Error sementara tidak pernah di-cache.
+
+    Parameters:
+        path (str): Path file SQLite.
+        success_ttl (timedelta): TTL untuk tagihan yang berhasil diambil.
+        not_found_ttl (timedelta): TTL untuk "tagihan tidak ditemukan atau sudah dibayar".
+        unregistered_ttl (timedelta): TTL untuk "tidak terdaftar".
+        clock (callable): Sumber waktu epoch dalam detik.
+        commit_every (int): Jumlah put per commit. Pakai 1 jika file cache dipakai bersama proses lain
+            (shard lain, service) agar transaksi tulis tidak menahan lock SQLite.
+    """
+
+    def __init__(
+            self,
+            path=DEFAULT_CACHE_PATH,
+            success_ttl=DEFAULT_TTLS[OUTCOME_SUCCESS],
+            not_found_ttl=DEFAULT_TTLS[OUTCOME_NOT_FOUND],
+            unregistered_ttl=DEFAULT_TTLS[OUTCOME_UNREGISTERED],
+            clock=time.time,
+            commit_every=COMMIT_EVERY):
+        self.path = path
+        self.commit_every = commit_every
+        self.ttls = {
+            OUTCOME_SUCCESS: success_ttl.total_seconds(),
+            OUTCOME_NOT_FOUND: not_found_ttl.total_seconds(),
+            OUTCOME_UNREGISTERED: unregistered_ttl.total_seconds(),
+        }
+        self._clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._pending = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS inquiries ("
+            "customer_number TEXT PRIMARY KEY, outcome TEXT NOT NULL, "
+            "payload TEXT NOT NULL, fetched_at REAL NOT NULL)")
+        self._conn.commit()
+
+    def get(self, customer_number, count_miss=True):
+        """
+        Mengambil hasil yang masih berlaku dari cache.
+
+        Parameters:
+            customer_number (str): Customer ID.
+            count_miss (bool): False untuk pemeriksaan awal yang diikuti get() lain saat miss, agar
+                satu lookup tidak dihitung dua kali sebagai miss.
+
+        Returns:
+            dict: Data yang di-cache, atau None jika tidak ada / sudah kadaluarsa.
+        """
+        row = self._conn.execute(
+            "SELECT outcome, payload, fetched_at FROM inquiries WHERE customer_number = ?",
+            (customer_number,)).fetchone()
+        if row is not None:
+            outcome, payload, fetched_at = row
+            if self._clock() - fetched_at < self.ttls.get(outcome, 0):
+                self.hits += 1
+                return json.loads(payload)
+        if count_miss:
+            self.misses += 1
+        return None
+
+    def put(self, customer_number, data):
+        """
+        Menyimpan hasil ke cache jika jenis hasilnya boleh di-cache.
+
+        Returns:
+            bool: True jika disimpan.
+        """
+        outcome = classify_outcome(data)
+        if outcome is None:
+            return False
+        self._conn.execute(
+            "INSERT OR REPLACE INTO inquiries (customer_number, outcome, payload, fetched_at) VALUES (?, ?, ?, ?)",
+            (customer_number, outcome, json.dumps(data), self._clock()))
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.flush()
+        return True
+
+    def flush(self):
+        self._conn.commit()
+        self._pending = 0
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+        logger.info(f"Result cache: {self.hits} hit, {self.misses} miss.")
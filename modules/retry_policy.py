@@ -0,0 +1,171 @@
+# modules/retry_policy.py
+
+import asyncio
+import random
+
+# Error yang tidak perlu di-retry (dicocokkan secara case-insensitive terhadap pesan API)
+NON_RETRY_ERRORS = [
+    "nomor tidak terdaftar. coba periksa lagi, yuk.",
+    "tagihan tidak ditemukan atau sudah dibayar.",
+    "tidak terdaftar",
+    "tagihan tidak ditemukan"
+    # Tambahkan error lain yang tidak ingin Anda retry
+]
+
+# Hasil klasifikasi respons
+OUTCOME_OK = "ok"
+OUTCOME_RETRY = "retry"
+OUTCOME_FATAL = "fatal"
+OUTCOME_TOKEN = "token"
+
+DEFAULT_MAX_ATTEMPTS = 4
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 30.0
+DEFAULT_MULTIPLIER = 2.0
+DEFAULT_JITTER = 0.5
+
+
+class RetryBudget:
+    """
+    Jatah request untuk satu customer_number, dipakai bersama oleh ScraperAPI dan scraper_handler.
+    """
+
+    __slots__ = ("max_attempts", "attempts")
+
+    def __init__(self, max_attempts):
+        self.max_attempts = max_attempts
+        self.attempts = 0
+
+    @property
+    def exhausted(self):
+        return self.attempts >= self.max_attempts
+
+    def consume(self):
+        """
+        Memakai satu jatah request.
+
+        Returns:
+            bool: False jika jatah sudah habis.
+        """
+        if self.exhausted:
+            return False
+        self.attempts += 1
+        return True
+
+
+class RetryLater:
+    """
+    Penanda bahwa customer_number perlu dicoba lagi setelah `delay` detik. Dikembalikan worker
+    (alih-alih tidur di dalam task) agar scheduler bisa menaruh ID di antrean retry tertunda
+    dan slot konkurensinya langsung dipakai ID lain.
+
+    Parameters:
+        budget (RetryBudget): Jatah request ID tersebut, dipakai lagi pada percobaan berikutnya.
+        delay (float): Delay backoff dalam detik.
+        data (dict): Data error terakhir dari API.
+    """
+
+    __slots__ = ("budget", "delay", "data")
+
+    def __init__(self, budget, delay, data):
+        self.budget = budget
+        self.delay = delay
+        self.data = data
+
+    @property
+    def error(self):
+        return self.data.get('message') if isinstance(self.data, dict) else None
+
+    @property
+    def status_code(self):
+        return self.data.get('status_code') if isinstance(self.data, dict) else None
+
+
+def retry_delay_of(result):
+    """
+    Returns:
+        float: Delay retry jika `result` adalah RetryLater, selain itu None.
+    """
+    return result.delay if isinstance(result, RetryLater) else None
+
+
+class RetryPolicy:
+    """
+    Kebijakan retry tunggal: klasifikasi error, exponential backoff dengan jitter, dan jatah request per ID.
+
+    Parameters:
+        max_attempts (int): Jumlah maksimal request HTTP per customer_number (semua layer digabung).
+        base_delay (float): Delay awal dalam detik.
+        max_delay (float): Batas atas delay dalam detik.
+        multiplier (float): Faktor pengali delay setiap percobaan.
+        jitter (float): Porsi delay (0-1) yang diacak agar retry tidak serempak.
+        non_retry_errors (list): Pesan error yang tidak perlu di-retry.
+        sleep (callable): Coroutine function untuk menunggu; bisa diganti fake clock saat testing.
+        rng (callable): Sumber angka acak 0-1 untuk jitter.
+    """
+
+    def __init__(
+            self,
+            max_attempts=DEFAULT_MAX_ATTEMPTS,
+            base_delay=DEFAULT_BASE_DELAY,
+            max_delay=DEFAULT_MAX_DELAY,
+            multiplier=DEFAULT_MULTIPLIER,
+            jitter=DEFAULT_JITTER,
+            non_retry_errors=None,
+            sleep=asyncio.sleep,
+            rng=random.random):
+        if max_attempts < 1:
+            raise ValueError("max_attempts minimal 1.")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.non_retry_errors = [error.lower() for error in (non_retry_errors or NON_RETRY_ERRORS)]
+        self._sleep = sleep
+        self._rng = rng
+
+    def budget(self):
+        return RetryBudget(self.max_attempts)
+
+    def is_non_retryable(self, message):
+        message = (message or "").lower()
+        return any(error in message for error in self.non_retry_errors)
+
+    def classify(self, data):
+        """
+        Mengklasifikasikan hasil scrape_tagihan.
+
+        Parameters:
+            data (dict): Data dari API atau dict berisi 'message' error.
+
+        Returns:
+            str: OUTCOME_OK, OUTCOME_FATAL, OUTCOME_TOKEN, atau OUTCOME_RETRY.
+        """
+        if data and 'customer_number' in data:
+            return OUTCOME_OK
+        message = data.get('message', '') if isinstance(data, dict) else ''
+        if self.is_non_retryable(message):
+            return OUTCOME_FATAL
+        if "Invalid Oauth Token" in message:
+            return OUTCOME_TOKEN
+        return OUTCOME_RETRY
+
+    def backoff(self, attempt):
+        """
+        Menghitung delay sebelum percobaan berikutnya.
+
+        Parameters:
+            attempt (int): Jumlah percobaan yang sudah dilakukan (mulai dari 1).
+
+        Returns:
+            float: Delay dalam detik.
+        """
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** max(attempt - 1, 0))
+        return delay * (1 - self.jitter) + delay * self.jitter * self._rng()
+
+    async def sleep(self, delay):
+        await self._sleep(delay)
+
+    async def wait(self, attempt):
+        await self._sleep(self.backoff(attempt))
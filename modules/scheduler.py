@@ -0,0 +1,255 @@
+# modules/scheduler.py
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Konfigurasi default worker pool
+DEFAULT_INITIAL_CONCURRENCY = 10
+DEFAULT_MIN_CONCURRENCY = 1
+DEFAULT_MAX_CONCURRENCY = 50
+DEFAULT_LATENCY_TARGET = 15.0  # detik per customer, termasuk retry
+DEFAULT_DECREASE_FACTOR = 0.5
+DEFAULT_REPORT_INTERVAL = 30  # detik antar log status
+
+_EXHAUSTED = object()
+
+# Pesan yang menandakan server sedang kewalahan
+CONGESTION_MARKERS = (
+    "unexpected error",
+    "too many requests",
+    "rate limit",
+)
+
+
+def is_congestion_result(result):
+    """
+    Menentukan apakah hasil scraping menandakan server sedang kewalahan (429/5xx/"Unexpected error").
+
+    Parameters:
+        result: Hasil worker: InquiryResult, dict data API, atau tuple (customer_number, data).
+
+    Returns:
+        bool: True jika konkurensi perlu diturunkan.
+    """
+    if isinstance(result, Exception):
+        return True
+    if isinstance(result, tuple) and len(result) == 2:
+        result = result[1]
+    if isinstance(result, dict):
+        status = result.get("status_code")
+        message = str(result.get("message", "")).lower()
+    else:
+        status = getattr(result, "status_code", None)
+        message = str(getattr(result, "error", None) or "").lower()
+    if isinstance(status, int) and (status == 429 or status >= 500):
+        return True
+    return any(marker in message for marker in CONGESTION_MARKERS)
+
+
+class AdaptiveScheduler:
+    """
+    Worker pool dengan batas konkurensi yang menyesuaikan diri secara AIMD.
+
+    Batas konkurensi naik satu setiap kali sejumlah `limit` pekerjaan selesai dengan sehat
+    (additive increase), dan dipotong dengan `decrease_factor` saat ada tanda kewalahan atau
+    latensi melewati `latency_target` (multiplicative decrease). Penurunan hanya dilakukan
+    sekali per rata-rata latensi agar satu gelombang error tidak langsung menjatuhkan batas ke minimum.
+    """
+
+    def __init__(
+            self,
+            initial_concurrency=DEFAULT_INITIAL_CONCURRENCY,
+            min_concurrency=DEFAULT_MIN_CONCURRENCY,
+            max_concurrency=DEFAULT_MAX_CONCURRENCY,
+            latency_target=DEFAULT_LATENCY_TARGET,
+            decrease_factor=DEFAULT_DECREASE_FACTOR,
+            is_congested=is_congestion_result,
+            report_interval=DEFAULT_REPORT_INTERVAL):
+        if not 1 <= min_concurrency <= max_concurrency:
+            raise ValueError("min_concurrency harus >= 1 dan <= max_concurrency.")
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.limit = max(min_concurrency, min(initial_concurrency, max_concurrency))
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self.is_congested = is_congested
+        self.report_interval = report_interval
+
+        self.in_flight = 0
+        self.queued = 0
+        self.retrying = 0
+        self.done = 0
+        self.congested = 0
+        self._healthy_streak = 0
+        self._avg_latency = None
+        self._last_decrease = float("-inf")
+
+    @property
+    def stats(self):
+        """
+        Mengembalikan snapshot status worker pool saat ini.
+
+        Returns:
+            dict: in_flight, queued, retrying (menunggu di antrean retry), done, congested,
+            dan concurrency (batas aktif).
+        """
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "retrying": self.retrying,
+            "done": self.done,
+            "congested": self.congested,
+            "concurrency": self.limit,
+        }
+
+    def _observe(self, latency, congested, final=True):
+        # `final` False: percobaan yang ditunda ke antrean retry. Tanda kewalahan tetap dihitung,
+        # tetapi percobaan yang gagal tidak menambah streak sehat
+        if self._avg_latency is None:
+            self._avg_latency = latency
+        else:
+            self._avg_latency = 0.8 * self._avg_latency + 0.2 * latency
+
+        now = time.monotonic()
+        if congested or latency > self.latency_target:
+            self.congested += 1
+            self._healthy_streak = 0
+            if now - self._last_decrease >= self._avg_latency:
+                new_limit = max(self.min_concurrency, int(self.limit * self.decrease_factor))
+                if new_limit != self.limit:
+                    logger.warning(f"Konkurensi diturunkan dari {self.limit} ke {new_limit}.")
+                self.limit = new_limit
+                self._last_decrease = now
+        elif final:
+            self._healthy_streak += 1
+            if self._healthy_streak >= self.limit and self.limit < self.max_concurrency:
+                self.limit += 1
+                self._healthy_streak = 0
+
+    async def _report(self):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            logger.info(
+                "Scheduler: in-flight=%(in_flight)d, antre=%(queued)d, retry=%(retrying)d, selesai=%(done)d, "
+                "konkurensi=%(concurrency)d" % self.stats)
+
+    async def stream(self, items, worker, retry_delay=None):
+        """
+        Menjalankan `worker(item)` untuk setiap item dengan batas konkurensi adaptif dan
+        menghasilkan setiap hasil begitu selesai.
+
+        Item diambil dari `items` secara lazy, sehingga iterator/generator besar tidak perlu
+        dimuat seluruhnya ke memori.
+
+        Jika `retry_delay(result)` mengembalikan angka, item tidak dihasilkan tetapi ditaruh di
+        antrean retry tertunda dan dijalankan lagi setelah delay tersebut. Slot tidak ditahan
+        selama menunggu: item baru selalu didahulukan, retry diambil begitu jatuh tempo.
+
+        Parameters:
+            items (iterable): Item yang akan diproses (misalnya job customer).
+            worker (callable): Coroutine function yang menerima satu item.
+            retry_delay (callable): Fungsi `retry_delay(result)` -> detik atau None (hasil final).
+
+        Yields:
+            tuple: (item, result) sesuai urutan selesai. Exception dari worker dikembalikan
+            sebagai result agar satu item tidak menghentikan seluruh pool.
+        """
+        iterator = iter(items)
+        sized = hasattr(items, '__len__')
+        if sized:
+            self.queued += len(items)
+        finished = asyncio.Queue()
+        condition = asyncio.Condition()
+        # Antrean retry tertunda: (waktu jatuh tempo, urutan, item)
+        retries = []
+        sequence = itertools.count()
+        fresh_exhausted = False
+
+        def take():
+            nonlocal fresh_exhausted
+            if not fresh_exhausted:
+                item = next(iterator, _EXHAUSTED)
+                if item is not _EXHAUSTED:
+                    if sized:
+                        self.queued -= 1
+                    return item
+                fresh_exhausted = True
+            if retries and retries[0][0] <= time.monotonic():
+                self.retrying -= 1
+                return heapq.heappop(retries)[2]
+            return _EXHAUSTED
+
+        async def slot():
+            try:
+                while True:
+                    async with condition:
+                        while True:
+                            if self.in_flight < self.limit:
+                                item = take()
+                                if item is not _EXHAUSTED:
+                                    break
+                            # Item yang masih berjalan bisa menghasilkan retry baru
+                            if fresh_exhausted and not retries and not self.in_flight:
+                                return
+                            timeout = None
+                            if retries and self.in_flight < self.limit:
+                                timeout = max(0.0, retries[0][0] - time.monotonic())
+                            try:
+                                await asyncio.wait_for(condition.wait(), timeout)
+                            except asyncio.TimeoutError:
+                                pass
+                        self.in_flight += 1
+
+                    started = time.monotonic()
+                    try:
+                        result = await worker(item)
+                    except Exception as e:
+                        logger.error("Worker gagal memproses %s: %s", item, e)
+                        result = e
+                    latency = time.monotonic() - started
+                    delay = retry_delay(result) if retry_delay is not None else None
+
+                    async with condition:
+                        self.in_flight -= 1
+                        # RetryLater membawa status_code/error percobaan terakhir, jadi 429/5xx yang ditunda
+                        # tetap menurunkan konkurensi (sekali per rata-rata latensi)
+                        self._observe(latency, self.is_congested(result), final=delay is None)
+                        if delay is None:
+                            self.done += 1
+                        else:
+                            heapq.heappush(retries, (time.monotonic() + delay, next(sequence), item))
+                            self.retrying += 1
+                        condition.notify_all()
+                    if delay is None:
+                        finished.put_nowait((item, result))
+            finally:
+                finished.put_nowait(_EXHAUSTED)
+
+        reporter = asyncio.create_task(self._report())
+        slots = [asyncio.create_task(slot()) for _ in range(self.max_concurrency)]
+        running = len(slots)
+        try:
+            while running:
+                entry = await finished.get()
+                if entry is _EXHAUSTED:
+                    running -= 1
+                    continue
+                yield entry
+        finally:
+            reporter.cancel()
+            for task in slots:
+                task.cancel()
+        logger.info(
+            "Scheduler selesai: selesai=%(done)d, kewalahan=%(congested)d, konkurensi akhir=%(concurrency)d"
+            % self.stats)
+
+    async def run(self, items, worker, retry_delay=None):
+        """
+        Seperti `stream`, tetapi mengumpulkan semua pasangan (item, result) ke dalam list.
+        """
+        return [entry async for entry in self.stream(items, worker, retry_delay)]
@@ -1,143 +1,244 @@
 import json
-import os
 import logging
-import aiohttp
 import time
-from datetime import datetime, timedelta
+import aiohttp
+from datetime import timedelta
+
+from .circuit_breaker import is_endpoint_failure
+from .retry_policy import RetryPolicy, OUTCOME_RETRY, OUTCOME_TOKEN
+from .singleflight import SingleFlight
+from .token_manager import TokenManager
 
 logger = logging.getLogger(__name__)
 
+# Pengaturan default connection pool dan timeout untuk session buatan ScraperAPI
+DEFAULT_REQUEST_TIMEOUT = 60
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 30
+DEFAULT_CONNECTION_LIMIT = 100
+DEFAULT_CONNECTION_LIMIT_PER_HOST = 50
+DEFAULT_DNS_CACHE_TTL = 300
+DEFAULT_KEEPALIVE_TIMEOUT = 30
+
 
 class ScraperAPI:
     BASE_URL = "https://www.bukalapak.com/"
     API_URL = "https://api.bukalapak.com/"
     CACHE_FILE = 'token_cache.json'
+    TOKEN_URL = "listrik-pln/tagihan-listrik"
     TOKEN_EXPIRY_TIME = timedelta(hours=1)
-    MAX_RETRIES = 2
-    RETRY_DELAY = 3
-    MAX_RETRY_FOR_EMPTY_RESPONSE = 3
 
-    def __init__(self):
+    def __init__(self, retry_policy=None, result_cache=None, force_refresh=False,
+                 request_timeout=DEFAULT_REQUEST_TIMEOUT, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT, connection_limit=DEFAULT_CONNECTION_LIMIT,
+                 connection_limit_per_host=DEFAULT_CONNECTION_LIMIT_PER_HOST, dns_cache_ttl=DEFAULT_DNS_CACHE_TTL,
+                 keepalive_timeout=DEFAULT_KEEPALIVE_TIMEOUT, base_url=None, api_url=None, metrics=None,
+                 circuit_breaker=None):
         self.access_token = None
+        self.metrics = metrics
+        # Dipakai bersama semua request inquiry; None berarti tanpa circuit breaker
+        self.circuit_breaker = circuit_breaker
+        # Lookup yang sedang berjalan per customer_number (dipakai scrape_customer_data)
+        self.inflight = SingleFlight()
+        self.base_url = base_url or self.BASE_URL
+        self.api_url = api_url or self.API_URL
+        self.timeout = aiohttp.ClientTimeout(
+            total=request_timeout, sock_connect=connect_timeout, sock_read=read_timeout)
+        self.connection_limit = connection_limit
+        self.connection_limit_per_host = connection_limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.connection_stats = {"requests": 0, "new_connections": 0, "reused_connections": 0}
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.result_cache = result_cache
+        self.force_refresh = force_refresh
+        self.token_url = self.TOKEN_URL
+        self.tokens = TokenManager(
+            self._fetch_token,
+            cache_file=self.CACHE_FILE,
+            expiry=self.TOKEN_EXPIRY_TIME)
 
-    def _load_token_from_cache(self):
-        if os.path.exists(self.CACHE_FILE):
-            try:
-                with open(self.CACHE_FILE, 'r', encoding='utf-8') as f:
-                    cache_data = json.load(f)
-                    token_time = datetime.strptime(cache_data['timestamp'], "%Y-%m-%dT%H:%M:%S")
-                    if datetime.now() - token_time < self.TOKEN_EXPIRY_TIME:
-                        logger.info("Menggunakan token dari cache.")
-                        return cache_data['access_token']
-                    else:
-                        logger.warning("Token telah kadaluarsa.")
-            except Exception as e:
-                logger.error(f"Error saat memuat token dari cache: {e}")
-        return None
+    def create_session(self):
+        """
+        Membuat ClientSession dengan connection pool, timeout dan trace statistik koneksi dari ScraperAPI ini.
 
-    def _save_token_to_cache(self, token):
-        try:
-            cache_data = {
-                'access_token': token,
-                'timestamp': datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
-            }
-            with open(self.CACHE_FILE, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f)
-            logger.info("Token berhasil disimpan ke cache.")
-        except Exception as e:
-            logger.error(f"Error saat menyimpan token ke cache: {e}")
+        Returns:
+            aiohttp.ClientSession: Session yang harus ditutup pemanggil (`async with`).
+        """
+        connector = aiohttp.TCPConnector(
+            limit=self.connection_limit,
+            limit_per_host=self.connection_limit_per_host,
+            ttl_dns_cache=self.dns_cache_ttl,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_end.append(self._on_request_end)
+        trace_config.on_connection_create_end.append(self._on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(self._on_connection_reuseconn)
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=self.timeout,
+            auto_decompress=True,
+            trace_configs=[trace_config],
+        )
 
-    def _clear_token_cache(self):
-        if os.path.exists(self.CACHE_FILE):
-            try:
-                os.remove(self.CACHE_FILE)
-                logger.info("Cache token dihapus.")
-            except Exception as e:
-                logger.error(f"Error menghapus cache: {e}")
+    async def _on_request_end(self, session, context, params):
+        self.connection_stats["requests"] += 1
 
-    def _is_token_near_expiry(self, margin_minutes=5):
-        if os.path.exists(self.CACHE_FILE):
-            with open(self.CACHE_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                token_time = datetime.strptime(data['timestamp'], "%Y-%m-%dT%H:%M:%S")
-                remaining = self.TOKEN_EXPIRY_TIME - (datetime.now() - token_time)
-                return remaining < timedelta(minutes=margin_minutes)
-        return True
+    async def _on_connection_create_end(self, session, context, params):
+        self.connection_stats["new_connections"] += 1
 
-    async def get_access_token(self, url, session):
-        self.access_token = self._load_token_from_cache()
-        if self.access_token and self._is_token_near_expiry():
-            logger.info("Token hampir kadaluarsa. Memperbarui token...")
-            self._clear_token_cache()
-            self.access_token = None
+    async def _on_connection_reuseconn(self, session, context, params):
+        self.connection_stats["reused_connections"] += 1
 
-        if not self.access_token:
-            try:
-                async with session.get(self.BASE_URL + url, timeout=60) as response:
-                    if response.status == 200:
-                        text = await response.text()
-                        start = text.find("localStorage.setItem('bl_token', '")
-                        if start != -1:
-                            start += len("localStorage.setItem('bl_token', '")
-                            end = text.find("');", start)
-                            token_str = text[start:end]
-                            try:
-                                access_token_data = json.loads(token_str)
-                                self.access_token = access_token_data.get('access_token')
-                                if self.access_token:
-                                    self._save_token_to_cache(self.access_token)
-                                else:
-                                    logger.error("Access token tidak ditemukan.")
-                            except json.JSONDecodeError:
-                                logger.error("JSONDecodeError saat memuat access token.")
-                        else:
-                            logger.error("Access token tidak ditemukan dalam halaman.")
-                    else:
-                        logger.error("Halaman token tidak dapat diakses.")
-            except Exception as e:
-                logger.error(f"Error saat mencoba mendapatkan access token: {e}")
+    def log_connection_stats(self):
+        stats = self.connection_stats
+        connections = stats["new_connections"] + stats["reused_connections"]
+        reuse_rate = stats["reused_connections"] / connections * 100 if connections else 0
+        logger.info(
+            f"Koneksi HTTP: {stats['requests']} request, {stats['new_connections']} koneksi baru, "
+            f"{stats['reused_connections']} koneksi dipakai ulang ({reuse_rate:.1f}% reuse).")
+
+    async def _fetch_token(self, session):
+        if self.metrics is not None:
+            self.metrics.record_token_refresh()
+        try:
+            async with session.get(self.base_url + self.token_url) as response:
+                if response.status != 200:
+                    logger.error("Halaman token tidak dapat diakses.")
+                    return None
+                text = await response.text()
+        except Exception as e:
+            logger.error(f"Error saat mencoba mendapatkan access token: {e}")
+            return None
+
+        start = text.find("localStorage.setItem('bl_token', '")
+        if start == -1:
+            logger.error("Access token tidak ditemukan dalam halaman.")
+            return None
+        start += len("localStorage.setItem('bl_token', '")
+        end = text.find("');", start)
+        try:
+            access_token = json.loads(text[start:end]).get('access_token')
+        except json.JSONDecodeError:
+            logger.error("JSONDecodeError saat memuat access token.")
+            return None
+        if not access_token:
+            logger.error("Access token tidak ditemukan.")
+        return access_token
 
+    async def get_access_token(self, url, session):
+        self.token_url = url
+        self.access_token = await self.tokens.get_token(session)
         return self.access_token
 
-    async def scrape_tagihan(self, customer_number, access_token, session, retries=0, empty_response_retries=0):
+    async def _post_inquiry(self, customer_number, access_token, session, source_file=""):
+        payload = {"customer_number": customer_number}
+        started = time.monotonic()
+        status = None
+        body = b""
         try:
             async with session.post(
-                f"{self.API_URL}electricities/postpaid-inquiries",
+                f"{self.api_url}electricities/postpaid-inquiries",
                 params={"access_token": access_token},
-                json={"customer_number": customer_number},
-                timeout=60
+                json=payload,
             ) as resp:
+                status = resp.status
+                body = await resp.read()
                 if resp.status == 200:
-                    data = await resp.json()
+                    data = json.loads(body)
                     data_api = data.get('data', {})
                     if data_api:
-                        return data_api
+                        result = data_api
                     else:
-                        if empty_response_retries < self.MAX_RETRY_FOR_EMPTY_RESPONSE:
-                            time.sleep(self.RETRY_DELAY)
-                            return await self.scrape_tagihan(customer_number, access_token, session, retries, empty_response_retries + 1)
-                        else:
-                            return {"status": False, "message": "Data kosong"}
+                        result = {"status": False, "message": "Data kosong"}
                 else:
                     try:
-                        data = await resp.json()
+                        data = json.loads(body)
                         error_message = data.get('errors', [{'message': 'Unknown error'}])[0]['message']
                     except BaseException:
                         error_message = "Unknown error"
+                    result = {"status": False, "message": f"Error: {error_message}", "status_code": resp.status}
+        except Exception as e:
+            logger.error("Error saat scraping data untuk %s: %s", customer_number, e,
+                         extra={"customer_number": customer_number})
+            result = {"status": False, "message": f"Error: {str(e) or type(e).__name__}"}
 
-                    if "Invalid Oauth Token" in error_message:
-                        self._clear_token_cache()
-                        new_token = await self.get_access_token("listrik-pln/tagihan-listrik", session)
-                        if new_token:
-                            return await self.scrape_tagihan(customer_number, new_token, session, retries, empty_response_retries)
-                        else:
-                            return {"status": False, "message": "Gagal memperbarui token"}
+        if self.metrics is not None:
+            self.metrics.record_request(
+                source_file,
+                time.monotonic() - started,
+                status,
+                error=None if 'customer_number' in result else result.get("message"),
+                bytes_sent=len(json.dumps(payload)),
+                bytes_received=len(body))
+        return result
 
-                    if retries < self.MAX_RETRIES and "Unexpected error" in error_message:
-                        time.sleep(self.RETRY_DELAY)
-                        return await self.scrape_tagihan(customer_number, access_token, session, retries + 1, empty_response_retries)
+    async def _guarded_post_inquiry(self, customer_number, access_token, session, source_file=""):
+        """
+        Seperti _post_inquiry, tetapi menunggu izin circuit breaker lebih dulu dan melaporkan hasilnya.
+        """
+        if self.circuit_breaker is None:
+            return await self._post_inquiry(customer_number, access_token, session, source_file)
+        generation = await self.circuit_breaker.acquire()
+        data = None
+        try:
+            data = await self._post_inquiry(customer_number, access_token, session, source_file)
+            return data
+        finally:
+            self.circuit_breaker.record(is_endpoint_failure(data), generation)
 
-                    return {"status": False, "message": f"Error: {error_message}"}
-        except Exception as e:
-            logger.error(f"Error saat scraping data untuk {customer_number}: {e}")
-            return {"status": False, "message": f"Error: {str(e)}"}
+    async def scrape_tagihan(self, customer_number, access_token, session, budget=None, source_file="",
+                             defer_retries=False):
+        """
+        Mengambil tagihan satu customer_number, me-retry sesuai retry_policy tanpa memblokir event loop.
+
+        Hasil yang masih berlaku di result_cache dikembalikan tanpa request, kecuali force_refresh aktif.
+
+        Parameters:
+            customer_number (str): Customer ID.
+            access_token (str): Access token untuk API.
+            session (aiohttp.ClientSession): Session HTTP.
+            budget (RetryBudget): Jatah request per ID; dibuat baru jika tidak diberikan.
+            source_file (str): File sumber customer_number, untuk label metrik.
+            defer_retries (bool): Jika True, error yang bisa di-retry langsung dikembalikan tanpa menunggu
+                backoff; pemanggil yang menjadwalkan percobaan berikutnya. Refresh token tetap dilakukan di sini.
+
+        Returns:
+            dict: Data dari API atau dict berisi 'message' error.
+        """
+        if self.result_cache is not None and not self.force_refresh:
+            cached = self.result_cache.get(customer_number)
+            if cached is not None:
+                return cached
+
+        if budget is None:
+            budget = self.retry_policy.budget()
+
+        data = {"status": False, "message": "Max retries exceeded."}
+        while budget.consume():
+            # Selalu pakai token terbaru dari memori jika sudah diperbarui coroutine lain
+            access_token = self.tokens.token or access_token
+            data = await self._guarded_post_inquiry(customer_number, access_token, session, source_file)
+            outcome = self.retry_policy.classify(data)
+
+            if outcome == OUTCOME_TOKEN:
+                access_token = await self.tokens.refresh(session, stale_token=access_token)
+                if not access_token:
+                    return {"status": False, "message": "Gagal memperbarui token"}
+                continue
+
+            if outcome != OUTCOME_RETRY or budget.exhausted or defer_retries:
+                break
+            if self.metrics is not None:
+                self.metrics.record_retry(source_file)
+            await self.retry_policy.wait(budget.attempts)
+
+        if self.result_cache is not None:
+            try:
+                self.result_cache.put(customer_number, data)
+            except Exception as e:
+                # Kegagalan cache (misalnya "database is locked") tidak boleh membuang hasil API
+                logger.warning("Gagal menyimpan %s ke result cache: %s", customer_number, e,
+                               extra={"customer_number": customer_number})
+        return data
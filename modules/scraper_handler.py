@@ -1,96 +1,95 @@
 # modules/scraper_handler.py
 
 import logging
-import asyncio
+
+from .models import InquiryResult, error_message_of
+from .retry_policy import OUTCOME_OK, OUTCOME_FATAL, RetryLater
 
 
 async def scrape_customer_data(
         scraper,
-        customer_number,
+        job,
         access_token,
         session,
-        request_counts,
-        global_request_count,
-        non_retry_errors,
-        max_retries=2,
-        retry_delay=5):
+        retry_policy=None,
+        budget=None,
+        defer_retries=False):
     """
-    Scrapes data for a given customer number with a retry mechanism.
+    Scrapes data for a given customer job with a retry mechanism.
+
+    Retries share a single per-ID budget with ScraperAPI.scrape_tagihan, so one bad ID costs at most
+    `retry_policy.max_attempts` requests, and every wait is awaited instead of blocking the event loop.
+    Concurrent calls for the same customer_number share one in-flight lookup (`scraper.inflight`);
+    each caller gets the result attached to its own job.
+
+    With `defer_retries`, a retryable failure is returned as `RetryLater` instead of sleeping inside the task,
+    so the scheduler can put the ID in its delayed retry queue and give the slot to another ID. Pass the
+    returned budget back in on the next attempt.
 
     Parameters:
         scraper (ScraperAPI): Instance of ScraperAPI.
-        customer_number (str): Customer ID.
+        job (CustomerJob): Customer ID with its source file and customer info.
         access_token (str): Access token for API.
         session (aiohttp.ClientSession): Session for making HTTP requests.
-        request_counts (dict): Tracking request counts per customer.
-        global_request_count (list): Tracking global request count.
-        non_retry_errors (list): List of error messages that should not trigger retries.
-        max_retries (int): Maximum number of retry attempts.
-        retry_delay (int): Delay in seconds between retries.
+        retry_policy (RetryPolicy): Retry policy to use. Defaults to the scraper's policy.
+        budget (RetryBudget): Budget left over from a previous deferred attempt. Defaults to a fresh budget.
+        defer_retries (bool): Return `RetryLater` instead of waiting for the backoff delay.
 
     Returns:
-        tuple: (customer_number, data) where data is the scraped data or a dict containing the error message.
+        InquiryResult: Compact result holding only the fields used by the report, or the error message.
+        RetryLater: Only with `defer_retries`, when the ID should be tried again after `delay` seconds.
     """
-    attempt = 0
-    while attempt <= max_retries:
-        try:
-            # Increment request counts
-            request_counts[customer_number] = request_counts.get(customer_number, 0) + 1
-            global_request_count[0] += 1
+    result = await scraper.inflight.do(
+        job.customer_number,
+        lambda: _scrape_customer_data(scraper, job, access_token, session, retry_policy, budget, defer_retries))
+    if isinstance(result, RetryLater) or result.source_file == job.source_file:
+        return result
+    return result.for_job(job)
 
-            logging.info(
-                f"Memulai scraping untuk customer_number: {customer_number}, permintaan ke-{request_counts[customer_number]}, upaya ke-{attempt + 1}")
 
-            # Scrape data
-            data = await scraper.scrape_tagihan(customer_number, access_token, session)
+async def _scrape_customer_data(scraper, job, access_token, session, retry_policy, budget, defer_retries):
+    customer_number = job.customer_number
+    # Penanda ID untuk sampling/ringkasan log per customer_number
+    extra = {"customer_number": customer_number}
+    retry_policy = retry_policy or scraper.retry_policy
+    budget = budget or retry_policy.budget()
+    while True:
+        logging.info("Memulai scraping untuk customer_number: %s, upaya ke-%d", customer_number, budget.attempts + 1,
+                     extra=extra)
 
-            logging.info(f"Permintaan ke-{global_request_count[0]} untuk {customer_number} selesai.")
+        try:
+            data = await scraper.scrape_tagihan(customer_number, access_token, session, budget, job.source_file,
+                                                defer_retries=defer_retries)
+        except Exception as e:
+            logging.error("Exception scraping data untuk %s: %s", customer_number, e, extra=extra)
+            budget.consume()
+            data = {"message": str(e)}
 
-            # Cek apakah data valid
-            if data and 'customer_number' in data:
-                message = data.get('message', '').lower()
-                # Jika ada pesan error yang termasuk non-retryable
-                if any(error.lower() in message for error in non_retry_errors):
-                    logging.warning(
-                        f"Non-retryable error untuk {customer_number}: {data.get('message', 'Unknown error')}")
-                    return customer_number, data
-                else:
-                    # Data valid tanpa error non-retryable
-                    return customer_number, data
-            else:
-                # Data tidak valid, periksa apakah errornya retryable
-                if data and 'message' in data:
-                    message = data['message'].lower()
-                    if any(error.lower() in message for error in non_retry_errors):
-                        logging.warning(
-                            f"Non-retryable error untuk {customer_number}: {data.get('message', 'Unknown error')}")
-                        return customer_number, data
-                    else:
-                        logging.warning(
-                            f"Retryable error untuk {customer_number}: {
-                                data.get(
-                                    'message', 'Unknown error')}")
-                else:
-                    logging.warning(f"Gagal scraping data untuk {customer_number}: Data tidak valid.")
+        logging.info("Permintaan untuk %s selesai setelah %d upaya.", customer_number, budget.attempts, extra=extra)
 
-            # Jika mencapai sini, berarti ada error yang bisa dicoba ulang
-            attempt += 1
-            if attempt > max_retries:
-                logging.error(f"Max retries tercapai untuk {customer_number}. Menandai sebagai gagal.")
-                return customer_number, {"message": "Max retries exceeded."}
-            else:
-                logging.info(f"Mencoba ulang scraping untuk {customer_number} dalam {retry_delay} detik...")
-                await asyncio.sleep(retry_delay)
+        outcome = retry_policy.classify(data)
+        if outcome == OUTCOME_OK:
+            return InquiryResult.from_response(job, data)
+        if outcome == OUTCOME_FATAL:
+            logging.warning("Non-retryable error untuk %s: %s", customer_number, data.get('message', 'Unknown error'),
+                            extra=extra)
+            return InquiryResult.from_response(job, data)
 
-        except Exception as e:
-            logging.error(f"Exception scraping data untuk {customer_number}: {e}")
-            # Tentukan apakah exception ini retryable
-            # Misalnya, network errors biasanya retryable
-            if attempt < max_retries:
-                logging.info(
-                    f"Mencoba ulang scraping untuk {customer_number} dalam {retry_delay} detik karena exception.")
-                attempt += 1
-                await asyncio.sleep(retry_delay)
-            else:
-                logging.error(f"Max retries tercapai untuk {customer_number} karena exception.")
-                return customer_number, {"message": str(e)}
+        logging.warning("Retryable error untuk %s: %s", customer_number, data.get('message', 'Unknown error'),
+                        extra=extra)
+        if budget.exhausted:
+            logging.error("Max retries tercapai untuk %s. Menandai sebagai gagal.", customer_number, extra=extra)
+            # Penyebab dan status upaya terakhir ikut disimpan agar scheduler bisa membedakan jatah yang
+            # habis karena server kewalahan dari yang habis karena "Data kosong"
+            return InquiryResult(job, error=f"Max retries exceeded: {error_message_of(data)}",
+                                 status_code=data.get('status_code'))
+
+        if scraper.metrics is not None:
+            scraper.metrics.record_retry(job.source_file)
+        delay = retry_policy.backoff(budget.attempts)
+        if defer_retries:
+            logging.info("Menjadwalkan ulang %s ke antrean retry dalam %.1f detik.", customer_number, delay,
+                         extra=extra)
+            return RetryLater(budget, delay, data)
+        logging.info("Mencoba ulang scraping untuk %s dalam %.1f detik...", customer_number, delay, extra=extra)
+        await retry_policy.sleep(delay)
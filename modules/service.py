@@ -0,0 +1,216 @@
+# modules/service.py
+
+import asyncio
+import logging
+
+from .loader import normalize_idpel
+from .models import CustomerJob, InquiryResult
+from .scraper_handler import scrape_customer_data
+from .singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SERVICE_HOST = "127.0.0.1"
+DEFAULT_SERVICE_CONCURRENCY = 20
+# Batas jumlah ID per POST /inquiries; batch lebih besar sebaiknya lewat mode batch biasa
+MAX_BATCH_SIZE = 1000
+# Sumber "file" untuk hasil dari service (RPTAG tanpa tambahan per file sumber)
+SERVICE_SOURCE = ""
+
+
+def result_to_json(result):
+    """
+    Mengubah InquiryResult menjadi dict JSON respons service.
+
+    Parameters:
+        result (InquiryResult): Hasil inquiry satu pelanggan.
+
+    Returns:
+        dict: Field API ringkas ditambah total tagihan, atau `error` jika gagal.
+    """
+    if not result.ok:
+        return {"customer_number": result.customer_number, "ok": False, "error": result.error}
+    data = result.to_payload()
+    summary = result.summary
+    data.update({
+        "ok": True,
+        "lbr": summary.lbr,
+        "tagihan": summary.tagihan,
+        "denda": summary.denda,
+        "admin": summary.admin,
+        "total_tagihan": summary.total,
+    })
+    return data
+
+
+class InquiryService:
+    """
+    Server HTTP lokal untuk cek tagihan ad-hoc tanpa menjalankan batch penuh.
+
+    ClientSession (connection pool) dan access token dibuat sekali saat start dan dipakai semua
+    request; token diperbarui di background. Hasil yang masih berlaku di result_cache ScraperAPI
+    langsung dijawab tanpa request ke API dan tanpa menunggu slot `concurrency` (setiap hasil baru
+    langsung di-commit ke cache). Lookup bersamaan untuk ID yang sama digabung sebelum mengambil slot,
+    sehingga hanya lookup ke API yang dibatasi `concurrency`.
+
+    Endpoint:
+        GET /inquiry/{idpel}: satu hasil (JSON).
+        POST /inquiries: body `{"customer_numbers": [...]}` atau list ID; hasil sesuai urutan input.
+        GET /health: status token dan statistik cache.
+
+    Parameters:
+        scraper (ScraperAPI): Scraper dengan retry_policy, result_cache dan circuit_breaker yang dipakai.
+        port (int): Port lokal; 0 berarti port bebas (lihat atribut `port` setelah start).
+        host (str): Alamat bind; default hanya localhost.
+        concurrency (int): Jumlah lookup ke API yang berjalan bersamaan untuk semua request.
+        max_batch (int): Jumlah maksimal ID per POST /inquiries.
+        metrics_server (MetricsServer): Jika diberikan, /metrics dan /metrics.json ikut disajikan.
+    """
+
+    def __init__(self, scraper, port, host=DEFAULT_SERVICE_HOST, concurrency=DEFAULT_SERVICE_CONCURRENCY,
+                 max_batch=MAX_BATCH_SIZE, metrics_server=None):
+        self.scraper = scraper
+        self.port = port
+        self.host = host
+        self.concurrency = concurrency
+        self.max_batch = max_batch
+        self.metrics_server = metrics_server
+        self.lookups = 0
+        self._semaphore = None
+        # Lookup yang menunggu slot atau sedang berjalan, per customer_number
+        self._pending = SingleFlight()
+        self._session = None
+        self._runner = None
+
+    async def start(self):
+        """
+        Membuka session, mengambil access token lalu mulai menerima request.
+
+        Returns:
+            bool: False jika access token tidak didapat (server tidak dijalankan).
+        """
+        from aiohttp import web
+
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        cache = self.scraper.result_cache
+        if cache is not None:
+            # Service berjalan lama dan file cache dipakai bersama run batch: setiap hasil langsung
+            # di-commit agar lock SQLite tidak ditahan dan hasil tidak hilang jika proses dimatikan
+            cache.flush()
+            cache.commit_every = 1
+        self._session = self.scraper.create_session()
+        if not await self.scraper.get_access_token(self.scraper.token_url, self._session):
+            logger.error("Gagal mendapatkan access token. Service tidak dijalankan.")
+            await self._session.close()
+            self._session = None
+            return False
+        self.scraper.tokens.start_background_refresh(self._session)
+
+        self._runner = web.AppRunner(self.make_app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        # Port sebenarnya jika port 0 (bebas) diminta
+        self.port = self._runner.addresses[0][1]
+        logger.info(f"Service inquiry berjalan di http://{self.host}:{self.port}/inquiry/{{idpel}}")
+        return True
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        if self._session is not None:
+            await self.scraper.tokens.stop()
+            await self._session.close()
+            self._session = None
+            self.scraper.log_connection_stats()
+
+    def make_app(self):
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_get("/inquiry/{idpel}", self.get_inquiry)
+        app.router.add_post("/inquiries", self.post_inquiries)
+        app.router.add_get("/health", self.health)
+        if self.metrics_server is not None:
+            self.metrics_server.add_routes(app)
+        return app
+
+    async def lookup(self, customer_number):
+        """
+        Mengambil hasil satu IDPEL yang sudah valid (dari cache jika masih berlaku).
+
+        Returns:
+            dict: Hasil dalam format result_to_json.
+        """
+        self.lookups += 1
+        job = CustomerJob(customer_number, SERVICE_SOURCE)
+        result = self.cached_result(job)
+        if result is None:
+            result = await self._pending.do(customer_number, lambda: self._fetch(job))
+        return result_to_json(result)
+
+    def cached_result(self, job):
+        """
+        Returns:
+            InquiryResult: Hasil dari result_cache yang masih berlaku, atau None jika perlu request ke API.
+        """
+        cache = self.scraper.result_cache
+        if cache is None or self.scraper.force_refresh:
+            return None
+        # Cache hanya menyimpan hasil sukses dan error permanen, jadi bisa langsung dipakai. Miss tidak
+        # dihitung di sini karena scrape_tagihan memeriksa cache lagi setelah mendapat slot.
+        data = cache.get(job.customer_number, count_miss=False)
+        return InquiryResult.from_response(job, data) if data is not None else None
+
+    async def _fetch(self, job):
+        # Hanya jalur ke API yang memakai slot concurrency
+        async with self._semaphore:
+            return await scrape_customer_data(self.scraper, job, self.scraper.tokens.token, self._session)
+
+    async def get_inquiry(self, request):
+        from aiohttp import web
+
+        customer_number, reason = normalize_idpel(request.match_info["idpel"])
+        if reason:
+            return web.json_response({"error": reason}, status=400)
+        return web.json_response(await self.lookup(customer_number))
+
+    async def post_inquiries(self, request):
+        from aiohttp import web
+
+        try:
+            body = await request.json()
+        except ValueError:
+            return web.json_response({"error": "body bukan JSON"}, status=400)
+        values = body.get("customer_numbers") if isinstance(body, dict) else body
+        if not isinstance(values, list):
+            return web.json_response({"error": "customer_numbers harus berupa list"}, status=400)
+        if len(values) > self.max_batch:
+            return web.json_response({"error": f"maksimal {self.max_batch} ID per request"}, status=413)
+
+        customer_numbers = []
+        rejected = []
+        for value in values:
+            customer_number, reason = normalize_idpel(value)
+            if reason:
+                rejected.append({"value": value, "error": reason})
+            else:
+                customer_numbers.append(customer_number)
+        # ID yang berulang dalam satu batch (atau di request lain) digabung di lookup()
+        results = await asyncio.gather(*(self.lookup(customer_number) for customer_number in customer_numbers))
+        return web.json_response({"results": results, "rejected": rejected})
+
+    async def health(self, request):
+        from aiohttp import web
+
+        tokens = self.scraper.tokens
+        cache = self.scraper.result_cache
+        return web.json_response({
+            "token": bool(tokens.token) and not tokens.is_near_expiry(),
+            "token_expires_at": tokens.expires_at.isoformat() if tokens.expires_at else None,
+            "lookups": self.lookups,
+            "coalesced": self._pending.coalesced + self.scraper.inflight.coalesced,
+            "in_flight": len(self._pending),
+            "cache_hits": cache.hits if cache is not None else None,
+            "cache_misses": cache.misses if cache is not None else None,
+        })
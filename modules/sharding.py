@@ -0,0 +1,72 @@
+# modules/sharding.py
+
+import logging
+import os
+import zlib
+
+from .journal import RunJournal
+from .models import CustomerInfo, CustomerJob, InquiryResult
+
+logger = logging.getLogger(__name__)
+
+
+def shard_of(customer_number, shard_count):
+    """
+    Menentukan shard untuk customer_number. Memakai CRC32 (bukan hash() bawaan yang diacak per proses)
+    sehingga pembagian shard sama di setiap proses dan host.
+
+    Returns:
+        int: Index shard, 0 <= index < shard_count.
+    """
+    return zlib.crc32(str(customer_number).encode('utf-8')) % shard_count
+
+
+def select_shard(jobs, shard_index, shard_count):
+    """
+    Memilih job milik satu shard, urutan job tetap sama.
+    """
+    return [job for job in jobs if shard_of(job.customer_number, shard_count) == shard_index]
+
+
+def shard_path(journal_path, shard_index, shard_count):
+    """
+    Path journal parsial untuk satu shard, misalnya output/run_journal.shard-1-of-4.jsonl.
+    Index di nama file dimulai dari 1.
+    """
+    root, ext = os.path.splitext(journal_path)
+    return f"{root}.shard-{shard_index + 1}-of-{shard_count}{ext or '.jsonl'}"
+
+
+def merge_shards(paths, sinks):
+    """
+    Menggabungkan journal parsial dari beberapa shard dan meneruskan setiap hasil ke sink.
+
+    Untuk pasangan (customer_number, file sumber) yang sama, entri terakhir yang dipakai, sehingga
+    journal shard yang di-resume tidak menghasilkan baris ganda.
+
+    Parameters:
+        paths (list): Path journal parsial.
+        sinks (list): Objek dengan method `record(result)`, misalnya ReportCollector.
+
+    Returns:
+        int: Jumlah hasil yang digabung.
+    """
+    merged = {}
+    for path in paths:
+        if not os.path.exists(path):
+            logger.warning(f"Journal shard {path} tidak ditemukan, dilewati.")
+            continue
+        count = 0
+        for entry in RunJournal.entries(path):
+            merged[(entry["customer_number"], entry["source_file"])] = entry
+            count += 1
+        logger.info(f"Journal shard {path}: {count} entri dibaca.")
+
+    for entry in merged.values():
+        info = entry.get("info")
+        job = CustomerJob(entry["customer_number"], entry["source_file"], CustomerInfo(*info) if info else None)
+        result = InquiryResult.from_response(job, entry["data"])
+        for sink in sinks:
+            sink.record(result)
+    logger.info(f"{len(merged)} hasil digabung dari {len(paths)} journal shard.")
+    return len(merged)
@@ -0,0 +1,42 @@
+# modules/singleflight.py
+
+import asyncio
+
+
+class SingleFlight:
+    """
+    Menggabungkan pemanggilan bersamaan dengan key yang sama menjadi satu eksekusi.
+
+    Pemanggil pertama menjalankan coroutine; pemanggil lain dengan key yang sama selama coroutine
+    itu masih berjalan menunggu hasil yang sama. Pembatalan salah satu pemanggil tidak
+    membatalkan eksekusi bersama.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.coalesced = 0
+
+    def __len__(self):
+        return len(self._calls)
+
+    async def do(self, key, factory):
+        """
+        Parameters:
+            key (hashable): Key penggabungan, misalnya customer_number.
+            factory (callable): Fungsi tanpa argumen yang mengembalikan coroutine.
+
+        Returns:
+            Hasil coroutine (exception juga diteruskan ke semua pemanggil).
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            future = asyncio.ensure_future(factory())
+            self._calls[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(future)
+
+    def _forget(self, key, future):
+        if self._calls.get(key) is future:
+            del self._calls[key]
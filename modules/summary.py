@@ -0,0 +1,138 @@
+# modules/summary.py
+
+import importlib.util
+
+from .utils import get_bl_awal, get_month_name, get_rptag_addition
+
+SHEET_SUMMARY = "Ringkasan"
+
+SOURCE_HEADERS = ["Sumber File", "Sukses", "Gagal", "Tagihan", "Denda", "Biaya Admin", "Total Tagihan", "MarkUp",
+                  "RPTAG"]
+PERIOD_HEADERS = ["Periode", "Bulan", "Lembar", "Tagihan"]
+LBR_HEADERS = ["LBR", "BL Awal", "Pelanggan", "Tagihan", "RPTAG"]
+ERROR_HEADERS = ["Error", "Jumlah"]
+# Agregasi ringkasan memakai NumPy; paket ini opsional seperti pyarrow untuk Parquet
+SUMMARY_DEPENDENCY = "numpy"
+
+
+def summary_available():
+    """
+    Returns:
+        bool: True jika NumPy terpasang sehingga build_summary bisa dipakai.
+    """
+    return importlib.util.find_spec(SUMMARY_DEPENDENCY) is not None
+
+
+class SummaryTable:
+    """
+    Satu tabel ringkasan (judul, header dan baris) untuk sheet Ringkasan.
+    """
+
+    __slots__ = ("title", "headers", "rows")
+
+    def __init__(self, title, headers, rows):
+        self.title = title
+        self.headers = headers
+        self.rows = rows
+
+
+def _columns(success_data, failed_data):
+    """
+    Memuat hasil ke array kolom NumPy. Ini satu-satunya bagian yang menyentuh setiap record;
+    semua agregasi berikutnya berjalan di atas array.
+    """
+    import numpy as np
+
+    count = len(success_data)
+    columns = {
+        "source": np.array([result.source_file for result in success_data], dtype=str),
+        "tagihan": np.fromiter((result.summary.tagihan for result in success_data), dtype=np.int64, count=count),
+        "denda": np.fromiter((result.summary.denda or 0 for result in success_data), dtype=np.int64, count=count),
+        "admin": np.fromiter((result.summary.admin or 0 for result in success_data), dtype=np.int64, count=count),
+        "tambahan": np.fromiter((result.tambahan for result in success_data), dtype=np.int64, count=count),
+        "lbr": np.fromiter((result.summary.lbr for result in success_data), dtype=np.int64, count=count),
+        "failed_source": np.array([result.source_file for result in failed_data], dtype=str),
+        "error": np.array([result.error or "" for result in failed_data], dtype=str),
+    }
+    # Satu baris per lembar tagihan
+    columns["bill_period"] = np.array(
+        [bill.period or "" for result in success_data for bill in result.bills], dtype=str)
+    columns["bill_amount"] = np.fromiter(
+        (bill.amount or 0 for result in success_data for bill in result.bills), dtype=np.int64)
+    columns["bill_source"] = np.repeat(
+        columns["source"], np.fromiter((len(result.bills) for result in success_data), dtype=np.int64, count=count))
+    return columns
+
+
+def _group_sum(np, index, values, size):
+    # bincount menjumlahkan per grup dalam satu operasi; hasil float dibulatkan kembali ke int
+    return np.rint(np.bincount(index, weights=values, minlength=size)).astype(np.int64)
+
+
+def build_summary(success_data, failed_data):
+    """
+    Menghitung rekap per file sumber, per bill_period, per LBR dan per jenis error Gagal secara vektor (NumPy).
+
+    Parameters:
+        success_data (list): InquiryResult yang berhasil (dengan `tambahan` yang sudah diisi).
+        failed_data (list): InquiryResult yang gagal.
+
+    Returns:
+        list: SummaryTable "Per Sumber File", "Per Periode", "Tagihan per Sumber dan Periode",
+        "Per LBR" dan "Gagal per Jenis Error".
+    """
+    import numpy as np
+
+    columns = _columns(success_data, failed_data)
+    tables = []
+
+    # Per file sumber; RPTAG = tagihan + tambahan RPTAG file tersebut untuk setiap pelanggan
+    sources = np.union1d(np.unique(columns["source"]), np.unique(columns["failed_source"]))
+    size = len(sources)
+    source_index = np.searchsorted(sources, columns["source"])
+    customers = np.bincount(source_index, minlength=size)
+    failed = np.bincount(np.searchsorted(sources, columns["failed_source"]), minlength=size)
+    tagihan = _group_sum(np, source_index, columns["tagihan"], size)
+    denda = _group_sum(np, source_index, columns["denda"], size)
+    admin = _group_sum(np, source_index, columns["admin"], size)
+    markup = tagihan + _group_sum(np, source_index, columns["tambahan"], size)
+    additions = np.array([get_rptag_addition(source) for source in sources.tolist()], dtype=np.int64)
+    rptag = tagihan + customers * additions
+    table = np.column_stack([customers, failed, tagihan, denda, admin, tagihan + denda + admin, markup, rptag])
+    rows = [[source] + values for source, values in zip(sources.tolist(), table.tolist())]
+    rows.append(["TOTAL"] + table.sum(axis=0).tolist())
+    tables.append(SummaryTable("Per Sumber File", SOURCE_HEADERS, rows))
+
+    # Per bill_period (format YYYY-MM-DD, jadi urutan string = urutan waktu)
+    periods, period_index = np.unique(columns["bill_period"], return_inverse=True)
+    period_count = len(periods)
+    sheets = np.bincount(period_index, minlength=period_count)
+    period_tagihan = _group_sum(np, period_index, columns["bill_amount"], period_count)
+    tables.append(SummaryTable("Per Periode", PERIOD_HEADERS, [
+        [period, get_month_name(period) if period else "", int(count), int(amount)]
+        for period, count, amount in zip(periods.tolist(), sheets.tolist(), period_tagihan.tolist())]))
+
+    # Matriks tagihan sumber x periode dari satu bincount atas indeks gabungan
+    bill_source_index = np.searchsorted(sources, columns["bill_source"])
+    matrix = _group_sum(np, bill_source_index * period_count + period_index, columns["bill_amount"],
+                        size * period_count).reshape(size, period_count)
+    tables.append(SummaryTable("Tagihan per Sumber dan Periode", ["Sumber File"] + periods.tolist(), [
+        [source] + values for source, values in zip(sources.tolist(), matrix.tolist())]))
+
+    # Per LBR (jumlah lembar), dengan BL Awal sesuai konfigurasi
+    lbr_values, lbr_index = np.unique(columns["lbr"], return_inverse=True)
+    lbr_count = len(lbr_values)
+    lbr_customers = np.bincount(lbr_index, minlength=lbr_count)
+    lbr_tagihan = _group_sum(np, lbr_index, columns["tagihan"], lbr_count)
+    lbr_rptag = lbr_tagihan + _group_sum(np, lbr_index, additions[source_index], lbr_count)
+    tables.append(SummaryTable("Per LBR", LBR_HEADERS, [
+        [lbr, get_bl_awal(lbr), customers_, amount, rptag_]
+        for lbr, customers_, amount, rptag_ in zip(
+            lbr_values.tolist(), lbr_customers.tolist(), lbr_tagihan.tolist(), lbr_rptag.tolist())]))
+
+    # Gagal per jenis error, terbanyak lebih dulu
+    errors, error_counts = np.unique(columns["error"], return_counts=True)
+    order = np.argsort(-error_counts, kind="stable")
+    tables.append(SummaryTable("Gagal per Jenis Error", ERROR_HEADERS, [
+        [error, count] for error, count in zip(errors[order].tolist(), error_counts[order].tolist())]))
+    return tables
@@ -0,0 +1,183 @@
+# modules/token_manager.py
+
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
+# Jeda sebelum refresh background dicoba lagi setelah gagal; berlipat dua per kegagalan berturut-turut
+REFRESH_RETRY_DELAY = 30
+REFRESH_RETRY_MAX_DELAY = 600
+
+
+class TokenManager:
+    """
+    Menyimpan access token dan waktu kadaluarsanya di memori.
+
+    Refresh yang terjadi bersamaan digabung menjadi satu fetch di bawah asyncio.Lock, dan token
+    diperbarui di background sebelum kadaluarsa. File cache hanya dibaca sekali saat inisialisasi
+    dan ditulis sekali per refresh.
+
+    Parameters:
+        fetch (callable): Coroutine function `fetch(session)` yang mengambil token baru atau None.
+        cache_file (str): Path file cache token.
+        expiry (timedelta): Masa berlaku token.
+        refresh_margin (timedelta): Token diperbarui sejauh ini sebelum kadaluarsa.
+        clock (callable): Sumber waktu sekarang (datetime), bisa diganti saat testing.
+    """
+
+    def __init__(
+            self,
+            fetch,
+            cache_file='token_cache.json',
+            expiry=timedelta(hours=1),
+            refresh_margin=timedelta(minutes=5),
+            clock=datetime.now):
+        self._fetch = fetch
+        self.cache_file = cache_file
+        self.expiry = expiry
+        self.refresh_margin = refresh_margin
+        self._clock = clock
+        self._lock = None
+        self._refresh_task = None
+        self.token = None
+        self.issued_at = None
+        self.refresh_count = 0
+        self.refresh_failures = 0
+        self._load_cache()
+
+    @property
+    def lock(self):
+        # Dibuat saat pertama dipakai agar terikat ke event loop yang sedang berjalan
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    @property
+    def expires_at(self):
+        return self.issued_at + self.expiry if self.issued_at else None
+
+    def is_near_expiry(self, margin=None):
+        if not self.token:
+            return True
+        margin = self.refresh_margin if margin is None else margin
+        return self.expires_at - self._clock() < margin
+
+    def _load_cache(self):
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                cache_data = json.load(f)
+            issued_at = datetime.strptime(cache_data['timestamp'], TIMESTAMP_FORMAT)
+            if self._clock() - issued_at < self.expiry:
+                self.token = cache_data['access_token']
+                self.issued_at = issued_at
+                logger.info("Menggunakan token dari cache.")
+            else:
+                logger.warning("Token telah kadaluarsa.")
+        except Exception as e:
+            logger.error(f"Error saat memuat token dari cache: {e}")
+
+    def _save_cache(self):
+        try:
+            cache_data = {
+                'access_token': self.token,
+                'timestamp': self.issued_at.strftime(TIMESTAMP_FORMAT)
+            }
+            tmp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(cache_data, f)
+            os.replace(tmp_file, self.cache_file)
+            logger.info("Token berhasil disimpan ke cache.")
+        except Exception as e:
+            logger.error(f"Error saat menyimpan token ke cache: {e}")
+
+    def clear_cache(self):
+        self.token = None
+        self.issued_at = None
+        if os.path.exists(self.cache_file):
+            try:
+                os.remove(self.cache_file)
+                logger.info("Cache token dihapus.")
+            except Exception as e:
+                logger.error(f"Error menghapus cache: {e}")
+
+    async def get_token(self, session):
+        """
+        Mengembalikan token yang masih berlaku, memperbaruinya lebih dulu jika hampir kadaluarsa.
+        """
+        if not self.is_near_expiry():
+            return self.token
+        if self.token:
+            logger.info("Token hampir kadaluarsa. Memperbarui token...")
+        return await self.refresh(session, stale_token=self.token)
+
+    async def refresh(self, session, stale_token=None):
+        """
+        Memperbarui token sekali saja walaupun dipanggil oleh banyak coroutine bersamaan.
+
+        Parameters:
+            session (aiohttp.ClientSession): Session HTTP.
+            stale_token (str): Token yang dianggap tidak valid oleh pemanggil. Jika token saat ini
+                sudah berbeda (sudah diperbarui coroutine lain), token saat ini langsung dikembalikan.
+
+        Returns:
+            str: Access token baru, atau None jika gagal.
+        """
+        async with self.lock:
+            if self.token and self.token != stale_token and not self.is_near_expiry():
+                return self.token
+
+            token = await self._fetch(session)
+            if not token:
+                self.refresh_failures += 1
+                logger.error("Gagal memperbarui access token.")
+                return None
+            self.token = token
+            self.issued_at = self._clock()
+            self.refresh_count += 1
+            self.refresh_failures = 0
+            self._save_cache()
+            return self.token
+
+    def next_refresh_delay(self):
+        """
+        Menghitung jeda (detik) sampai refresh background berikutnya.
+
+        Setelah refresh gagal, token lama bisa masih terisi tetapi sudah dekat kadaluarsa; tanpa
+        backoff jeda menjadi negatif dan halaman token di-fetch setiap detik.
+
+        Returns:
+            float: Jeda sebelum refresh berikutnya.
+        """
+        if self.refresh_failures:
+            return min(REFRESH_RETRY_DELAY * 2 ** (self.refresh_failures - 1), REFRESH_RETRY_MAX_DELAY)
+        if not self.token:
+            return REFRESH_RETRY_DELAY
+        wait = (self.expires_at - self.refresh_margin - self._clock()).total_seconds()
+        return max(wait, 1)
+
+    async def _refresh_loop(self, session):
+        while True:
+            await asyncio.sleep(self.next_refresh_delay())
+            if self.is_near_expiry():
+                logger.info("Memperbarui token di background sebelum kadaluarsa.")
+                await self.refresh(session, stale_token=self.token)
+
+    def start_background_refresh(self, session):
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop(session))
+
+    async def stop(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
@@ -1,6 +1,5 @@
 # modules/utils.py
 
-import os
 import logging
 from datetime import datetime
 
@@ -24,21 +23,6 @@ RPTAG_ADDITIONS = {
 }
 
 
-def setup_logging():
-    log_dir = os.path.join(os.getcwd(), 'logs')
-    os.makedirs(log_dir, exist_ok=True)
-    log_file = os.path.join(log_dir, 'scraper.log')
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file),
-            logging.StreamHandler()
-        ]
-    )
-    logging.info("Logging telah dikonfigurasi dengan benar.")
-
-
 def get_month_name(date_str):
     try:
         date_obj = datetime.strptime(date_str, "%Y-%m-%d")
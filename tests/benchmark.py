@@ -0,0 +1,219 @@
+# tests/benchmark.py
+"""
+Benchmark throughput end-to-end: pipeline main.py (scheduler, retry, token, journal, Excel)
+dijalankan terhadap mock_server.py dengan customer_number sintetis.
+
+    python tests/benchmark.py --sizes 1000,10000,100000 --latency lognormal:0.05:0.5
+
+Setiap ukuran dijalankan di proses baru agar peak RSS tidak terbawa dari ukuran sebelumnya;
+mock server berjalan di proses terpisah lagi sehingga tidak ikut dihitung.
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+import traceback
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+logger = logging.getLogger("benchmark")
+
+DEFAULT_MOCK_OPTIONS = {
+    "latency": "lognormal:0.02:0.5",
+    "empty_rate": 0.01,
+    "unexpected_rate": 0.02,
+    "invalid_token_rate": 0.0005,
+    "unregistered_rate": 0.05,
+    "seed": 1,
+}
+# Batas tunggu base URL dari proses mock server
+SERVER_START_TIMEOUT = 30
+# Interval pengecekan apakah proses anak masih hidup selama menunggu hasil
+POLL_INTERVAL = 0.5
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux melaporkan KB, macOS melaporkan byte
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run_benchmark(size, base_url, extra_args=()):
+    from main import parse_args, scrape_jobs, write_report
+    from modules.models import CustomerJob
+    from modules.pipeline import ReportCollector
+    from modules.scraper_api import ScraperAPI
+
+    latencies = []
+    stats = {}
+
+    class BenchmarkScraperAPI(ScraperAPI):
+        # Latency per ID (termasuk retry) dan statistik koneksi untuk laporan benchmark
+        async def scrape_tagihan(self, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await super().scrape_tagihan(*args, **kwargs)
+            finally:
+                latencies.append(time.perf_counter() - started)
+
+        def log_connection_stats(self):
+            stats.update(self.connection_stats)
+            super().log_connection_stats()
+
+    args = parse_args(["--base-url", base_url, "--api-url", base_url, "--no-cache", "--retry-delay", "0.05",
+                       "--journal", os.path.join("output", "bench_journal.jsonl")] + list(extra_args))
+    jobs = [CustomerJob(str(522600000000 + i), "bench.txt") for i in range(size)]
+    collector = ReportCollector()
+
+    started = time.perf_counter()
+    await scrape_jobs(args, jobs, args.journal, [collector], scraper_class=BenchmarkScraperAPI)
+    scrape_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    write_report(collector, os.path.join("output", "bench.xlsx"))
+    excel_seconds = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "size": size,
+        "success": len(collector.success_data),
+        "failed": len(collector.failed_data),
+        "requests": stats.get("requests", 0),
+        "scrape_seconds": scrape_seconds,
+        "excel_seconds": excel_seconds,
+        "requests_per_second": stats.get("requests", 0) / scrape_seconds if scrape_seconds else 0.0,
+        "ids_per_second": size / scrape_seconds if scrape_seconds else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _benchmark_process(size, base_url, extra_args, conn):
+    logging.basicConfig(level=logging.ERROR)
+    # Token cache, journal dan output benchmark ditulis ke folder sementara
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            result = asyncio.run(run_benchmark(size, base_url, extra_args))
+        except BaseException:
+            # Traceback dikirim ke proses induk agar kegagalan terlihat di laporan pytest
+            conn.send({"error": traceback.format_exc()})
+            raise
+        conn.send(result)
+
+
+def _receive(conn, process, timeout=None):
+    """
+    Menunggu satu pesan dari proses anak tanpa bisa menggantung selamanya.
+
+    Parameters:
+        conn (Connection): Ujung pipe milik proses induk.
+        process (Process): Proses anak yang mengirim pesan.
+        timeout (float): Batas tunggu total dalam detik; None berarti selama proses masih hidup.
+
+    Returns:
+        object: Pesan dari proses anak.
+
+    Raises:
+        RuntimeError: Jika proses anak mati, mengirim traceback, atau timeout terlewati.
+    """
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    while not conn.poll(POLL_INTERVAL):
+        if not process.is_alive():
+            # Pesan terakhir mungkin tiba tepat sebelum proses selesai
+            if conn.poll(0):
+                break
+            process.join()
+            raise RuntimeError(f"Proses {process.name} berhenti tanpa hasil (exit code {process.exitcode})")
+        if deadline is not None and time.monotonic() > deadline:
+            raise RuntimeError(f"Proses {process.name} tidak mengirim hasil dalam {timeout} detik")
+    try:
+        message = conn.recv()
+    except EOFError:
+        process.join()
+        raise RuntimeError(f"Proses {process.name} berhenti tanpa hasil (exit code {process.exitcode})") from None
+    if isinstance(message, dict) and "error" in message:
+        process.join()
+        raise RuntimeError(f"Proses {process.name} gagal (exit code {process.exitcode}):\n{message['error']}")
+    return message
+
+
+def measure(size, mock_options=None, extra_args=()):
+    """
+    Menjalankan satu ukuran benchmark: mock server dan pipeline masing-masing di proses baru.
+
+    Hasil juga dicatat ke logger "benchmark" (INFO), misalnya untuk `pytest --log-cli-level=INFO`.
+
+    Returns:
+        dict: Hasil benchmark (requests/sec, p50/p99 latency per ID, peak RSS, dll.).
+    """
+    from mock_server import serve_forever
+
+    context = multiprocessing.get_context("spawn")
+    options = dict(DEFAULT_MOCK_OPTIONS, **(mock_options or {}))
+    server_conn, server_child = context.Pipe()
+    server = context.Process(target=serve_forever, args=(options, server_child), daemon=True)
+    server.start()
+    # Ujung pipe anak ditutup di proses induk agar recv() melihat EOF jika proses anak mati
+    server_child.close()
+    try:
+        base_url = _receive(server_conn, server, SERVER_START_TIMEOUT)
+        result_conn, result_child = context.Pipe()
+        worker = context.Process(target=_benchmark_process, args=(size, base_url, list(extra_args), result_child))
+        worker.start()
+        result_child.close()
+        try:
+            result = _receive(result_conn, worker)
+        finally:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+        logger.info(format_result(result))
+        return result
+    finally:
+        server.terminate()
+        server.join()
+
+
+def format_result(result):
+    rss = f"{result['peak_rss_mb']:.0f} MB" if result["peak_rss_mb"] is not None else "n/a"
+    return (f"{result['size']:>7} ID | {result['requests']:>7} req | {result['requests_per_second']:>8.1f} req/s | "
+            f"p50 {result['p50_ms']:>7.1f} ms | p99 {result['p99_ms']:>7.1f} ms | "
+            f"Excel {result['excel_seconds']:>6.2f} s | RSS {rss} | "
+            f"sukses {result['success']} / gagal {result['failed']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pipeline scraper terhadap mock server lokal.")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Jumlah ID sintetis, dipisah koma.")
+    parser.add_argument("--latency", default=DEFAULT_MOCK_OPTIONS["latency"])
+    parser.add_argument("--unexpected-rate", type=float, default=DEFAULT_MOCK_OPTIONS["unexpected_rate"])
+    args, extra_args = parser.parse_known_args(argv)
+    mock_options = {"latency": args.latency, "unexpected_rate": args.unexpected_rate}
+    # Opsi lain diteruskan ke main.py, misalnya --max-concurrency 100
+    for size in (int(size) for size in args.sizes.split(",")):
+        print(format_result(measure(size, mock_options, extra_args)), flush=True)
+
+
+if __name__ == "__main__":
+    main()
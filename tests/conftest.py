@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Pastikan `modules` bisa diimpor saat pytest dijalankan dari mana saja
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,194 @@
+# tests/mock_server.py
+"""
+Server pengganti Bukalapak (aiohttp) untuk benchmark dan testing end-to-end tanpa menyentuh API asli.
+
+Menjalankan server secara manual:
+
+    python tests/mock_server.py --port 8765 --latency lognormal:0.2:0.5 --unexpected-rate 0.02
+    python main.py --files "*.xlsx" --base-url http://127.0.0.1:8765/ --api-url http://127.0.0.1:8765/
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import zlib
+
+from aiohttp import web
+
+TOKEN_PATH = "/listrik-pln/tagihan-listrik"
+INQUIRY_PATH = "/electricities/postpaid-inquiries"
+
+UNEXPECTED_ERROR = "Unexpected error"
+INVALID_TOKEN_ERROR = "Invalid Oauth Token"
+UNREGISTERED_ERROR = "Nomor tidak terdaftar. Coba periksa lagi, yuk."
+
+
+def parse_latency(spec, rng=random):
+    """
+    Mengubah spesifikasi latency menjadi fungsi tanpa argumen yang mengembalikan delay (detik).
+
+    Format: "fixed:0.05", "uniform:0.01:0.1", "exp:0.05" (rata-rata),
+    atau "lognormal:0.05:0.5" (median dan sigma).
+    """
+    kind, _, params = spec.partition(":")
+    values = [float(value) for value in params.split(":") if value]
+    if kind == "fixed":
+        return lambda: values[0] if values else 0.0
+    if kind == "uniform":
+        return lambda: rng.uniform(values[0], values[1])
+    if kind == "exp":
+        return lambda: rng.expovariate(1 / values[0])
+    if kind == "lognormal":
+        return lambda: rng.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"Distribusi latency tidak dikenal: {spec}")
+
+
+def synthetic_bills(customer_number):
+    seed = zlib.crc32(customer_number.encode("utf-8"))
+    months = 1 + seed % 3
+    periods = ["2024-12-01", "2024-11-01", "2024-10-01"][:months]
+    return [{"bill_period": period, "amount": 50000 + (seed >> index) % 200000} for index, period in enumerate(periods)]
+
+
+class MockBukalapak:
+    """
+    Stand-in untuk halaman token dan endpoint postpaid-inquiries.
+
+    Error disuntikkan dengan peluang per request, kecuali "tidak terdaftar" yang tetap untuk
+    customer_number yang sama (sama seperti API asli).
+
+    Parameters:
+        latency (str): Spesifikasi distribusi latency inquiry (lihat parse_latency).
+        empty_rate (float): Peluang respons 200 dengan `data` kosong.
+        unexpected_rate (float): Peluang respons 500 "Unexpected error".
+        invalid_token_rate (float): Peluang token saat ini dianggap kedaluwarsa ("Invalid Oauth Token").
+        unregistered_rate (float): Porsi customer_number yang "tidak terdaftar".
+        seed (int): Seed random agar hasil bisa diulang.
+    """
+
+    def __init__(self, latency="fixed:0", empty_rate=0.0, unexpected_rate=0.0, invalid_token_rate=0.0,
+                 unregistered_rate=0.0, seed=None):
+        self.rng = random.Random(seed)
+        self.latency = parse_latency(latency, self.rng)
+        self.empty_rate = empty_rate
+        self.unexpected_rate = unexpected_rate
+        self.invalid_token_rate = invalid_token_rate
+        self.unregistered_rate = unregistered_rate
+        self.tokens_issued = 0
+        self.valid_tokens = set()
+        self.stats = {"token_requests": 0, "inquiries": 0, "empty": 0, "unexpected": 0,
+                      "invalid_token": 0, "unregistered": 0}
+
+    def is_unregistered(self, customer_number):
+        return zlib.crc32(customer_number.encode("utf-8")) % 10000 < self.unregistered_rate * 10000
+
+    def make_app(self):
+        app = web.Application()
+        app.router.add_get(TOKEN_PATH, self.token_page)
+        app.router.add_post(INQUIRY_PATH, self.inquiry)
+        return app
+
+    async def token_page(self, request):
+        self.stats["token_requests"] += 1
+        self.tokens_issued += 1
+        token = f"mock-token-{self.tokens_issued}"
+        self.valid_tokens.add(token)
+        bl_token = json.dumps({"access_token": token})
+        return web.Response(text=f"<script>localStorage.setItem('bl_token', '{bl_token}');</script>",
+                            content_type="text/html")
+
+    async def inquiry(self, request):
+        self.stats["inquiries"] += 1
+        body = await request.json()
+        customer_number = str(body.get("customer_number", ""))
+        delay = self.latency()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        token = request.query.get("access_token")
+        if token in self.valid_tokens and self.rng.random() < self.invalid_token_rate:
+            # Token dianggap kedaluwarsa; klien harus meminta halaman token lagi
+            self.valid_tokens.discard(token)
+        if token not in self.valid_tokens:
+            self.stats["invalid_token"] += 1
+            return self._error(401, INVALID_TOKEN_ERROR)
+        if self.rng.random() < self.unexpected_rate:
+            self.stats["unexpected"] += 1
+            return self._error(500, UNEXPECTED_ERROR)
+        if self.is_unregistered(customer_number):
+            self.stats["unregistered"] += 1
+            return self._error(422, UNREGISTERED_ERROR)
+        if self.rng.random() < self.empty_rate:
+            self.stats["empty"] += 1
+            return web.json_response({"data": {}})
+        return web.json_response({"data": {
+            "customer_number": customer_number,
+            "customer_name": f"PELANGGAN {customer_number[-4:]}",
+            "segmentation": "R1",
+            "penalty_fee": 3000,
+            "admin_charge": 2500,
+            "bills": synthetic_bills(customer_number),
+        }})
+
+    @staticmethod
+    def _error(status, message):
+        return web.json_response({"errors": [{"message": message}]}, status=status)
+
+
+async def start_mock_server(server, host="127.0.0.1", port=0):
+    """
+    Menjalankan MockBukalapak di event loop yang sedang berjalan.
+
+    Returns:
+        tuple: (web.AppRunner, base_url). Panggil `await runner.cleanup()` untuk berhenti.
+    """
+    runner = web.AppRunner(server.make_app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{port}/"
+
+
+def serve_forever(options, conn=None, host="127.0.0.1", port=0):
+    """
+    Menjalankan server sampai proses dihentikan. Base URL dikirim lewat `conn` (multiprocessing Pipe)
+    agar benchmark bisa menjalankan server di proses terpisah.
+    """
+    async def run():
+        runner, base_url = await start_mock_server(MockBukalapak(**options), host, port)
+        if conn is not None:
+            conn.send(base_url)
+        else:
+            print(f"Mock Bukalapak berjalan di {base_url}", flush=True)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Server pengganti Bukalapak untuk benchmark lokal.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="fixed:0")
+    parser.add_argument("--empty-rate", type=float, default=0.0)
+    parser.add_argument("--unexpected-rate", type=float, default=0.0)
+    parser.add_argument("--invalid-token-rate", type=float, default=0.0)
+    parser.add_argument("--unregistered-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+    options = {key: getattr(args, key) for key in (
+        "latency", "empty_rate", "unexpected_rate", "invalid_token_rate", "unregistered_rate", "seed")}
+    serve_forever(options, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import os
+
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("openpyxl")
+
+import benchmark  # noqa: E402
+
+# Ukuran lain (misalnya "1000,10000,100000") bisa dijalankan lewat PLN_BENCHMARK_SIZES
+SIZES = [int(size) for size in os.environ.get("PLN_BENCHMARK_SIZES", "1000").split(",")]
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_pipeline_throughput_against_mock_server(size):
+    result = benchmark.measure(size)
+    summary = benchmark.format_result(result)
+
+    assert result["success"] + result["failed"] == size, summary
+    # Sekitar 5% ID "tidak terdaftar" dan tidak di-retry
+    assert 0 < result["failed"] < size * 0.2, summary
+    assert result["requests"] >= size, summary
+    assert result["requests_per_second"] > 0, summary
+
+
+def test_receive_fails_instead_of_hanging_when_child_dies():
+    context = benchmark.multiprocessing.get_context("spawn")
+    conn, child = context.Pipe()
+    process = context.Process(target=os._exit, args=(3,))
+    process.start()
+    child.close()
+
+    with pytest.raises(RuntimeError, match="exit code 3"):
+        benchmark._receive(conn, process, timeout=30)
@@ -0,0 +1,16 @@
+from modules.models import CustomerJob, InquiryResult
+
+
+def test_summary_precomputes_totals_once():
+    data = {
+        "customer_number": "1",
+        "bills": [{"bill_period": "2024-11-01", "amount": 100}, {"bill_period": "2024-12-01", "amount": 50}],
+        "penalty_fee": 3, "admin_charge": 2,
+    }
+    result = InquiryResult.from_response(CustomerJob("1", "IDPel/JAB.xlsx"), data)
+    summary = result.summary
+    assert summary.by_period == {"2024-11-01": 100, "2024-12-01": 50}
+    assert (summary.lbr, summary.tagihan, summary.denda, summary.admin, summary.total) == (2, 150, 3, 2, 155)
+    assert summary.rptag == 150 + 5000
+    result.tambahan = 7
+    assert result.markup == 157
@@ -0,0 +1,91 @@
+import asyncio
+
+from modules.circuit_breaker import (
+    CircuitBreaker, STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN, is_endpoint_failure,
+)
+
+
+def test_is_endpoint_failure():
+    assert is_endpoint_failure({"message": "Error: Unexpected error", "status_code": 500})
+    assert is_endpoint_failure({"message": "Error: Cannot connect to host"})
+    assert is_endpoint_failure(None)
+    assert not is_endpoint_failure({"message": "Error: Nomor tidak terdaftar.", "status_code": 422})
+    assert not is_endpoint_failure({"status": False, "message": "Data kosong"})
+    assert not is_endpoint_failure({"customer_number": "1"})
+
+
+def test_opens_on_consecutive_failures_and_error_rate():
+    breaker = CircuitBreaker(consecutive_failures=3, window=100)
+    for _ in range(2):
+        breaker.record(True)
+    breaker.record(False)
+    breaker.record(True)
+    assert breaker.state == STATE_CLOSED
+    breaker.record(True)
+    breaker.record(True)
+    assert breaker.state == STATE_OPEN
+
+    breaker = CircuitBreaker(consecutive_failures=100, error_rate=0.5, window=4)
+    for failed in (True, False, True, False):
+        breaker.record(failed)
+    assert breaker.state == STATE_OPEN
+
+
+def test_pauses_then_probes_and_closes():
+    breaker = CircuitBreaker(consecutive_failures=1, open_seconds=0.02, half_open_probes=2)
+    breaker.record(True)
+
+    async def scenario():
+        first = asyncio.ensure_future(breaker.acquire())
+        await asyncio.sleep(0)
+        # Masih dalam jeda: request ditahan
+        assert not first.done()
+        await asyncio.wait_for(first, 1)
+        assert breaker.state == STATE_HALF_OPEN
+
+        await breaker.acquire()
+        third = asyncio.ensure_future(breaker.acquire())
+        await asyncio.sleep(0.05)
+        # Jatah probe habis: request lain menunggu hasil probe
+        assert not third.done()
+
+        breaker.record(False)
+        breaker.record(False)
+        await asyncio.wait_for(third, 1)
+        assert breaker.state == STATE_CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_failed_probe_reopens_with_longer_pause():
+    now = [0.0]
+    breaker = CircuitBreaker(consecutive_failures=1, open_seconds=5, max_open_seconds=8, clock=lambda: now[0])
+    breaker.record(True)
+    now[0] = 5.0
+    asyncio.run(breaker.acquire())
+    assert breaker.state == STATE_HALF_OPEN
+
+    breaker.record(True)
+    assert breaker.state == STATE_OPEN
+    assert breaker.opened == 2
+    assert breaker._cooldown == 8
+
+
+def test_results_from_before_half_open_are_not_probe_results():
+    now = [0.0]
+    breaker = CircuitBreaker(consecutive_failures=1, open_seconds=5, half_open_probes=1, clock=lambda: now[0])
+    # Dikirim saat breaker masih tertutup, selesai setelah breaker half-open
+    stale_success = asyncio.run(breaker.acquire())
+    stale_failure = asyncio.run(breaker.acquire())
+    breaker.record(True)
+    now[0] = 5.0
+    probe = asyncio.run(breaker.acquire())
+    assert breaker.state == STATE_HALF_OPEN
+
+    breaker.record(False, stale_success)
+    breaker.record(True, stale_failure)
+    assert breaker.state == STATE_HALF_OPEN
+    assert breaker._cooldown == 5
+
+    breaker.record(False, probe)
+    assert breaker.state == STATE_CLOSED
@@ -0,0 +1,35 @@
+import json
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from modules.cli import parse_args, resolve_input_files  # noqa: E402
+
+
+def test_defaults_keep_interactive_mode():
+    args = parse_args([])
+    assert args.files is None
+    assert args.cache is True
+    assert args.resume is False
+
+
+def test_config_file_is_overridden_by_flags(tmp_path):
+    config = tmp_path / "run.json"
+    config.write_text(json.dumps({"max_attempts": 7, "timeout": 15, "files": ["a.txt"]}))
+
+    args = parse_args(["--config", str(config), "--max-attempts", "2", "--no-cache"])
+
+    assert args.max_attempts == 2
+    assert args.timeout == 15
+    assert args.files == ["a.txt"]
+    assert args.cache is False
+
+
+def test_resolve_input_files_globs_relative_to_input_dir(tmp_path):
+    for name in ("JA1.xlsx", "JA2.txt", "JA3.csv", "KB.txt"):
+        (tmp_path / name).write_text("")
+
+    paths = resolve_input_files(["JA*", "KB.txt", "JA1.xlsx"], str(tmp_path))
+
+    assert [p.rsplit("/", 1)[-1] for p in paths] == ["JA1.xlsx", "JA2.txt", "KB.txt"]
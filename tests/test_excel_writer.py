@@ -0,0 +1,44 @@
+import pytest
+
+openpyxl = pytest.importorskip("openpyxl")
+
+from modules import excel_writer  # noqa: E402
+from modules.excel_writer import create_excel  # noqa: E402
+from modules.models import CustomerInfo, CustomerJob, InquiryResult  # noqa: E402
+from modules.summary import summary_available  # noqa: E402
+
+
+def test_create_excel_streams_same_layout(tmp_path):
+    job = CustomerJob("522600000001", "JAB.xlsx", CustomerInfo(no_rbm="RBM1", daya=900.0))
+    success = [InquiryResult.from_response(job, {
+        "customer_number": "522600000001", "customer_name": "A", "segmentation": "R1",
+        "penalty_fee": 3000, "admin_charge": 2500,
+        "bills": [{"bill_period": "2024-11-01", "amount": 100000}, {"bill_period": "2024-12-01", "amount": 50000}],
+    })]
+    failed = [InquiryResult(CustomerJob("522600000002", "JAB.xlsx"), error="Tidak terdaftar")]
+    path = tmp_path / "out.xlsx"
+
+    create_excel(success, failed, ["2024-11-01", "2024-12-01"], str(path))
+
+    wb = openpyxl.load_workbook(path)
+    assert wb.sheetnames == ["Sukses", "Gagal", "TUL"] + (["Ringkasan"] if summary_available() else [])
+    sukses = wb["Sukses"]
+    assert [c.value for c in sukses[2]] == [
+        "522600000001", "A", "R1 / 900", 2, 100000, 50000, 150000, 3000, 2500, 155500, 0, 150000, "JAB.xlsx"]
+    assert sukses["A1"].font.b and sukses["A1"].alignment.horizontal == "center"
+    assert sukses["E2"].number_format == "#,##0"
+    assert sukses.column_dimensions["A"].width == 20
+    assert wb["Gagal"].column_dimensions["A"].width == 30
+    tul = wb["TUL"]
+    assert [c.value for c in tul[2]][2:14] == [
+        "RBM1", None, None, None, None, None, 900, "NOV-2024", "DES-2024", "(2", 155000, 3000]
+
+
+def test_create_excel_skips_summary_without_numpy(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(excel_writer, "summary_available", lambda: False)
+    path = tmp_path / "out.xlsx"
+
+    create_excel([], [InquiryResult(CustomerJob("1", "a.txt"), error="x")], [], str(path))
+
+    assert "Ringkasan" not in openpyxl.load_workbook(path).sheetnames
+    assert "pip install numpy" in caplog.text
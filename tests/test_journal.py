@@ -0,0 +1,55 @@
+from modules.journal import RunJournal
+from modules.models import CustomerJob, InquiryResult
+
+
+def make_result(customer_number, data, source_file):
+    return InquiryResult.from_response(CustomerJob(customer_number, source_file), data)
+
+
+def test_replay_skips_torn_line_and_keeps_latest(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = RunJournal(path)
+    journal.record(make_result("1", {"message": "Error: Unexpected error"}, "JAB.xlsx"))
+    journal.record(make_result("2", {"customer_number": "2", "bills": []}, "JAK.xlsx"))
+    journal.record(make_result("1", {"customer_number": "1", "bills": []}, "JAB.xlsx"))
+    journal.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"customer_number": "3", "da')
+
+    entries = RunJournal.replay(path)
+
+    assert set(entries) == {"1", "2"}
+    assert entries["1"]["data"]["customer_number"] == "1"
+    assert entries["2"]["source_file"] == "JAK.xlsx"
+
+
+def test_resume_appends_and_fresh_run_truncates(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = RunJournal(path)
+    journal.record(make_result("1", {"customer_number": "1"}, "a.txt"))
+    journal.close()
+
+    journal = RunJournal(path, resume=True)
+    journal.record(make_result("2", {"customer_number": "2"}, "a.txt"))
+    journal.close()
+    assert set(RunJournal.replay(path)) == {"1", "2"}
+
+    RunJournal(path).close()
+    assert RunJournal.replay(path) == {}
+
+
+def test_resume_drops_torn_trailing_line(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = RunJournal(path)
+    journal.record(make_result("1", {"customer_number": "1"}, "a.txt"))
+    journal.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"customer_number": "3", "da')
+
+    journal = RunJournal(path, resume=True)
+    journal.record(make_result("2", {"customer_number": "2"}, "a.txt"))
+    journal.close()
+
+    assert set(RunJournal.replay(path)) == {"1", "2"}
+    with open(path, encoding="utf-8") as f:
+        assert len(f.read().splitlines()) == 2
@@ -0,0 +1,101 @@
+import os
+import shutil
+import zipfile
+
+import pytest
+
+from modules import loader
+from modules.master_cache import CustomerMasterCache
+
+IDPEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "IDPel")
+
+
+def test_xlsx_parsed_once_then_served_from_sidecar(tmp_path, monkeypatch):
+    pytest.importorskip("openpyxl")
+    source = tmp_path / "JAB.xlsx"
+    shutil.copy(os.path.join(IDPEL_DIR, "JAB.xlsx"), source)
+    cache = CustomerMasterCache(str(tmp_path / "master.sqlite"))
+    monkeypatch.setattr(loader, "_parsed_workbooks", {})
+
+    parsed = loader.load_customer_numbers_xlsx(str(source), master_cache=cache)
+    assert parsed["522602045621"].no_rbm == "FNAJABA001"
+    assert loader.load_customer_numbers_xlsx(str(source), master_cache=cache) is parsed
+
+    def fail(path):
+        raise AssertionError("workbook should not be parsed again")
+
+    monkeypatch.setattr(loader, "_parsed_workbooks", {})
+    monkeypatch.setattr(loader, "_parse_customer_xlsx", fail)
+    assert loader.load_customer_numbers_xlsx(str(source), master_cache=cache) == parsed
+
+
+def test_sidecar_invalidated_when_content_changes(tmp_path):
+    source = tmp_path / "ids.xlsx"
+    source.write_bytes(b"one")
+    cache = CustomerMasterCache(str(tmp_path / "master.sqlite"))
+    cache.put(str(source), {"1": {}})
+
+    os.utime(source, ns=(1, 1))
+    assert cache.get(str(source)) == {"1": {}}
+
+    source.write_bytes(b"two")
+    assert cache.get(str(source)) is None
+
+
+def test_txt_loader_streams_valid_ids_and_reports_rejects(tmp_path):
+    source = tmp_path / "ids.txt"
+    lines = ["\ufeff522600000001\r", "# komentar", "", "  522600000002  ", "5226 00000003", "52260000000X",
+             "52260000001", "522600000001", ""]
+    source.write_bytes("\n".join(lines).encode("utf-8"))
+    rejects = []
+
+    jobs = loader.load_customer_numbers([str(source)], rejects)
+
+    assert [job.customer_number for job in jobs] == ["522600000001", "522600000002"]
+    assert [(reject.line_number, reject.reason) for reject in rejects] == [
+        (5, loader.REJECT_INNER_SPACE), (6, loader.REJECT_NOT_DIGITS), (7, loader.REJECT_LENGTH)]
+
+    report = loader.write_rejects_report(rejects, str(tmp_path / "rejects.csv"))
+    with open(report, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert lines[0] == "Sumber File,Baris,Isi,Alasan"
+    assert lines[1] == "ids.txt,5,5226 00000003,spasi di dalam ID"
+    assert loader.write_rejects_report([], str(tmp_path / "none.csv")) is None
+
+
+def test_normalize_idpel_accepts_numeric_cells():
+    assert loader.normalize_idpel(522600000001.0) == ("522600000001", None)
+    assert loader.normalize_idpel(None) == (None, loader.REJECT_EMPTY)
+
+
+def test_txt_loader_skips_bom_and_indented_comments(tmp_path):
+    source = tmp_path / "ids.txt"
+    source.write_bytes("\ufeff# daftar IDPEL\n  # komentar\n\t#lagi\n522600000001\n".encode("utf-8"))
+    rejects = []
+
+    assert list(loader.iter_txt_customer_numbers(str(source), rejects)) == ["522600000001"]
+    assert rejects == []
+
+
+def test_xlsx_numeric_idpel_cells_are_normalized(tmp_path, monkeypatch):
+    openpyxl = pytest.importorskip("openpyxl")
+    monkeypatch.setattr(loader, "_parsed_workbooks", {})
+    source = tmp_path / "angka.xlsx"
+    wb = openpyxl.Workbook()
+    wb.active.append(["IDPEL", "NO RBM", "NAMA GARDU", "NAMA PELANGGAN", "ALAMAT", "GOL", "TRF", "DAYA"])
+    for idpel in (522600663342, 522600663343, "12AB"):
+        wb.active.append([idpel, "RBM", "G", "N", "A", "R", "R1", 900])
+    wb.save(tmp_path / "int.xlsx")
+    # Excel menyimpan IDPEL yang diketik sebagai angka dalam notasi ilmiah; openpyxl membacanya sebagai float
+    with zipfile.ZipFile(tmp_path / "int.xlsx") as original, zipfile.ZipFile(source, "w") as patched:
+        for item in original.infolist():
+            data = original.read(item.filename)
+            if item.filename == "xl/worksheets/sheet1.xml":
+                data = data.replace(b"<v>522600663342</v>", b"<v>5.22600663342E+11</v>")
+            patched.writestr(item, data)
+    rejects = []
+
+    jobs = list(loader.iter_customer_jobs([str(source)], rejects))
+
+    assert [job.customer_number for job in jobs] == ["522600663342", "522600663343"]
+    assert [(reject.content, reject.reason) for reject in rejects] == [("12AB", loader.REJECT_NOT_DIGITS)]
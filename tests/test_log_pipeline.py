@@ -0,0 +1,42 @@
+import json
+import logging
+
+from modules.log_pipeline import JsonLinesFormatter, PerIdFilter, LOG_MODE_SAMPLE, LOG_MODE_SUMMARY
+
+
+def make_record(level, msg, args, customer_number=None):
+    record = logging.LogRecord("root", level, __file__, 1, msg, args, None)
+    if customer_number is not None:
+        record.customer_number = customer_number
+    return record
+
+
+def test_sample_mode_keeps_whole_ids_and_all_warnings():
+    id_filter = PerIdFilter(LOG_MODE_SAMPLE, sample_rate=0.1)
+    ids = [str(522600000000 + i) for i in range(1000)]
+
+    kept = {i for i in ids if id_filter.filter(make_record(logging.INFO, "Mulai %s", (i,), i))}
+
+    assert 50 < len(kept) < 150
+    assert all(id_filter.filter(make_record(logging.INFO, "Selesai %s", (i,), i)) for i in kept)
+    assert id_filter.filter(make_record(logging.WARNING, "Error %s", (ids[0],), ids[0]))
+    assert id_filter.filter(make_record(logging.INFO, "Log run biasa", ()))
+
+
+def test_summary_mode_counts_templates_without_formatting():
+    id_filter = PerIdFilter(LOG_MODE_SUMMARY)
+    for i in range(3):
+        assert not id_filter.filter(make_record(logging.INFO, "Mulai %s", (str(i),), str(i)))
+    assert not id_filter.filter(make_record(logging.WARNING, "Non-retryable %s", ("1",), "1"))
+    assert id_filter.filter(make_record(logging.ERROR, "Max retries %s", ("1",), "1"))
+
+    assert id_filter.summary_lines() == ["3x [INFO] Mulai %s", "1x [WARNING] Non-retryable %s"]
+
+
+def test_json_lines_formatter():
+    line = JsonLinesFormatter().format(make_record(logging.WARNING, "Error untuk %s: %s", ("1", "timeout"), "1"))
+
+    entry = json.loads(line)
+    assert entry["level"] == "WARNING"
+    assert entry["message"] == "Error untuk 1: timeout"
+    assert entry["customer_number"] == "1"
@@ -0,0 +1,45 @@
+import json
+
+from modules.metrics import RunMetrics, error_class
+from modules.models import CustomerJob, InquiryResult
+
+
+def test_error_class():
+    assert error_class("Error: Invalid Oauth Token") == "invalid_token"
+    assert error_class("Error: Nomor tidak terdaftar. Coba periksa lagi, yuk.") == "unregistered"
+    assert error_class("Data kosong") == "empty_data"
+    assert error_class("Error: something odd") == "other"
+
+
+def test_summary_and_prometheus_per_source(tmp_path):
+    now = [0.0]
+    metrics = RunMetrics(buckets=(0.1, 1.0), clock=lambda: now[0])
+    now[0] = 10.0
+    metrics.record_request("JAB.xlsx", 0.05, 200, bytes_sent=40, bytes_received=300)
+    metrics.record_request("JAB.xlsx", 0.5, 500, error="Error: Unexpected error", bytes_sent=40, bytes_received=60)
+    metrics.record_retry("JAB.xlsx")
+    metrics.record_request("a.txt", 2.0, None, error="Error: Connection timeout")
+    metrics.record_token_refresh()
+    metrics.record(InquiryResult.from_response(CustomerJob("1", "JAB.xlsx"), {"customer_number": "1"}))
+    metrics.record(InquiryResult(CustomerJob("2", "a.txt"), error="Max retries exceeded."))
+
+    summary = metrics.summary()
+    assert summary["requests_per_second"] == 0.3
+    assert summary["token_refreshes"] == 1
+    assert summary["total"]["statuses"] == {"200": 1, "500": 1, "exception": 1}
+    assert summary["total"]["latency_seconds"]["buckets"] == {"0.1": 1, "1.0": 2, "+Inf": 3}
+    jab = summary["sources"]["JAB.xlsx"]
+    assert jab["errors"] == {"unexpected_error": 1}
+    assert (jab["retries"], jab["bytes_sent"], jab["bytes_received"]) == (1, 80, 360)
+    assert summary["sources"]["a.txt"]["results"] == {"ok": 0, "failed": 1}
+
+    text = metrics.to_prometheus()
+    assert "# TYPE pln_request_duration_seconds histogram" in text
+    assert 'pln_request_duration_seconds_bucket{source="JAB.xlsx",le="1.0"} 2' in text
+    assert 'pln_errors_total{source="a.txt",class="timeout"} 1' in text
+    assert "pln_token_refreshes_total 1" in text
+
+    json_path, prom_path = tmp_path / "m.json", tmp_path / "m.prom"
+    metrics.write(str(json_path), str(prom_path))
+    assert json.loads(json_path.read_text())["total"]["requests"] == 3
+    assert prom_path.read_text() == text
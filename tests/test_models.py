@@ -0,0 +1,47 @@
+import pickle
+
+from modules.models import CustomerInfo, CustomerJob, EMPTY_INFO, InquiryResult
+
+
+def test_job_interns_source_file_name():
+    first = CustomerJob("1", "/data/IDPel/" + "JAB.xlsx")
+    second = CustomerJob("2", "/other/" + "".join(["JAB", ".xlsx"]))
+    assert first.source_file == "JAB.xlsx"
+    assert first.source_file is second.source_file
+
+
+def test_result_keeps_only_report_fields_and_round_trips():
+    job = CustomerJob("1", "JAB.xlsx", CustomerInfo(daya=900))
+    data = {"customer_number": "1", "customer_name": "A", "segmentation": "R1", "penalty_fee": 3,
+            "admin_charge": 2, "extra": "x" * 100,
+            "bills": [{"bill_period": "2024-12-01", "amount": 10, "meter": "y"}]}
+    result = InquiryResult.from_response(job, data)
+
+    assert result.ok and result.info.daya == 900
+    payload = result.to_payload()
+    assert "extra" not in payload and payload["bills"] == [{"bill_period": "2024-12-01", "amount": 10}]
+    assert InquiryResult.from_response(job, payload).to_payload() == payload
+
+
+def test_failed_result_strips_error_prefix():
+    result = InquiryResult.from_response(CustomerJob("1", "a.txt"), {"message": "Error: Tidak terdaftar"})
+    assert not result.ok
+    assert result.error == "Tidak terdaftar"
+    assert result.info is EMPTY_INFO
+
+
+def test_customer_info_is_picklable():
+    info = pickle.loads(pickle.dumps(CustomerInfo(no_rbm="RBM1", daya=450)))
+    assert info.as_row() == ["RBM1", "", "", "", "", "", 450]
+
+
+def test_failed_result_keeps_status_code_for_congestion():
+    from modules.scheduler import is_congestion_result
+
+    job = CustomerJob("1", "a.txt")
+    result = InquiryResult.from_response(job, {"status": False, "message": "Error: Bad Gateway", "status_code": 502})
+    assert result.status_code == 502
+    assert is_congestion_result(result)
+    assert is_congestion_result(result.for_job(CustomerJob("1", "b.txt")))
+    assert InquiryResult.from_response(job, result.to_payload()).status_code == 502
+    assert not is_congestion_result(InquiryResult.from_response(job, {"message": "Error: Tidak terdaftar"}))
@@ -0,0 +1,105 @@
+import csv
+import json
+
+import pytest
+
+from modules.models import CustomerInfo, CustomerJob, InquiryResult
+from modules.output_writers import (
+    WRITERS, ReportWriter, sheet_output_path, source_output_paths, write_outputs, write_outputs_by_source,
+)
+
+
+def _results():
+    job = CustomerJob("522600000001", "JAB.xlsx", CustomerInfo(no_rbm="RBM1", daya=900.0))
+    success = [InquiryResult.from_response(job, {
+        "customer_number": "522600000001", "customer_name": "A", "segmentation": "R1",
+        "penalty_fee": 3000, "admin_charge": 2500,
+        "bills": [{"bill_period": "2024-11-01", "amount": 100000}, {"bill_period": "2024-12-01", "amount": 50000}],
+    })]
+    failed = [InquiryResult(CustomerJob("522600000002", "JAB.xlsx"), error="Tidak terdaftar")]
+    return success, failed, ["2024-11-01", "2024-12-01"]
+
+
+def test_csv_and_jsonl_have_same_records_as_workbook(tmp_path):
+    output = str(tmp_path / "run.xlsx")
+    paths = write_outputs(["csv", "jsonl"], *_results(), output)
+
+    assert sheet_output_path(output, "Sukses", "csv") == str(tmp_path / "run_Sukses.csv")
+    assert len(paths) == 6
+    with open(tmp_path / "run_Sukses.csv", encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0][4:6] == ["2024-11-01", "2024-12-01"]
+    assert rows[1] == ["522600000001", "A", "R1 / 900", "2", "100000", "50000", "150000", "3000", "2500", "155500",
+                       "0", "150000", "JAB.xlsx"]
+
+    with open(tmp_path / "run_TUL.jsonl", encoding="utf-8") as f:
+        tul = [json.loads(line) for line in f]
+    assert tul[0]["IDPEL"] == "522600000001"
+    assert (tul[0]["BL Awal"], tul[0]["BL Akhir"], tul[0]["LBR"]) == ("NOV-2024", "DES-2024", "(2")
+    # RPTAG = tagihan + tambahan JAB.xlsx
+    assert (tul[0]["RPTAG"], tul[0]["RPBK"]) == (155000, 3000)
+
+    with open(tmp_path / "run_Gagal.jsonl", encoding="utf-8") as f:
+        assert json.loads(f.readline()) == {"ID Pelanggan": "522600000002", "Error": "Tidak terdaftar",
+                                            "Sumber File": "JAB.xlsx"}
+
+
+def test_parquet_writer(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    output = str(tmp_path / "run.xlsx")
+    write_outputs(["parquet"], *_results(), output)
+
+    table = pq.read_table(str(tmp_path / "run_Sukses.parquet"))
+    assert table.column("Total Tagihan").to_pylist() == [155500]
+    assert table.column("ID Pelanggan").to_pylist() == ["522600000001"]
+
+
+def test_split_by_source_writes_one_report_per_file(tmp_path):
+    success, failed, _ = _results()
+    dalbo = CustomerJob("522600000003", "Dalbo.xlsx")
+    success.append(InquiryResult.from_response(dalbo, {
+        "customer_number": "522600000003", "bills": [{"bill_period": "2024-10-01", "amount": 20000}]}))
+    output = str(tmp_path / "run.xlsx")
+
+    written = write_outputs_by_source(["csv"], success, failed, output, max_workers=2)
+
+    assert sorted(written) == ["Dalbo.xlsx", "JAB.xlsx"]
+    assert str(tmp_path / "run_Dalbo_TUL.csv") in written["Dalbo.xlsx"]
+    # Gagal hanya ada untuk JAB.xlsx
+    assert not (tmp_path / "run_Dalbo_Gagal.csv").exists()
+    with open(tmp_path / "run_Dalbo_Sukses.csv", encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    # Kolom bulan hanya periode milik file tersebut
+    assert rows[0][4:5] == ["2024-10-01"] and rows[0][5] == "Tagihan"
+    with open(tmp_path / "run_Dalbo_TUL.csv", encoding="utf-8", newline="") as f:
+        tul = list(csv.reader(f))
+    # RPTAG memakai tambahan Dalbo.xlsx (10000)
+    assert tul[1][12] == "30000"
+
+
+def test_source_paths_stay_unique_when_names_differ_only_by_extension(tmp_path):
+    output = str(tmp_path / "run.xlsx")
+    assert source_output_paths(output, ["JAB.txt", "JAB.xlsx", "Dalbo.xlsx", ""]) == {
+        "JAB.txt": str(tmp_path / "run_JAB_txt.xlsx"),
+        "JAB.xlsx": str(tmp_path / "run_JAB_xlsx.xlsx"),
+        "Dalbo.xlsx": str(tmp_path / "run_Dalbo.xlsx"),
+        "": str(tmp_path / "run_tanpa_sumber.xlsx"),
+    }
+
+    success, failed, _ = _results()
+    txt = CustomerJob("522600000003", "JAB.txt")
+    success.append(InquiryResult.from_response(txt, {
+        "customer_number": "522600000003", "bills": [{"bill_period": "2024-10-01", "amount": 20000}]}))
+    written = write_outputs_by_source(["csv"], success, failed, output, max_workers=1)
+    assert set(written["JAB.txt"]).isdisjoint(written["JAB.xlsx"])
+    with open(tmp_path / "run_JAB_txt_Sukses.csv", encoding="utf-8", newline="") as f:
+        assert list(csv.reader(f))[1][0] == "522600000003"
+
+
+def test_every_writer_implements_its_interface():
+    # Tidak ada writer konkret dengan method abstrak yang tersisa (misalnya write_records di Excel)
+    for writer_class in WRITERS.values():
+        writer_class()
+    assert not hasattr(WRITERS["xlsx"], "write_records")
+    with pytest.raises(TypeError):
+        ReportWriter()
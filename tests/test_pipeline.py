@@ -0,0 +1,76 @@
+import asyncio
+
+from modules.models import CustomerJob, InquiryResult
+from modules.pipeline import ReportCollector, dedupe_jobs, run_pipeline
+from modules.scheduler import AdaptiveScheduler
+from modules.singleflight import SingleFlight
+
+
+def test_pipeline_forwards_results_to_every_sink():
+    collector = ReportCollector({"a.txt": 5})
+    seen = []
+
+    class ListSink:
+        def record(self, result):
+            seen.append((result.customer_number, result.source_file))
+
+    async def worker(job):
+        if job.customer_number == "2":
+            return InquiryResult.from_response(job, {"message": "Error: Tidak terdaftar"})
+        if job.customer_number == "3":
+            raise RuntimeError("boom")
+        return InquiryResult.from_response(job, {"customer_number": job.customer_number,
+                                                 "bills": [{"bill_period": "2024-11-01", "amount": 5}]})
+
+    jobs = [CustomerJob("1", "a.txt"), CustomerJob("2", "b.txt"), CustomerJob("3", "b.txt")]
+    processed = asyncio.run(run_pipeline(AdaptiveScheduler(), jobs, worker, [ListSink(), collector]))
+
+    assert processed == 3
+    assert sorted(seen) == [("1", "a.txt"), ("2", "b.txt"), ("3", "b.txt")]
+    assert [r.customer_number for r in collector.success_data] == ["1"]
+    assert collector.success_data[0].markup == 10
+    assert [(r.customer_number, r.error) for r in collector.failed_data] == [("2", "Tidak terdaftar"), ("3", "boom")]
+    assert collector.periods == ["2024-11-01"]
+
+
+def test_duplicate_ids_are_scraped_once_and_fanned_out_per_source():
+    calls = []
+
+    async def worker(job):
+        calls.append(job.customer_number)
+        return InquiryResult.from_response(job, {"customer_number": job.customer_number,
+                                                 "bills": [{"bill_period": "2024-11-01", "amount": 100}]})
+
+    jobs = [CustomerJob("1", "JAB.xlsx"), CustomerJob("2", "JAB.xlsx"), CustomerJob("1", "JAK.xlsx")]
+    unique, sources = dedupe_jobs(iter(jobs))
+    # Hanya ID yang ada di beberapa file yang punya daftar sumber
+    assert list(sources) == ["1"]
+    collector = ReportCollector()
+    asyncio.run(run_pipeline(AdaptiveScheduler(), unique, worker, [collector], sources))
+
+    assert sorted(calls) == ["1", "2"]
+    rows = sorted((r.customer_number, r.source_file, r.summary.rptag) for r in collector.success_data)
+    # RPTAG dihitung ulang dengan tambahan milik masing-masing file sumber
+    assert rows == [("1", "JAB.xlsx", 5100), ("1", "JAK.xlsx", 4100), ("2", "JAB.xlsx", 5100)]
+
+
+def test_single_flight_shares_one_in_flight_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def lookup(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return key.upper()
+
+    async def run():
+        results = await asyncio.gather(*(flight.do("a", lambda: lookup("a")) for _ in range(5)))
+        again = await flight.do("a", lambda: lookup("a"))
+        return results, again
+
+    results, again = asyncio.run(run())
+
+    assert results == ["A"] * 5 and again == "A"
+    assert calls == ["a", "a"]
+    assert flight.coalesced == 4
+    assert len(flight) == 0
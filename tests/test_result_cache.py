@@ -0,0 +1,78 @@
+import asyncio
+import sqlite3
+import time
+from datetime import timedelta
+
+import pytest
+
+from modules.result_cache import (
+    ResultCache, classify_outcome, OUTCOME_NOT_FOUND, OUTCOME_SUCCESS, OUTCOME_UNREGISTERED,
+)
+
+
+def test_classify_outcome():
+    assert classify_outcome({"customer_number": "1"}) == OUTCOME_SUCCESS
+    assert classify_outcome({"message": "Error: Tagihan tidak ditemukan atau sudah dibayar."}) == OUTCOME_NOT_FOUND
+    assert classify_outcome({"message": "Error: Nomor tidak terdaftar. Coba periksa lagi, yuk."}) == OUTCOME_UNREGISTERED
+    assert classify_outcome({"message": "Error: Unexpected error"}) is None
+
+
+def test_per_outcome_ttl(tmp_path):
+    now = [1000.0]
+    cache = ResultCache(
+        path=str(tmp_path / "cache.sqlite"),
+        success_ttl=timedelta(seconds=10),
+        unregistered_ttl=timedelta(seconds=100),
+        clock=lambda: now[0])
+
+    assert cache.put("1", {"customer_number": "1", "bills": []})
+    assert cache.put("2", {"message": "Error: Tidak terdaftar"})
+    assert not cache.put("3", {"message": "Error: Unexpected error"})
+
+    now[0] += 50
+    assert cache.get("1") is None
+    assert cache.get("2") == {"message": "Error: Tidak terdaftar"}
+    assert cache.get("3") is None
+    cache.close()
+
+    reopened = ResultCache(path=str(tmp_path / "cache.sqlite"), clock=lambda: now[0])
+    assert reopened.get("2") is not None
+    reopened.close()
+
+
+def test_shared_cache_commits_every_put(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    # Dua shard menulis ke file yang sama; lock tidak ditahan di antara put
+    first = ResultCache(path, commit_every=1)
+    second = ResultCache(path, commit_every=1)
+    started = time.monotonic()
+    for index in range(5):
+        assert first.put(f"a{index}", {"customer_number": f"a{index}"})
+        assert second.put(f"b{index}", {"customer_number": f"b{index}"})
+    assert time.monotonic() - started < 1
+    assert first.get("b4") == {"customer_number": "b4"}
+    assert second.get("a4") == {"customer_number": "a4"}
+    first.close()
+    second.close()
+
+
+def test_cache_failure_keeps_api_result(tmp_path, monkeypatch):
+    pytest.importorskip("aiohttp")
+    from modules.scraper_api import ScraperAPI
+
+    monkeypatch.chdir(tmp_path)
+    data = {"customer_number": "522600000001", "bills": []}
+
+    class LockedCache:
+        def get(self, customer_number):
+            return None
+
+        def put(self, customer_number, value):
+            raise sqlite3.OperationalError("database is locked")
+
+    class FakeScraperAPI(ScraperAPI):
+        async def _post_inquiry(self, customer_number, access_token, session, source_file=""):
+            return data
+
+    scraper = FakeScraperAPI(result_cache=LockedCache())
+    assert asyncio.run(scraper.scrape_tagihan("522600000001", "token", None)) == data
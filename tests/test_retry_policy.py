@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from modules.models import CustomerJob
+from modules.retry_policy import RetryLater, RetryPolicy, OUTCOME_FATAL, OUTCOME_OK, OUTCOME_RETRY, OUTCOME_TOKEN
+from modules.scraper_handler import scrape_customer_data
+from modules.singleflight import SingleFlight
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    async def sleep(self, delay):
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+class FakeScraper:
+    def __init__(self, policy, responses):
+        self.retry_policy = policy
+        self.metrics = None
+        self.inflight = SingleFlight()
+        self.responses = list(responses)
+        self.calls = 0
+
+    async def scrape_tagihan(self, customer_number, access_token, session, budget, source_file="", defer_retries=False):
+        budget.consume()
+        self.calls += 1
+        return self.responses.pop(0)
+
+
+def test_classify():
+    policy = RetryPolicy()
+    assert policy.classify({"customer_number": "1"}) == OUTCOME_OK
+    assert policy.classify({"message": "Error: Nomor tidak terdaftar. Coba periksa lagi, yuk."}) == OUTCOME_FATAL
+    assert policy.classify({"message": "Error: Invalid Oauth Token"}) == OUTCOME_TOKEN
+    assert policy.classify({"message": "Error: Unexpected error"}) == OUTCOME_RETRY
+    assert policy.classify(None) == OUTCOME_RETRY
+
+
+def test_backoff_is_exponential_and_capped():
+    policy = RetryPolicy(base_delay=1, max_delay=5, multiplier=2, jitter=0)
+    assert [policy.backoff(n) for n in range(1, 6)] == [1, 2, 4, 5, 5]
+
+
+def test_handler_shares_budget_and_uses_fake_clock():
+    clock = FakeClock()
+    policy = RetryPolicy(max_attempts=3, base_delay=1, jitter=0, sleep=clock.sleep)
+    scraper = FakeScraper(policy, [{"message": "Error: Unexpected error"}] * 5)
+
+    result = asyncio.run(scrape_customer_data(scraper, CustomerJob("1", "a.txt"), "token", None))
+
+    assert result.customer_number == "1"
+    assert result.error == "Max retries exceeded: Unexpected error"
+    assert scraper.calls == 3
+    assert clock.sleeps == [1, 2]
+
+
+def test_handler_stops_on_non_retryable_error():
+    clock = FakeClock()
+    policy = RetryPolicy(sleep=clock.sleep)
+    scraper = FakeScraper(policy, [{"message": "Error: Tagihan tidak ditemukan atau sudah dibayar."}])
+
+    result = asyncio.run(scrape_customer_data(scraper, CustomerJob("1", "a.txt"), "token", None))
+
+    assert "sudah dibayar" in result.error
+    assert scraper.calls == 1
+    assert clock.sleeps == []
+
+
+def test_handler_defers_retries_instead_of_sleeping():
+    clock = FakeClock()
+    policy = RetryPolicy(max_attempts=2, base_delay=1, jitter=0, sleep=clock.sleep)
+    scraper = FakeScraper(policy, [{"message": "Error: Unexpected error"}] * 2)
+    job = CustomerJob("1", "a.txt")
+
+    first = asyncio.run(scrape_customer_data(scraper, job, "token", None, defer_retries=True))
+    assert isinstance(first, RetryLater)
+    assert first.delay == 1
+    assert clock.sleeps == []
+
+    # Percobaan berikutnya memakai jatah yang sama, sehingga berhenti setelah max_attempts
+    second = asyncio.run(scrape_customer_data(scraper, job, "token", None, budget=first.budget, defer_retries=True))
+    assert second.error == "Max retries exceeded: Unexpected error"
+    assert scraper.calls == 2
+
+
+def test_scrape_tagihan_retries_without_blocking():
+    pytest.importorskip("aiohttp")
+    from modules.scraper_api import ScraperAPI
+
+    clock = FakeClock()
+    scraper = ScraperAPI(retry_policy=RetryPolicy(max_attempts=3, jitter=0, sleep=clock.sleep))
+    responses = [{"status": False, "message": "Data kosong"}, {"customer_number": "1", "bills": []}]
+
+    async def fake_post(customer_number, access_token, session, source_file=""):
+        return responses.pop(0)
+
+    scraper._post_inquiry = fake_post
+    data = asyncio.run(scraper.scrape_tagihan("1", "token", None))
+
+    assert data["customer_number"] == "1"
+    assert clock.sleeps == [1.0]
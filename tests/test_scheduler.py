@@ -0,0 +1,101 @@
+import asyncio
+
+from modules.retry_policy import RetryLater, retry_delay_of
+from modules.scheduler import AdaptiveScheduler, is_congestion_result
+
+
+def test_run_respects_concurrency_limit():
+    scheduler = AdaptiveScheduler(initial_concurrency=3, max_concurrency=3)
+    peak = [0]
+
+    async def worker(item):
+        peak[0] = max(peak[0], scheduler.in_flight)
+        await asyncio.sleep(0)
+        return item, {"customer_number": item}
+
+    results = asyncio.run(scheduler.run(range(20), worker))
+
+    assert sorted(item for item, _ in results) == list(range(20))
+    assert peak[0] <= 3
+    assert scheduler.stats["done"] == 20
+    assert scheduler.stats["queued"] == 0
+    assert scheduler.stats["in_flight"] == 0
+
+
+def test_limit_backs_off_on_congestion_and_grows_when_healthy():
+    scheduler = AdaptiveScheduler(initial_concurrency=8, max_concurrency=16)
+    scheduler._observe(0.1, congested=True)
+    assert scheduler.limit == 4
+
+    for _ in range(4):
+        scheduler._observe(0.1, congested=False)
+    assert scheduler.limit == 5
+
+
+def test_worker_exception_is_returned_not_raised():
+    scheduler = AdaptiveScheduler(initial_concurrency=2)
+
+    async def worker(item):
+        raise RuntimeError("boom")
+
+    results = asyncio.run(scheduler.run(["1"], worker))
+    assert isinstance(results[0][1], RuntimeError)
+
+
+def test_retries_wait_in_queue_without_holding_a_slot():
+    scheduler = AdaptiveScheduler(initial_concurrency=1, max_concurrency=1)
+    calls = []
+
+    async def worker(item):
+        calls.append(item)
+        await asyncio.sleep(0)
+        # Percobaan pertama "a" gagal dan harus diulang setelah 0.05 detik
+        return "retry" if calls.count(item) == 1 and item == "a" else "ok"
+
+    def retry_delay(result):
+        return 0.05 if result == "retry" else None
+
+    results = asyncio.run(scheduler.run(["a", "b", "c"], worker, retry_delay))
+
+    # Dengan satu slot, "b" dan "c" jalan selama "a" menunggu; retry tidak dihasilkan ke pemanggil
+    assert calls == ["a", "b", "c", "a"]
+    assert results == [("b", "ok"), ("c", "ok"), ("a", "ok")]
+    assert scheduler.stats["retrying"] == 0
+    assert scheduler.stats["done"] == 3
+
+
+def test_deferred_429_retries_shrink_concurrency():
+    scheduler = AdaptiveScheduler(initial_concurrency=8, max_concurrency=40)
+    attempts = {}
+    limits = []
+
+    async def worker(item):
+        limits.append(scheduler.limit)
+        attempts[item] = attempts.get(item, 0) + 1
+        await asyncio.sleep(0.01)
+        # Dua percobaan pertama setiap ID ditolak 429 dan ditunda ke antrean retry
+        if attempts[item] <= 2:
+            return RetryLater(None, 0.001, {"status": False, "message": "Error: Too Many Requests", "status_code": 429})
+        return "ok"
+
+    results = asyncio.run(scheduler.run(range(60), worker, retry_delay_of))
+
+    assert len(results) == 60
+    assert scheduler.stats["congested"] == 120
+    assert min(limits) < 8
+
+
+def test_is_congestion_result():
+    assert is_congestion_result(("1", {"message": "Error: Unexpected error", "status_code": 400}))
+    assert is_congestion_result(("1", {"message": "Error: x", "status_code": 503}))
+    assert not is_congestion_result(("1", {"message": "Error: Tidak terdaftar", "status_code": 422}))
+    assert not is_congestion_result(("1", {"customer_number": "1"}))
+
+
+def test_exhausted_retries_are_congestion_only_when_last_attempt_was():
+    from modules.models import CustomerJob, InquiryResult
+
+    job = CustomerJob("1", "a.txt")
+    assert is_congestion_result(InquiryResult(job, error="Max retries exceeded: Unexpected error", status_code=400))
+    assert is_congestion_result(InquiryResult(job, error="Max retries exceeded: Bad Gateway", status_code=502))
+    assert not is_congestion_result(InquiryResult(job, error="Max retries exceeded: Data kosong"))
@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from mock_server import MockBukalapak, start_mock_server  # noqa: E402
+from modules.scraper_api import ScraperAPI  # noqa: E402
+
+
+def test_session_applies_pool_settings_and_counts_reused_connections(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def scenario():
+        runner, base_url = await start_mock_server(MockBukalapak(seed=1))
+        scraper = ScraperAPI(request_timeout=7, connect_timeout=3, read_timeout=4, connection_limit=5,
+                             connection_limit_per_host=2, base_url=base_url, api_url=base_url)
+        try:
+            async with scraper.create_session() as session:
+                assert (session.timeout.total, session.timeout.sock_connect, session.timeout.sock_read) == (7, 3, 4)
+                assert (session.connector.limit, session.connector.limit_per_host) == (5, 2)
+
+                token = await scraper.get_access_token(scraper.token_url, session)
+                for index in range(3):
+                    data = await scraper.scrape_tagihan(f"52260000000{index}", token, session)
+                    assert data["customer_number"] == f"52260000000{index}"
+        finally:
+            await runner.cleanup()
+        return scraper.connection_stats
+
+    stats = asyncio.run(scenario())
+    # Halaman token dan tiga inquiry berurutan memakai satu koneksi keep-alive
+    assert stats == {"requests": 4, "new_connections": 1, "reused_connections": 3}
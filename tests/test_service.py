@@ -0,0 +1,135 @@
+import asyncio
+import time
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+
+from mock_server import MockBukalapak, UNREGISTERED_ERROR, start_mock_server  # noqa: E402
+from modules.loader import REJECT_NOT_DIGITS  # noqa: E402
+from modules.result_cache import ResultCache  # noqa: E402
+from modules.retry_policy import RetryPolicy  # noqa: E402
+from modules.scraper_api import ScraperAPI  # noqa: E402
+from modules.service import InquiryService  # noqa: E402
+
+
+def test_service_answers_from_cache_and_coalesces_lookups(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    mock = MockBukalapak(latency="fixed:0.05", unregistered_rate=0.5, seed=1)
+    registered = next(str(522600000000 + i) for i in range(100) if not mock.is_unregistered(str(522600000000 + i)))
+    unregistered = next(str(522600000000 + i) for i in range(100) if mock.is_unregistered(str(522600000000 + i)))
+
+    async def scenario():
+        runner, base_url = await start_mock_server(mock)
+        cache = ResultCache(str(tmp_path / "cache.sqlite"))
+        scraper = ScraperAPI(retry_policy=RetryPolicy(base_delay=0), result_cache=cache,
+                             base_url=base_url, api_url=base_url)
+        service = InquiryService(scraper, 0)
+        try:
+            assert await service.start()
+            url = f"http://127.0.0.1:{service.port}"
+            async with aiohttp.ClientSession() as client:
+                # Lima lookup bersamaan untuk ID yang sama hanya mengirim satu inquiry
+                responses = await asyncio.gather(*(client.get(f"{url}/inquiry/{registered}") for _ in range(5)))
+                bodies = [await response.json() for response in responses]
+                assert mock.stats["inquiries"] == 1
+                assert all(body == bodies[0] for body in bodies)
+                assert bodies[0]["ok"] and bodies[0]["customer_number"] == registered
+                assert bodies[0]["total_tagihan"] == bodies[0]["tagihan"] + 3000 + 2500
+
+                # Sekarang dari result cache, tanpa request ke API
+                async with client.get(f"{url}/inquiry/{registered}") as response:
+                    assert (await response.json()) == bodies[0]
+                assert mock.stats["inquiries"] == 1
+
+                async with client.post(f"{url}/inquiries",
+                                       json={"customer_numbers": [registered, unregistered, "12AB"]}) as response:
+                    batch = await response.json()
+                assert [result["customer_number"] for result in batch["results"]] == [registered, unregistered]
+                assert batch["results"][1] == {"customer_number": unregistered, "ok": False,
+                                               "error": UNREGISTERED_ERROR}
+                assert batch["rejected"] == [{"value": "12AB", "error": REJECT_NOT_DIGITS}]
+
+                async with client.get(f"{url}/inquiry/5226") as response:
+                    assert response.status == 400
+                async with client.get(f"{url}/health") as response:
+                    health = await response.json()
+                assert health["token"] and health["coalesced"] == 4 and health["cache_hits"] == 2
+        finally:
+            await service.stop()
+            cache.close()
+            await runner.cleanup()
+
+    asyncio.run(scenario())
+
+
+def test_service_commits_each_result_for_other_cache_writers(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = str(tmp_path / "cache.sqlite")
+
+    async def scenario():
+        runner, base_url = await start_mock_server(MockBukalapak(seed=1))
+        cache = ResultCache(path)
+        scraper = ScraperAPI(retry_policy=RetryPolicy(base_delay=0), result_cache=cache,
+                             base_url=base_url, api_url=base_url)
+        service = InquiryService(scraper, 0)
+        try:
+            assert await service.start()
+            url = f"http://127.0.0.1:{service.port}"
+            async with aiohttp.ClientSession() as client:
+                async with client.get(f"{url}/inquiry/522600000001") as response:
+                    assert (await response.json())["ok"]
+
+                # Run batch lain menulis ke file cache yang sama selama service berjalan
+                other = ResultCache(path)
+                started = time.monotonic()
+                assert other.put("522600000002", {"customer_number": "522600000002"})
+                other.flush()
+                assert time.monotonic() - started < 1
+                assert other.get("522600000001")["customer_number"] == "522600000001"
+                other.close()
+
+                async with client.get(f"{url}/inquiry/522600000003") as response:
+                    assert (await response.json())["ok"]
+        finally:
+            await service.stop()
+            cache._conn.close()
+            await runner.cleanup()
+
+    asyncio.run(scenario())
+    # Hasil service sudah tersimpan walaupun cache tidak ditutup dengan close()
+    reopened = ResultCache(path)
+    assert reopened.get("522600000003") is not None
+    reopened.close()
+
+
+def test_cached_ids_do_not_wait_for_slow_lookups(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    mock = MockBukalapak(latency="fixed:0.5", seed=1)
+
+    async def scenario():
+        runner, base_url = await start_mock_server(mock)
+        cache = ResultCache(str(tmp_path / "cache.sqlite"))
+        cache.put("522600000009", {"customer_number": "522600000009", "bills": []})
+        scraper = ScraperAPI(retry_policy=RetryPolicy(base_delay=0), result_cache=cache,
+                             base_url=base_url, api_url=base_url)
+        service = InquiryService(scraper, 0, concurrency=1)
+        try:
+            assert await service.start()
+            # Satu-satunya slot dipakai lookup lambat; duplikatnya tidak mengambil slot lagi
+            slow = [asyncio.ensure_future(service.lookup("522600000001")) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            started = time.monotonic()
+            assert (await service.lookup("522600000009"))["ok"]
+            assert time.monotonic() - started < 0.2
+            assert not any(task.done() for task in slow)
+
+            results = await asyncio.gather(*slow)
+            assert results[0] == results[1] and mock.stats["inquiries"] == 1
+            assert (cache.hits, cache.misses) == (1, 1)
+        finally:
+            await service.stop()
+            cache.close()
+            await runner.cleanup()
+
+    asyncio.run(scenario())
@@ -0,0 +1,38 @@
+from modules.journal import RunJournal
+from modules.models import CustomerInfo, CustomerJob, InquiryResult
+from modules.pipeline import ReportCollector
+from modules.sharding import merge_shards, select_shard, shard_of, shard_path
+
+
+def test_shard_of_is_stable_and_covers_every_job():
+    jobs = [CustomerJob(str(522600000000 + i), "a.txt") for i in range(200)]
+
+    shards = [select_shard(jobs, index, 4) for index in range(4)]
+
+    assert shard_of("522601298903", 4) == shard_of("522601298903", 4) == 1
+    assert sorted(job.customer_number for shard in shards for job in shard) == [job.customer_number for job in jobs]
+    assert all(shards)
+
+
+def test_shard_path_names_partial_journal():
+    assert shard_path("output/run_journal.jsonl", 0, 4) == "output/run_journal.shard-1-of-4.jsonl"
+
+
+def test_merge_shards_restores_info_and_keeps_latest_entry(tmp_path):
+    info = CustomerInfo("RBM1", "G1", "Budi", "Jl. A", "R", "R1", 900)
+    first, second = str(tmp_path / "s1.jsonl"), str(tmp_path / "s2.jsonl")
+    journal = RunJournal(first)
+    journal.record(InquiryResult.from_response(CustomerJob("1", "JAB.xlsx", info), {"message": "Error: timeout"}))
+    journal.record(InquiryResult.from_response(CustomerJob("1", "JAB.xlsx", info), {"customer_number": "1"}))
+    journal.close()
+    journal = RunJournal(second)
+    journal.record(InquiryResult.from_response(CustomerJob("2", "a.txt"), {"message": "Data kosong"}))
+    journal.close()
+
+    collector = ReportCollector()
+    merged = merge_shards([first, second, str(tmp_path / "missing.jsonl")], [collector])
+
+    assert merged == 2
+    assert [r.customer_number for r in collector.success_data] == ["1"]
+    assert collector.success_data[0].info == info
+    assert collector.failed_data[0].error == "Data kosong"
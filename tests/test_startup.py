@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modul berat yang hanya boleh dimuat saat dibutuhkan (input/output .xlsx, Ringkasan, Parquet)
+LAZY_MODULES = ("openpyxl", "numpy", "pyarrow")
+
+# Batas waktu import main (ms); bisa dilonggarkan di mesin lambat lewat PLN_STARTUP_BUDGET_MS
+STARTUP_BUDGET_MS = int(os.environ.get("PLN_STARTUP_BUDGET_MS", "2000"))
+
+
+def import_times(module):
+    """
+    Menjalankan `python -X importtime -c "import <module>"` di proses baru.
+
+    Returns:
+        dict: nama modul -> waktu import kumulatif (mikrodetik).
+    """
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               cwd=ROOT, capture_output=True, text=True, check=True)
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_main_startup_skips_heavy_imports():
+    times = import_times("main")
+    slowest = sorted(times.items(), key=lambda item: -item[1])[:5]
+    breakdown = "import main: " + ", ".join(f"{name} {us / 1000:.0f} ms" for name, us in slowest)
+
+    loaded = sorted(name for name in times if name.split(".")[0] in LAZY_MODULES)
+    assert loaded == [], breakdown
+    assert times["main"] / 1000 < STARTUP_BUDGET_MS, breakdown
@@ -0,0 +1,47 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from modules.models import CustomerJob, InquiryResult  # noqa: E402
+from modules.summary import build_summary  # noqa: E402
+
+
+def _success(customer_number, source, bills, penalty_fee=0, tambahan=0):
+    result = InquiryResult.from_response(CustomerJob(customer_number, source), {
+        "customer_number": customer_number, "penalty_fee": penalty_fee, "admin_charge": 2500,
+        "bills": [{"bill_period": period, "amount": amount} for period, amount in bills]})
+    result.tambahan = tambahan
+    return result
+
+
+def test_build_summary_matches_record_totals():
+    success = [
+        _success("1", "JAB.xlsx", [("2024-11-01", 100000), ("2024-12-01", 50000)], penalty_fee=3000, tambahan=7),
+        _success("2", "JAB.xlsx", [("2024-12-01", 20000)]),
+        _success("3", "Dalbo.xlsx", [("2024-12-01", 10000)]),
+    ]
+    failed = [InquiryResult(CustomerJob("4", "JAK.xlsx"), error="Tidak terdaftar"),
+              InquiryResult(CustomerJob("5", "JAB.xlsx"), error="Tidak terdaftar"),
+              InquiryResult(CustomerJob("6", "JAB.xlsx"), error="Max retries exceeded.")]
+
+    by_source, by_period, matrix, by_lbr, by_error = build_summary(success, failed)
+
+    rows = {row[0]: row[1:] for row in by_source.rows}
+    # Sukses, Gagal, Tagihan, Denda, Biaya Admin, Total Tagihan, MarkUp, RPTAG (+5000 per pelanggan JAB)
+    assert rows["JAB.xlsx"] == [2, 2, 170000, 3000, 5000, 178000, 170007, 180000]
+    assert rows["Dalbo.xlsx"] == [1, 0, 10000, 0, 2500, 12500, 10000, 20000]
+    assert rows["JAK.xlsx"] == [0, 1, 0, 0, 0, 0, 0, 0]
+    assert rows["TOTAL"][:3] == [3, 3, 180000]
+    assert sum(result.summary.rptag for result in success) == rows["TOTAL"][-1]
+
+    assert by_period.rows == [["2024-11-01", "November", 1, 100000], ["2024-12-01", "Desember", 3, 80000]]
+    assert matrix.headers == ["Sumber File", "2024-11-01", "2024-12-01"]
+    assert ["JAB.xlsx", 100000, 70000] in matrix.rows
+    assert by_lbr.rows == [[1, "DES-2024", 2, 30000, 45000], [2, "NOV-2024", 1, 150000, 155000]]
+    assert by_error.rows == [["Tidak terdaftar", 2], ["Max retries exceeded.", 1]]
+
+
+def test_build_summary_handles_empty_results():
+    tables = build_summary([], [])
+    assert tables[0].rows == [["TOTAL", 0, 0, 0, 0, 0, 0, 0, 0]]
+    assert all(table.rows == [] for table in tables[1:])
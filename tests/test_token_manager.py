@@ -0,0 +1,75 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+from modules.token_manager import TokenManager
+
+
+def test_concurrent_refreshes_are_coalesced(tmp_path):
+    calls = []
+
+    async def fetch(session):
+        calls.append(session)
+        await asyncio.sleep(0.01)
+        return f"token-{len(calls)}"
+
+    manager = TokenManager(fetch, cache_file=str(tmp_path / "token_cache.json"))
+
+    async def scenario():
+        first = await manager.get_token("session")
+        refreshed = await asyncio.gather(*(manager.refresh("session", stale_token=first) for _ in range(50)))
+        return first, refreshed
+
+    first, refreshed = asyncio.run(scenario())
+
+    assert first == "token-1"
+    assert set(refreshed) == {"token-2"}
+    assert len(calls) == 2
+    with open(tmp_path / "token_cache.json", encoding="utf-8") as f:
+        assert json.load(f)["access_token"] == "token-2"
+
+
+def test_cache_is_read_once_and_expiry_kept_in_memory(tmp_path):
+    cache_file = tmp_path / "token_cache.json"
+    issued = datetime(2024, 1, 1, 10, 0, 0)
+    cache_file.write_text(json.dumps({"access_token": "cached", "timestamp": issued.strftime("%Y-%m-%dT%H:%M:%S")}))
+    now = [issued + timedelta(minutes=30)]
+
+    async def fetch(session):
+        return "fresh"
+
+    manager = TokenManager(fetch, cache_file=str(cache_file), clock=lambda: now[0])
+    cache_file.unlink()
+
+    assert asyncio.run(manager.get_token(None)) == "cached"
+    now[0] = issued + timedelta(minutes=57)
+    assert manager.is_near_expiry()
+    assert asyncio.run(manager.get_token(None)) == "fresh"
+
+
+def test_failed_background_refresh_backs_off(tmp_path):
+    cache_file = tmp_path / "token_cache.json"
+    issued = datetime(2024, 1, 1, 10, 0, 0)
+    cache_file.write_text(json.dumps({"access_token": "cached", "timestamp": issued.strftime("%Y-%m-%dT%H:%M:%S")}))
+    now = [issued + timedelta(minutes=58)]
+    results = [None, None, None, None, "fresh"]
+
+    async def fetch(session):
+        return results.pop(0)
+
+    manager = TokenManager(fetch, cache_file=str(cache_file), clock=lambda: now[0])
+
+    async def scenario():
+        # Urutan yang sama dengan _refresh_loop, dengan jam palsu sebagai pengganti sleep
+        delays = []
+        while results:
+            delay = manager.next_refresh_delay()
+            delays.append(delay)
+            now[0] += timedelta(seconds=delay)
+            await manager.refresh(None, stale_token=manager.token)
+        return delays
+
+    # Token lama masih terisi tetapi hampir kadaluarsa: setelah gagal, jeda berlipat dua (bukan tiap detik)
+    assert asyncio.run(scenario()) == [1, 30, 60, 120, 240]
+    assert manager.token == "fresh" and manager.refresh_failures == 0
+    assert manager.next_refresh_delay() == 55 * 60